@@ -12,12 +12,18 @@
 ### the following functions:
 ### * it-api-cn
 ### * it-api-clientidentifier <key>
+### * it-api-status-report < "key<TAB>value" lines
+### * it-api-text <resource>
 
 
 BASE_URL="https://www.stats.umanitoba.ca/it-mgmt/api/v1/"
 #BASE_URL="http://localhost:8000/it-mgmt/api/v1/"
 CURL="/usr/bin/curl --connect-timeout 2 -fsLX"
 ACCEPT_HEADER="Accept: application/json; indent=4"
+# the plain text API, e.g., computer/<host_id>/flags/
+TEXT_URL="${BASE_URL%v1/}"
+# last responses from the plain text API, for conditional requests.
+CACHE_DIR="/var/db/.it-api-cache"
 
 
 # get a particular value from lines of the format "key": "value"
@@ -162,15 +168,15 @@ function get-network-type()
 }
 
 
-function create-network-ports()
+# List the hardware network ports of this computer, as lines of
+# "device<TAB>type code<TAB>MAC address".
+function list-network-ports()
 {
-    local computer_url=$1
     local line=""
     local port=""
     local devname=""
     local ether=""
     local typecode=""
-    local primary=""
     
     /usr/sbin/networksetup -listallhardwareports | \
     while read line ; do
@@ -185,15 +191,7 @@ function create-network-ports()
                 echo "Unknown port type: ${port}" 2>/dev/null
             else
                 if [ "${ether}" != "N/A" ]; then
-                    primary=""
-                    if [ "${typecode}" == "e" ]; then
-                        primary="--data-urlencode primary=true"
-                    fi
-                    it-api-create networkinterfaces/ ${primary} \
-                        --data-urlencode "computer=${computer_url}" \
-                        --data-urlencode "name=${devname}" \
-                        --data-urlencode "type=${typecode}" \
-                        --data-urlencode "mac_address=${ether}"
+                    printf "%s\t%s\t%s\n" "${devname}" "${typecode}" "${ether}"
                 fi
             fi
         fi
@@ -201,6 +199,30 @@ function create-network-ports()
 }
 
 
+# Create (or update) all the network ports of a computer in a single
+# request; ethernet ports are primary.
+function create-network-ports()
+{
+    local computer_url=$1
+    local json=""
+    
+    json=$(list-network-ports | awk -F '\t' -v computer="${computer_url}" '
+        function esc(s) {
+            gsub(/\\/, "&&", s); gsub(/"/, "\\\"", s)
+            return s
+        }
+        BEGIN { printf "[" }
+        NF >= 3 {
+            printf "%s{\"computer\": \"%s\", \"name\": \"%s\", ", sep, esc(computer), esc($1)
+            printf "\"type\": \"%s\", \"mac_address\": \"%s\", ", esc($2), esc($3)
+            printf "\"primary\": %s}", ($2 == "e") ? "true" : "false"
+            sep = ", "
+        }
+        END { print "]" }')
+    it-api-create networkinterfaces/bulk/ -H "Content-Type: application/json" --data-binary "${json}"
+}
+
+
 function it-api-create-computer()
 {
     local hardware_data="$(system_profiler SPHardwareDataType)"
@@ -300,4 +322,60 @@ function it-api-cn()
 }
 
 
+# Report all statuses for this computer in a single request.
+# Reads lines of the form "key<TAB>value" on stdin.
+function it-api-status-report()
+{
+    local json=""
+    
+    json=$(awk -F '\t' -v host_id="${HOST_ID}" '
+        function esc(s) {
+            gsub(/\\/, "&&", s); gsub(/"/, "\\\"", s); gsub(/\t/, "\\t", s)
+            return s
+        }
+        BEGIN { printf "{\"host_id\": \"%s\", \"statuses\": {", host_id }
+        NF > 0 {
+            printf "%s\"%s\": \"%s\"", sep, esc($1), esc(substr($0, length($1) + 2))
+            sep = ", "
+        }
+        END { print "}}" }')
+    it-api-create statuses/bulk/ -H "Content-Type: application/json" --data-binary "${json}"
+}
+
+
+# GET a plain text resource, e.g., "computer/${HOST_ID}/flags/".
+# The last response is kept and revalidated with its ETag, so an
+# unchanged resource is not sent again.
+function it-api-text()
+{
+    local RESOURCE=$1
+    local cache="${CACHE_DIR}/$(printf '%s' "${RESOURCE}" | tr '/' '_')"
+    local status=""
+    local conditional=()
+    
+    mkdir -p "${CACHE_DIR}" 2>/dev/null
+    if [ -f "${cache}" ] && [ -s "${cache}.etag" ]; then
+        conditional=(-H "If-None-Match: $(cat "${cache}.etag")")
+    fi
+    status=$(/usr/bin/curl --connect-timeout 2 -sL "${TEXT_URL}${RESOURCE}" \
+        "${conditional[@]}" -D "${cache}.headers" -o "${cache}.new" \
+        -w '%{http_code}')
+    case "${status}" in
+        200)
+            mv "${cache}.new" "${cache}"
+            grep -i '^ETag:' "${cache}.headers" | tail -1 | cut -f 2- -d ' ' \
+                | tr -d '\r' > "${cache}.etag"
+            ;;
+        304)
+            rm -f "${cache}.new"
+            ;;
+        *)
+            rm -f "${cache}.new"
+            return 22   # EINVAL - Invalid Argument
+            ;;
+    esac
+    cat "${cache}"
+}
+
+
 ### END IT Mgmt API bash script
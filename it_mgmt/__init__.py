@@ -2,6 +2,7 @@
 from __future__ import print_function, unicode_literals
 
 from mgmt_common import VERSION
+from mgmt_common.bulk import bulk_mode
 
 #######################
 ###############################################################
@@ -16,6 +16,7 @@ from mgmt_common.admin import (
     mark_inactive,
 )
 
+from . import assetsync
 from .forms import (
     ComputerForm,
     ComputerKeyForm,
@@ -171,7 +172,13 @@ class ComputerAdmin(MgmtActiveAdminMixin, admin.ModelAdmin):
     save_as = True
     save_on_top = True
     form = ComputerForm
-    actions = [mark_inactive]
+    actions = [mark_inactive, "sync_assets"]
+
+    def sync_assets(self, request, queryset):
+        n = assetsync.computers_to_assets(queryset.values_list("pk", flat=True))
+        self.message_user(request, "{0} asset(s) updated.".format(n))
+
+    sync_assets.short_description = "Copy person and room to the asset"
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "person":
@@ -294,12 +301,19 @@ admin.site.register(NetworkInterface, NetworkInterfaceAdmin)
 
 
 class IPAddressAdmin(MgmtActiveAdminMixin, admin.ModelAdmin):
-    list_display = ["number", "hostname", "in_use", "aliases"]
+    list_display = ["address", "hostname", "in_use", "aliases"]
     list_filter = ["active", "in_use"]
-    ordering = ["number"]
+    # numeric, rather than text, order.
+    ordering = ["packed"]
     actions = [mark_inactive]
     search_fields = ["hostname", "number", "aliases"]
 
+    def address(self, obj):
+        return obj.number
+
+    address.short_description = "Number"
+    address.admin_order_field = "packed"
+
 
 admin.site.register(IPAddress, IPAddressAdmin)
 
@@ -44,7 +44,7 @@ class ComputerResource(ModelResource):
 
     class Meta:
         queryset = Computer.objects.active()
-        excludes = ("admin_user", "admin_password", "ssh_port")
+        excludes = ("admin_user", "admin_password", "ssh_port", "search_text")
         serializer = PrettyJSONSerializer()
         authentication = ItMgmtAuthentication()
         authorization = ItMgmtAuthorization()
@@ -56,6 +56,7 @@ class ComputerResource(ModelResource):
 class IPAddressResource(ModelResource):
     class Meta:
         queryset = IPAddress.objects.active()
+        excludes = ("packed",)
         serializer = PrettyJSONSerializer()
         filtering = {"number": ALL, "hostname": ALL, "aliases": ALL, "in_use": ALL}
         authentication = ItMgmtAuthentication()
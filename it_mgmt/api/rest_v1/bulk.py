@@ -0,0 +1,146 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+
+#######################
+"""
+Bulk create/update ("upsert") for the IT Management REST API.
+"""
+###############################################################
+
+###############################################################
+
+
+class BulkUpsertMixin(object):
+    """
+    Create or update many objects in one request, and one transaction:
+    POST (or PATCH) a list of objects to ``<resource>/bulk/``; a list
+    POSTed to the resource itself is handled the same way.
+
+    Objects are matched to existing ones by their ``upsert_key_fields``
+    (unique together).  With POST, a matched object is replaced (as with
+    PUT), and others are created; with PATCH, objects are only updated
+    (partially), and must exist.
+
+    The response has a result for each object, in order: its ``status``
+    ("created" or "updated") and ``data``.  When any object is invalid,
+    nothing is saved; the response is a 400 with the ``errors`` of each
+    invalid object (the others get an empty result).
+    """
+
+    upsert_key_fields = []
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk_upsert(request, partial=False)
+        return super(BulkUpsertMixin, self).create(request, *args, **kwargs)
+
+    @action(detail=False, methods=["post", "patch"])
+    def bulk(self, request):
+        if not isinstance(request.data, list):
+            raise ValidationError({"detail": ["Give a list of objects."]})
+        return self.bulk_upsert(request, partial=request.method == "PATCH")
+
+    def get_upsert_key(self, serializer, row):
+        """
+        Return the tuple of (validated) key values for the data ``row``.
+        Related objects are given by their primary key.
+        """
+        if not isinstance(row, dict):
+            raise ValidationError({"detail": ["Give an object."]})
+        key = []
+        for name in self.upsert_key_fields:
+            field = serializer.fields[name]
+            if name not in row:
+                raise ValidationError({name: [field.error_messages["required"]]})
+            try:
+                # field validators (e.g., uniqueness) do not apply to keys.
+                value = field.to_internal_value(row[name])
+            except ValidationError as e:
+                raise ValidationError({name: e.detail})
+            key.append(getattr(value, "pk", value))
+        return tuple(key)
+
+    def check_upsert_permissions(self, request, updating):
+        if not updating or request.method == "PATCH":
+            return
+        opts = self.get_queryset().model._meta
+        codename = "{0}.change_{1}".format(opts.app_label, opts.model_name)
+        if not request.user.has_perm(codename):
+            raise PermissionDenied()
+
+    def bulk_upsert(self, request, partial):
+        model = self.get_queryset().model
+        key_serializer = self.get_serializer()
+        keys = []
+        errors = {}
+        for i, row in enumerate(request.data):
+            try:
+                keys.append(self.get_upsert_key(key_serializer, row))
+            except ValidationError as e:
+                keys.append(None)
+                errors[i] = e.detail
+
+        with transaction.atomic():
+            attnames = [
+                model._meta.get_field(f).attname for f in self.upsert_key_fields
+            ]
+            queryset = model._default_manager.select_for_update().by_keys(
+                attnames, [key for key in keys if key is not None]
+            )
+            existing = dict(
+                [(tuple([getattr(obj, a) for a in attnames]), obj) for obj in queryset]
+            )
+            objs = []
+            seen = set()
+            update_fields = set()
+            for i, (row, key) in enumerate(zip(request.data, keys)):
+                if key is None:
+                    continue
+                instance = existing.get(key)
+                if key in seen:
+                    errors[i] = {"detail": ["Duplicates an earlier object."]}
+                    continue
+                seen.add(key)
+                if instance is None and partial:
+                    errors[i] = {"detail": ["Not found."]}
+                    continue
+                serializer = self.get_serializer(instance, data=row, partial=partial)
+                if not serializer.is_valid():
+                    errors[i] = serializer.errors
+                    continue
+                obj = instance if instance is not None else model()
+                for name, value in serializer.validated_data.items():
+                    setattr(obj, name, value)
+                if instance is not None:
+                    update_fields.update(serializer.validated_data)
+                objs.append(obj)
+            update_fields.difference_update(self.upsert_key_fields)
+            if errors:
+                results = [
+                    {"errors": errors[i]} if i in errors else {}
+                    for i in range(len(request.data))
+                ]
+                return Response(results, status=status.HTTP_400_BAD_REQUEST)
+
+            self.check_upsert_permissions(request, bool(existing))
+            created = [obj._state.adding for obj in objs]
+            model._default_manager.bulk_save(
+                objs, update_fields, self.upsert_key_fields
+            )
+        results = [
+            {
+                "status": "created" if is_new else "updated",
+                "data": self.get_serializer(obj).data,
+            }
+            for obj, is_new in zip(objs, created)
+        ]
+        return Response(results, status=status.HTTP_200_OK)
+
+
+###############################################################
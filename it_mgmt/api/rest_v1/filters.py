@@ -0,0 +1,100 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from django.core.exceptions import FieldDoesNotExist
+
+#######################
+"""
+Query parameter filtering for the IT Management REST API.
+
+A viewset whitelists fields in ``filter_fields``; each may be given as
+``?field=value`` (repeat it for several values), or with an operator:
+
+* ``?field__in=a,b,c``
+* ``?field__prefix=abc``
+* ``?field__range=low,high``
+* ``?field__isnull=true``
+"""
+###############################################################
+
+# query parameter operator -> Django lookup.
+OPERATORS = {"in": "in", "prefix": "startswith", "range": "range", "isnull": "isnull"}
+
+###############################################################
+
+
+def _leading_index_columns(model):
+    """
+    The names of the fields which lead some index on ``model``.
+    """
+    opts = model._meta
+    names = set()
+    for field in opts.concrete_fields:
+        if field.primary_key or field.unique or field.db_index:
+            names.add(field.name)
+    for fields in list(opts.unique_together) + list(opts.index_together):
+        names.add(fields[0])
+    for index in opts.indexes:
+        names.add(index.fields[0].lstrip("-"))
+    return names
+
+
+def is_indexed(model, path):
+    """
+    Whether filtering ``model`` on the field ``path`` (e.g.,
+    ``computer__host_id``) can use an index.
+    """
+    parts = path.split("__")
+    for name in parts[:-1]:
+        model = model._meta.get_field(name).related_model
+    name = parts[-1]
+    if name == "pk":
+        return True
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return name in _leading_index_columns(model)
+
+
+###############################################################
+
+
+def _is_true(value):
+    return value.lower() in ["1", "t", "true", "y", "yes"]
+
+
+def parse_filters(query_params, filter_fields):
+    """
+    Return a list of ``(field, lookup, value)`` for the whitelisted
+    ``filter_fields`` in ``query_params``; other parameters are ignored.
+    Raises ValueError for malformed values.
+    """
+    result = []
+    for param in query_params:
+        values = query_params.getlist(param)
+        if param in filter_fields:
+            if len(values) == 1:
+                result.append((param, "exact", values[0]))
+            else:
+                result.append((param, "in", values))
+            continue
+        if "__" not in param:
+            continue
+        field, operator = param.rsplit("__", 1)
+        if field not in filter_fields or operator not in OPERATORS:
+            continue
+        value = values[-1]
+        if operator == "in":
+            value = [v for item in values for v in item.split(",")]
+        elif operator == "range":
+            value = value.split(",")
+            if len(value) != 2:
+                raise ValueError("{0}: give two values, low,high".format(param))
+        elif operator == "isnull":
+            value = _is_true(value)
+        result.append((field, OPERATORS[operator], value))
+    return result
+
+
+###############################################################
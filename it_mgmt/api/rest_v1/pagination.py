@@ -0,0 +1,82 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from ... import conf
+
+#######################
+"""
+Pagination for the IT Management REST API.
+"""
+###############################################################
+
+###############################################################
+
+
+class ItMgmtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key: each page is a range scan of
+    the primary key index, however deep into the table it is.  (The
+    cursor holds the value of the first ordering field only, with an
+    offset past rows which share it, so a first field with no index, or
+    with many equal values, would lose the range scan.)
+
+    Lists filtered by query parameters (e.g., ``?host_id=...``) also
+    report their ``count``, which API clients use to check for a unique
+    match; counting whole tables is left out.
+
+    A view's ``?ordering=`` (see FilterModelViewSet) replaces the
+    default, with pk added to give a total order; its first field then
+    keys the cursor.
+    """
+
+    ordering = "pk"
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, request):
+        self.page_size = conf.get("api:page_size")
+        self.max_page_size = conf.get("api:max_page_size")
+        return super(ItMgmtCursorPagination, self).get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        if hasattr(view, "get_requested_ordering"):
+            ordering = view.get_requested_ordering()
+        if ordering is None:
+            return super(ItMgmtCursorPagination, self).get_ordering(
+                request, queryset, view
+            )
+        if not set(ordering) & set(["pk", "-pk"]):
+            ordering += ("pk",)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        names, defer = queryset.query.deferred_loading
+        if names and not defer:
+            # a sparse queryset (see related.py) still needs its cursor fields.
+            ordering = self.get_ordering(request, queryset, view)
+            names = set(names) | set([f.lstrip("-") for f in ordering])
+            queryset = queryset.only(*sorted(names))
+        if getattr(view, "query_filters", None):
+            self.count = queryset.count()
+        return super(ItMgmtCursorPagination, self).paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        items = [
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]
+        if self.count is not None:
+            items.insert(0, ("count", self.count))
+        return Response(OrderedDict(items))
+
+
+###############################################################
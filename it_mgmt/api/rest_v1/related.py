@@ -0,0 +1,161 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import HyperlinkedIdentityField, RelatedField
+
+#######################
+"""
+Work out the ``select_related`` / ``prefetch_related`` a serializer
+needs from its field tree, so that rendering a list of objects takes a
+fixed number of queries, however long the list is.
+
+For sparse serializers (see serializers.SparseFieldsMixin) the columns
+loaded are narrowed with ``only()`` as well.
+"""
+###############################################################
+
+###############################################################
+
+
+def _relation(model, name):
+    """
+    Return the relation field on ``model`` for the attribute ``name``
+    (including reverse accessors such as ``foo_set``), or None.
+    """
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None:
+            continue
+        if field.auto_created and not field.concrete:
+            accessor = field.get_accessor_name()
+        else:
+            accessor = field.name
+        if accessor == name:
+            return field
+    return None
+
+
+###############################################################
+
+
+def _always_select_related(model, prefix):
+    """
+    The paths the default manager of ``model`` always selects (because
+    its string representation uses them; see MgmtBaseManager).
+    """
+    names = getattr(model._default_manager, "always_select_related", None) or []
+    return [prefix + name for name in names]
+
+
+###############################################################
+
+
+def related_lookups(serializer, model, prefix=""):
+    """
+    Return ``(select_related, prefetch_related)`` lists for rendering
+    ``model`` instances with ``serializer`` (an instance).
+    """
+    select = []
+    prefetch = []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+        attrs = field.source_attrs
+        relation = _relation(model, attrs[0])
+        if relation is None:
+            continue
+        path = prefix + attrs[0]
+        many = relation.one_to_many or relation.many_to_many
+        related_model = relation.related_model
+
+        if isinstance(field, serializers.ListSerializer):
+            sub_select, sub_prefetch = related_lookups(field.child, related_model)
+            queryset = related_model._default_manager.all()
+            if sub_select:
+                queryset = queryset.select_related(*sub_select)
+            if sub_prefetch:
+                queryset = queryset.prefetch_related(*sub_prefetch)
+            prefetch.append(Prefetch(path, queryset=queryset))
+        elif many:
+            # a many related field (e.g., hyperlinks), or a value
+            # reached through a to-many relation.
+            prefetch.append(path)
+        elif isinstance(field, serializers.BaseSerializer):
+            select.append(path)
+            sub_select, sub_prefetch = related_lookups(
+                field, related_model, prefix=path + "__"
+            )
+            select.extend(sub_select)
+            prefetch.extend(sub_prefetch)
+        elif isinstance(field, RelatedField):
+            if len(attrs) == 1 and field.use_pk_only_optimization():
+                continue  # the pk is on this row already.
+            select.append(path)
+            select.extend(_always_select_related(related_model, path + "__"))
+        else:
+            # a plain field with a dotted source, e.g. "user.username".
+            select.append(path)
+    return select, prefetch
+
+
+###############################################################
+
+
+def only_fields(serializer, model):
+    """
+    Return the names of the ``model`` fields ``serializer`` reads from
+    the row itself, or None when that cannot be worked out (e.g., a
+    method field, or a source which is a model property).
+    """
+    names = set([model._meta.pk.name])
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if isinstance(field, HyperlinkedIdentityField):
+            names.add(field.lookup_field)
+            continue
+        if field.source == "*":
+            return None
+        name = field.source_attrs[0]
+        if name == "pk":
+            continue
+        relation = _relation(model, name)
+        if relation is not None:
+            if relation.concrete and not relation.many_to_many:
+                names.add(relation.name)
+            continue
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not model_field.concrete:
+            return None
+        names.add(model_field.name)
+    return names
+
+
+###############################################################
+
+
+def optimize_queryset(queryset, serializer):
+    """
+    Apply the related lookups ``serializer`` needs to ``queryset``.
+    """
+    select, prefetch = related_lookups(serializer, queryset.model)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if getattr(serializer, "sparse", False):
+        names = only_fields(serializer, queryset.model)
+        selected = queryset.query.select_related
+        if names is not None and selected is not True:
+            # fields traversed by select_related() cannot be deferred.
+            names.update(selected or {})
+            queryset = queryset.only(*sorted(names))
+    return queryset
+
+
+###############################################################
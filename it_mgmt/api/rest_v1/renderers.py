@@ -4,43 +4,78 @@ from __future__ import print_function, unicode_literals
 from django.utils import six
 from django.utils.encoding import smart_text
 from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
 
 #######################
+"""
+Renderers for the IT Management REST API.
+"""
 ###############################################################
 
+# backslash first, so the escapes are not themselves escaped.
+ESCAPES = [("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r")]
+
 ###############################################################
 
 
 class PlainTextRenderer(renderers.BaseRenderer):
+    """
+    Tab delimited text, for ``cut -f`` and friends: one value per line,
+    each dictionary key followed by its value, nested values indented
+    by tabs.  Tabs, newlines and backslashes within keys and values are
+    escaped (as ``\\t``, ``\\n`` and ``\\\\``); booleans are ``true`` or
+    ``false``, and None is empty.
+
+    The text is generated a line at a time (see ``render_lines()``),
+    from lists or any other iterable, so long listings can be streamed.
+    """
+
     media_type = "text/plain"
     format = "txt"
 
-    def _data_render(self, obj, indent=-1):
-        """
-        Good enough for government work...
-        """
+    _encoder = JSONEncoder()
+
+    def _scalar_text(self, obj):
+        if obj is None:
+            return ""
+        if isinstance(obj, bool):
+            return "true" if obj else "false"
+        if not isinstance(obj, six.string_types + six.integer_types + (float,)):
+            # dates, times, decimals, UUIDs, ...: as in the JSON output.
+            obj = self._encoder.default(obj)
+        text = smart_text(obj)
+        for old, new in ESCAPES:
+            text = text.replace(old, new)
+        return text
+
+    def _lines(self, obj, indent):
         # compound values
         if isinstance(obj, dict):
-            return "\n".join(
-                [
-                    self._data_render(key, indent + 1) + self._data_render(value, 1)
-                    for key, value in obj.items()
-                ]
-            )
-        if isinstance(obj, list):
-            return "\n".join([self._data_render(e, indent + 1) for e in obj])
+            for key, value in obj.items():
+                key_line = "\t" * (indent + 1) + self._scalar_text(key)
+                value_lines = self._lines(value, 1)
+                first = next(value_lines, None)
+                yield key_line if first is None else key_line + first
+                for line in value_lines:
+                    yield line
+            return
+        if not isinstance(obj, six.string_types) and hasattr(obj, "__iter__"):
+            for element in obj:
+                for line in self._lines(element, indent + 1):
+                    yield line
+            return
         # atomic values
-        if isinstance(obj, six.string_types):
-            return "\t" * indent + smart_text(obj)
-        if isinstance(obj, int):
-            return "\t" * indent + smart_text("{0}".format(obj))
-        if obj is None:
-            return "\t" * indent + ""
-        raise RuntimeError("uknown object type: {0!r}".format(type(obj)))
+        yield "\t" * max(indent, 0) + self._scalar_text(obj)
+
+    def render_lines(self, data):
+        """
+        Generate the lines of text for ``data``, with line endings.
+        """
+        for line in self._lines(data, -1):
+            yield line + "\n"
 
     def render(self, data, media_type=None, renderer_context=None):
-        return self._data_render(data).encode(self.charset)
-        # return data.encode(self.charset)
+        return "".join(self.render_lines(data)).encode(self.charset)
 
 
 ###############################################################
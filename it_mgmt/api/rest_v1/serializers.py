@@ -1,6 +1,8 @@
 #######################
 from __future__ import print_function, unicode_literals
 
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_slug
 from it_mgmt.models import (
     ClientIdentifier,
     Computer,
@@ -8,11 +10,106 @@ from it_mgmt.models import (
     IPAddress,
     Licence,
     NetworkInterface,
+    StatusKey,
     WorkNote,
 )
 from rest_framework import serializers
 
 #######################
+"""
+Serializers for the IT Management REST API.
+
+The top level serializers take sparse fieldsets from the request
+(see SparseFieldsMixin): ``?fields=host_id,common_name`` returns only
+those fields, ``?fields=networkinterface_set.mac_address`` narrows a
+nested set, and ``?expand=`` names the nested sets to include in full.
+Nested sets not asked for are left out whenever either parameter is
+given, so ``?expand=`` alone is a compact representation.
+"""
+###############################################################
+
+
+def _split_names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+###############################################################
+
+
+class SparseFieldsMixin(object):
+    """
+    Prune the fields of a top level serializer to those requested
+    with ``?fields=`` and ``?expand=``.  ``sparse`` is set when pruned,
+    so the view can also narrow the columns it loads (see related.py).
+    """
+
+    sparse = False
+
+    def get_fields(self):
+        fields = super(SparseFieldsMixin, self).get_fields()
+        request = self.context.get("request")
+        if request is None or request.method != "GET":
+            return fields
+        if self.root not in [self, self.parent]:
+            return fields
+        params = request.query_params
+        if "fields" not in params and "expand" not in params:
+            return fields
+
+        nested = set(
+            [
+                name
+                for name, field in fields.items()
+                if isinstance(field, serializers.BaseSerializer)
+            ]
+        )
+        wanted = {}
+        if "fields" in params:
+            for name in _split_names(params["fields"]):
+                name, _, sub_name = name.partition(".")
+                sub_names = wanted.setdefault(name, set())
+                if sub_name and sub_names is not None:
+                    sub_names.add(sub_name)
+                elif not sub_name:
+                    wanted[name] = None
+        else:
+            wanted = dict([(name, None) for name in fields if name not in nested])
+        for name in _split_names(params.get("expand", "")):
+            if name not in nested:
+                raise serializers.ValidationError(
+                    {"expand": ["Cannot expand: {0}".format(name)]}
+                )
+            wanted[name] = None
+
+        unknown = [name for name in wanted if name not in fields]
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": ["Unknown fields: {0}".format(", ".join(sorted(unknown)))]}
+            )
+        for name in list(fields):
+            if name not in wanted:
+                del fields[name]
+            elif wanted[name]:
+                self._prune_nested(name, fields[name], wanted[name])
+        self.sparse = True
+        return fields
+
+    def _prune_nested(self, name, field, sub_names):
+        child = getattr(field, "child", field)
+        if not isinstance(child, serializers.BaseSerializer):
+            raise serializers.ValidationError(
+                {"fields": ["Not a nested set: {0}".format(name)]}
+            )
+        unknown = [n for n in sub_names if n not in child.fields]
+        if unknown:
+            message = "Unknown fields: {0}".format(
+                ", ".join(sorted(["{0}.{1}".format(name, n) for n in unknown]))
+            )
+            raise serializers.ValidationError({"fields": [message]})
+        for sub_name in list(child.fields):
+            if sub_name not in sub_names:
+                del child.fields[sub_name]
+
 
 ###############################################################
 
@@ -25,7 +122,7 @@ class ComputerFlagInlineSerializer(serializers.HyperlinkedModelSerializer):
         fields = ("slug", "verbose_name")
 
 
-class ComputerFlagSerializer(ComputerFlagInlineSerializer):
+class ComputerFlagSerializer(SparseFieldsMixin, ComputerFlagInlineSerializer):
     class Meta(ComputerFlagInlineSerializer.Meta):
         fields = ("url",) + ComputerFlagInlineSerializer.Meta.fields
 
@@ -43,7 +140,7 @@ class ComputerFlagSerializer(ComputerFlagInlineSerializer):
 #         fields = ('url', ) + IPAddressInlineSerializer.Meta.fields
 
 
-class IPAddressSerializer(serializers.HyperlinkedModelSerializer):
+class IPAddressSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = IPAddress
         fields = ("url", "number", "hostname", "aliases", "in_use")
@@ -60,7 +157,7 @@ class NetworkInterfaceInlineSerializer(serializers.HyperlinkedModelSerializer):
         fields = ("name", "primary", "type", "mac_address", "managed", "ip_address")
 
 
-class NetworkInterfaceSerializer(NetworkInterfaceInlineSerializer):
+class NetworkInterfaceSerializer(SparseFieldsMixin, NetworkInterfaceInlineSerializer):
     class Meta(NetworkInterfaceInlineSerializer.Meta):
         fields = ("url", "computer") + NetworkInterfaceInlineSerializer.Meta.fields
 
@@ -74,7 +171,7 @@ class ClientIdentifierInlineSerializer(serializers.HyperlinkedModelSerializer):
         fields = ("key", "value")
 
 
-class ClientIdentifierSerializer(ClientIdentifierInlineSerializer):
+class ClientIdentifierSerializer(SparseFieldsMixin, ClientIdentifierInlineSerializer):
     class Meta(ClientIdentifierInlineSerializer.Meta):
         fields = ("url", "computer") + ClientIdentifierInlineSerializer.Meta.fields
 
@@ -90,7 +187,7 @@ class WorkNoteInlineSerializer(serializers.HyperlinkedModelSerializer):
         fields = ("user", "value")
 
 
-class WorkNoteSerializer(WorkNoteInlineSerializer):
+class WorkNoteSerializer(SparseFieldsMixin, WorkNoteInlineSerializer):
     class Meta(WorkNoteInlineSerializer.Meta):
         fields = ("url", "computer") + WorkNoteInlineSerializer.Meta.fields
 
@@ -104,7 +201,7 @@ class LicenceInlineSerializer(serializers.HyperlinkedModelSerializer):
         fields = ("value",)
 
 
-class LicenceSerializer(LicenceInlineSerializer):
+class LicenceSerializer(SparseFieldsMixin, LicenceInlineSerializer):
     class Meta(LicenceInlineSerializer.Meta):
         fields = ("url", "computer") + LicenceInlineSerializer.Meta.fields
 
@@ -112,7 +209,7 @@ class LicenceSerializer(LicenceInlineSerializer):
 ###############################################################
 
 
-class ComputerSerializer(serializers.HyperlinkedModelSerializer):
+class ComputerSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     pk = serializers.ReadOnlyField()
     room = serializers.StringRelatedField(read_only=True)
     asset = serializers.StringRelatedField(read_only=True)
@@ -145,3 +242,47 @@ class ComputerSerializer(serializers.HyperlinkedModelSerializer):
 
 
 ###############################################################
+
+
+class StatusReportSerializer(serializers.Serializer):
+    """
+    A batch of statuses for one computer, identified by either its
+    ``computer`` pk or its ``host_id``.  ``statuses`` maps StatusKey
+    slugs to values.
+    """
+
+    computer = serializers.IntegerField(required=False)
+    host_id = serializers.SlugField(required=False)
+    statuses = serializers.DictField(child=serializers.CharField(allow_blank=True))
+
+    def validate_statuses(self, value):
+        """
+        The keys become StatusKey slugs, so they must be valid ones.
+        """
+        max_length = StatusKey._meta.get_field("slug").max_length
+        invalid = []
+        for key in value:
+            try:
+                validate_slug(key)
+            except DjangoValidationError:
+                invalid.append(key)
+                continue
+            if len(key) > max_length:
+                invalid.append(key)
+        if invalid:
+            raise serializers.ValidationError(
+                "Status keys must be slugs of at most {0} characters: {1}".format(
+                    max_length, ", ".join(sorted(invalid))
+                )
+            )
+        return value
+
+    def validate(self, data):
+        if ("computer" in data) == ("host_id" in data):
+            raise serializers.ValidationError(
+                "Give exactly one of 'computer' or 'host_id'."
+            )
+        return data
+
+
+###############################################################
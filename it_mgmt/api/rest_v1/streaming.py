@@ -0,0 +1,82 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from ... import conf
+from .renderers import PlainTextRenderer
+
+#######################
+"""
+Streaming list responses for the IT Management REST API.
+"""
+###############################################################
+
+###############################################################
+
+
+class StreamingListMixin(object):
+    """
+    Lists requested with ``?stream=json``, ``?stream=ndjson`` or
+    ``?stream=txt`` (see renderers.PlainTextRenderer) are written
+    incrementally instead of paginated, so that full exports run in
+    constant memory.
+
+    Rows are read in chunks by primary key (``QuerySet.iterator()``
+    would skip ``prefetch_related``), and each chunk is serialized and
+    sent before the next is read.
+    """
+
+    stream_formats = {
+        "json": "application/json",
+        "ndjson": "application/x-ndjson",
+        "txt": "text/plain",
+    }
+
+    def list(self, request, *args, **kwargs):
+        stream = request.query_params.get("stream")
+        if not stream:
+            return super(StreamingListMixin, self).list(request, *args, **kwargs)
+        if stream not in self.stream_formats:
+            raise ValidationError(
+                {"stream": ["Use one of: {0}".format(", ".join(self.stream_formats))]}
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        items = self.stream_items(queryset)
+        if stream == "txt":
+            content = PlainTextRenderer().render_lines(items)
+        elif stream == "ndjson":
+            content = (json.dumps(item, cls=JSONEncoder) + "\n" for item in items)
+        else:
+            content = self.stream_json_list(items)
+        return StreamingHttpResponse(content, content_type=self.stream_formats[stream])
+
+    def stream_items(self, queryset):
+        """
+        Generate the serialized data of each object in ``queryset``.
+        """
+        chunk_size = conf.get("api:stream_chunk_size")
+        queryset = queryset.order_by("pk")
+        chunk = list(queryset[:chunk_size])
+        while chunk:
+            serializer = self.get_serializer(chunk, many=True)
+            for item in serializer.data:
+                yield item
+            if len(chunk) < chunk_size:
+                break
+            chunk = list(queryset.filter(pk__gt=chunk[-1].pk)[:chunk_size])
+
+    def stream_json_list(self, items):
+        yield "["
+        separator = "\n"
+        for item in items:
+            yield separator + json.dumps(item, cls=JSONEncoder)
+            separator = ",\n"
+        yield "\n]\n"
+
+
+###############################################################
@@ -27,6 +27,12 @@ router.register(r"ipaddresses", views.IPAddressViewSet)
 # The API URLs are now determined automatically by the router.
 # Additionally, we include the login URLs for the browsable API.
 urlpatterns = [
+    url(
+        r"^statuses/bulk/$",
+        views.StatusBulkCreateView.as_view(),
+        name="status-bulk-create",
+    ),
+    url(r"^statuses/series/$", views.StatusSeriesView.as_view(), name="status-series"),
     url(r"^", include(router.urls)),
     url(r"^api-auth/", include("rest_framework.urls", namespace="itmgmt_api")),
     url(r"^api-token-auth/", obtain_auth_token),
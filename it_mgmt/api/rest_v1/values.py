@@ -0,0 +1,185 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.urls import NoReverseMatch
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.six.moves.urllib.parse import quote
+from rest_framework import fields as drf_fields
+from rest_framework import relations
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from ... import conf
+
+#######################
+"""
+A fast path for read-only REST lists of simple objects: the page is
+read with ``values()`` and each item built directly from the row,
+skipping the per-field serializer machinery and the ``reverse()`` for
+every hyperlink (which are filled into a URL template worked out once
+per request).
+
+The plan is derived from the viewset's serializer, and only when every
+field is one whose representation of a column value is the value
+itself; otherwise the list is serialized as usual.  Either way the
+output is the same.
+"""
+###############################################################
+
+# serializer fields which represent a (non-None) column value unchanged,
+# for the column types they are generated for.
+PLAIN_FIELDS = (
+    drf_fields.BooleanField,
+    drf_fields.CharField,
+    drf_fields.ChoiceField,
+    drf_fields.FloatField,
+    drf_fields.IntegerField,
+    drf_fields.NullBooleanField,
+    drf_fields.ReadOnlyField,
+)
+
+# stands in for the lookup value when reversing a URL template;
+# digits, so it matches any lookup_value_regex in use.
+_MARKER = "8675309"
+
+# what django.urls quotes in reversed URLs.
+_SAFE = RFC3986_SUBDELIMS + "/~:@"
+
+###############################################################
+
+
+def _url_template(view_name, lookup_url_kwarg, request):
+    """
+    Return a function of a lookup value giving the same URL as
+    ``reverse()``, or None.
+    """
+    try:
+        url = reverse(view_name, kwargs={lookup_url_kwarg: _MARKER}, request=request)
+    except NoReverseMatch:
+        return None
+    prefix, marker, suffix = url.rpartition(_MARKER)
+    if not marker:
+        return None
+
+    def url_for(value):
+        if value is None:
+            return None
+        return prefix + quote("{}".format(value), safe=_SAFE) + suffix
+
+    return url_for
+
+
+def _column(model, name):
+    """
+    Return the concrete model field ``name`` (or ``pk``), or None.
+    """
+    if name == "pk":
+        return model._meta.pk
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return model_field if model_field.concrete else None
+
+
+###############################################################
+
+
+def values_plan(serializer, model, request):
+    """
+    Return ``(columns, build)`` where ``build`` makes the representation
+    ``serializer`` (an instance) would give from a ``values(*columns)``
+    row of ``model``; or None when that cannot be done.
+    """
+    columns = []
+    builders = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, drf_fields.MultipleChoiceField):
+            return None
+        if len(field.source_attrs) == 1:
+            column = _column(model, field.source_attrs[0])
+        else:
+            column = None
+        url_for = None
+        if isinstance(field, relations.HyperlinkedIdentityField):
+            column = _column(model, field.lookup_field)
+            url_for = _url_template(field.view_name, field.lookup_url_kwarg, request)
+            if column is None or url_for is None:
+                return None
+        elif isinstance(field, relations.HyperlinkedRelatedField):
+            if column is None or not column.many_to_one or field.lookup_field != "pk":
+                return None
+            if column.target_field != column.related_model._meta.pk:
+                return None
+            url_for = _url_template(field.view_name, field.lookup_url_kwarg, request)
+            if url_for is None:
+                return None
+        elif isinstance(field, PLAIN_FIELDS):
+            if column is None or column.is_relation:
+                return None
+        else:
+            return None
+        columns.append(column.attname)
+        builders.append((name, column.attname, url_for))
+
+    def build(row):
+        item = OrderedDict()
+        for name, column, url_for in builders:
+            value = row[column]
+            if url_for is not None:
+                value = url_for(value)
+            item[name] = value
+        return item
+
+    return columns, build
+
+
+###############################################################
+
+
+class FastListMixin(object):
+    """
+    Viewsets with ``fast_list = True`` build plain list pages
+    (no ``?fields=``/``?expand=``, no format suffix) from ``values()``
+    rows, when ``api:fast_lists`` is set.
+    """
+
+    fast_list = False
+
+    def get_fast_list_plan(self, request):
+        if not self.fast_list or not conf.get("api:fast_lists"):
+            return None
+        if self.format_kwarg is not None:
+            return None
+        if "fields" in request.query_params or "expand" in request.query_params:
+            return None
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = values_plan(self.get_serializer(), queryset.model, request)
+        if plan is None:
+            return None
+        return queryset, plan[0], plan[1]
+
+    def list(self, request, *args, **kwargs):
+        fast_list_plan = self.get_fast_list_plan(request)
+        if fast_list_plan is None:
+            return super(FastListMixin, self).list(request, *args, **kwargs)
+        queryset, columns, build = fast_list_plan
+        queryset = queryset.select_related(None).prefetch_related(None)
+        names = set(columns)
+        if hasattr(self.paginator, "get_ordering"):
+            # the cursor is read from the rows.
+            ordering = self.paginator.get_ordering(request, queryset, self)
+            names.update([f.lstrip("-") for f in ordering])
+        rows = queryset.values(*sorted(names))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response([build(row) for row in rows])
+        return self.get_paginated_response([build(row) for row in page])
+
+
+###############################################################
@@ -1,6 +1,16 @@
 #######################
 from __future__ import print_function, unicode_literals
 
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from it_mgmt.models import (
     ClientIdentifier,
     Computer,
@@ -8,12 +18,22 @@ from it_mgmt.models import (
     IPAddress,
     Licence,
     NetworkInterface,
+    Status,
+    StatusKey,
     WorkNote,
 )
-from rest_framework import generics, permissions, renderers, viewsets
+from it_mgmt.series import BUCKETS, status_series
+from rest_framework import generics, permissions, renderers, status, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
 
+from .bulk import BulkUpsertMixin
+from .filters import is_indexed, parse_filters
+from .pagination import ItMgmtCursorPagination
+from .related import optimize_queryset
+from .renderers import PlainTextRenderer
 from .serializers import (
     ClientIdentifierSerializer,
     ComputerFlagSerializer,
@@ -21,8 +41,11 @@ from .serializers import (
     IPAddressSerializer,
     LicenceSerializer,
     NetworkInterfaceSerializer,
+    StatusReportSerializer,
     WorkNoteSerializer,
 )
+from .streaming import StreamingListMixin
+from .values import FastListMixin
 
 #######################
 ###############################################################
@@ -45,9 +68,60 @@ class FilterModelViewSet(viewsets.ModelViewSet):
     """
     Specify the names of fields to allow GET query filtering.
     E.g., filter_fields = ['host_id', ]
+    Each field also takes the operators in filters.py
+    (``?host_id__in=a,b``, ``?host_id__prefix=a``, ...).
+    Filters on unindexed fields are only accepted alongside a filter
+    on an indexed one, so no query parameters force a table scan.
+
+    Specify the names of fields to allow ordering by with ``?ordering=``.
+    E.g., ordering_fields = ['host_id', ]; ``?ordering=-host_id``.
+
+    With settings.DEBUG, responses carry the database's plan for the
+    filtered query in an ``X-Query-Plan`` header.
     """
 
     filter_fields = []
+    ordering_fields = []
+
+    def get_query_filters(self):
+        """
+        The (field, lookup, value) filters requested.
+        """
+        try:
+            return parse_filters(self.request.query_params, self.filter_fields)
+        except ValueError as e:
+            raise ValidationError({"detail": ["{0}".format(e)]})
+
+    def check_query_filters(self, model, query_filters):
+        """
+        Reject filters on unindexed fields, unless combined with
+        an indexed filter.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            return
+        fields = set([field for field, lookup, value in query_filters])
+        unindexed = [f for f in fields if not is_indexed(model, f)]
+        if unindexed and len(unindexed) == len(fields):
+            indexed = [f for f in self.filter_fields if is_indexed(model, f)]
+            message = "Unindexed; combine with a filter on one of: {0}".format(
+                ", ".join(indexed)
+            )
+            raise ValidationError(dict([(f, [message]) for f in sorted(unindexed)]))
+
+    def get_requested_ordering(self):
+        """
+        The ordering requested by ``?ordering=``, or None.
+        """
+        value = self.request.query_params.get("ordering")
+        if not value:
+            return None
+        ordering = [f.strip() for f in value.split(",") if f.strip()]
+        invalid = [f for f in ordering if f.lstrip("-") not in self.ordering_fields]
+        if invalid:
+            message = "Cannot order by: {0}".format(", ".join(invalid))
+            raise ValidationError({"ordering": [message]})
+        return tuple(ordering)
 
     def get_queryset(self):
         """
@@ -55,23 +129,63 @@ class FilterModelViewSet(viewsets.ModelViewSet):
         by filtering against any query parameters in the URL.
         """
         queryset = super(FilterModelViewSet, self).get_queryset()
+        self.query_filters = self.get_query_filters()
+        self.check_query_filters(queryset.model, self.query_filters)
         filter = {}
-        for f in self.filter_fields:
-            value = self.request.query_params.get(f, None)
-            if value is not None:
-                filter[f] = value
-        queryset = queryset.filter(**filter)
+        for field, lookup, value in self.query_filters:
+            filter["{0}__{1}".format(field, lookup)] = value
+        try:
+            queryset = queryset.filter(**filter)
+        except (ValueError, DjangoValidationError) as e:
+            raise ValidationError({"detail": ["{0}".format(e)]})
+        ordering = self.get_requested_ordering()
+        if ordering is not None:
+            queryset = queryset.order_by(*ordering)
         return queryset
 
+    def filter_queryset(self, queryset):
+        queryset = super(FilterModelViewSet, self).filter_queryset(queryset)
+        self.planned_queryset = queryset
+        return queryset
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(FilterModelViewSet, self).finalize_response(
+            request, response, *args, **kwargs
+        )
+        queryset = getattr(self, "planned_queryset", None)
+        if settings.DEBUG and queryset is not None and response.status_code < 400:
+            try:
+                plan = queryset.explain()
+            except Exception as e:
+                plan = "unavailable ({0})".format(e)
+            response["X-Query-Plan"] = " | ".join(plan.splitlines())
+        return response
+
 
 ###############################################################
 
 
-class ItMgmtModelViewSet(ItMgmtPermissions, FilterModelViewSet):
+class ItMgmtModelViewSet(
+    ItMgmtPermissions, StreamingListMixin, FastListMixin, FilterModelViewSet
+):
     """
-    Base class for all IT Management viewsets
+    Base class for all IT Management viewsets.
+    The related objects the serializer uses are fetched along with the
+    queryset (see related.py), so a page costs a fixed number of queries.
+    Lists are paginated by cursor, or streamed with ``?stream=``;
+    simple lists may be built from values() rows (see values.py).
+    Tab delimited text is available with ``?format=txt``.
     """
 
+    pagination_class = ItMgmtCursorPagination
+    renderer_classes = tuple(api_settings.DEFAULT_RENDERER_CLASSES) + (
+        PlainTextRenderer,
+    )
+
+    def get_queryset(self):
+        queryset = super(ItMgmtModelViewSet, self).get_queryset()
+        return optimize_queryset(queryset, self.get_serializer())
+
 
 ###############################################################
 
@@ -80,6 +194,7 @@ class ComputerViewSet(ItMgmtModelViewSet):
     queryset = Computer.objects.all()
     serializer_class = ComputerSerializer
     filter_fields = ["host_id"]
+    ordering_fields = ["created", "host_id"]
 
 
 ###############################################################
@@ -89,12 +204,14 @@ class ComputerFlagViewSet(ItMgmtModelViewSet):
     queryset = ComputerFlag.objects.all()
     serializer_class = ComputerFlagSerializer
     filter_fields = ["slug"]
+    ordering_fields = ["created", "slug"]
+    fast_list = True
 
 
 ###############################################################
 
 
-class NetworkInterfaceViewSet(ItMgmtModelViewSet):
+class NetworkInterfaceViewSet(BulkUpsertMixin, ItMgmtModelViewSet):
     queryset = NetworkInterface.objects.all()
     serializer_class = NetworkInterfaceSerializer
     filter_fields = [
@@ -104,6 +221,9 @@ class NetworkInterfaceViewSet(ItMgmtModelViewSet):
         "name",
         "managed",
     ]
+    ordering_fields = ["created", "mac_address"]
+    fast_list = True
+    upsert_key_fields = ["computer", "name"]
 
 
 ###############################################################
@@ -113,6 +233,7 @@ class ClientIdentifierViewSet(ItMgmtModelViewSet):
     queryset = ClientIdentifier.objects.all()
     serializer_class = ClientIdentifierSerializer
     filter_fields = ["computer__pk", "computer__host_id", "key"]
+    ordering_fields = ["created", "key"]
 
 
 ###############################################################
@@ -122,6 +243,7 @@ class WorkNoteViewSet(ItMgmtModelViewSet):
     queryset = WorkNote.objects.all()
     serializer_class = WorkNoteSerializer
     filter_fields = ["computer__pk", "computer__host_id", "user__username"]
+    ordering_fields = ["created"]
 
 
 ###############################################################
@@ -131,17 +253,173 @@ class LicenceViewSet(ItMgmtModelViewSet):
     queryset = Licence.objects.all()
     serializer_class = LicenceSerializer
     filter_fields = ["computer__pk", "computer__host_id"]
+    ordering_fields = ["created"]
 
 
 ###############################################################
 
 
-class IPAddressViewSet(ItMgmtModelViewSet):
+class IPAddressViewSet(BulkUpsertMixin, ItMgmtModelViewSet):
     queryset = IPAddress.objects.all()
     serializer_class = IPAddressSerializer
     filter_fields = ["number", "hostname", "aliases", "in_use"]
+    ordering_fields = ["created", "number", "hostname"]
+    fast_list = True
+    upsert_key_fields = ["number"]
     # TODO: figure out regex for ip4 or ip6.
     lookup_value_regex = "[0-9.]+"
 
 
 ###############################################################
+
+
+class StatusBulkCreateView(ItMgmtPermissions, generics.GenericAPIView):
+    """
+    Report many statuses, for one or many computers, in a single request.
+    POST either one report or a list of them::
+
+        {"host_id": "...", "statuses": {"<key slug>": "<value>", ...}}
+
+    (or ``"computer": <pk>`` instead of ``host_id``).
+    Unknown status keys are created.
+    """
+
+    queryset = Status.objects.all()
+    serializer_class = StatusReportSerializer
+
+    def resolve_computers(self, report_list):
+        """
+        Return a dictionary mapping ``("computer", pk)`` and
+        ``("host_id", host_id)`` to the reported computers, in one query.
+        Raises ValidationError for any which do not exist.
+        """
+        pk_set = set([r["computer"] for r in report_list if "computer" in r])
+        host_id_set = set([r["host_id"] for r in report_list if "host_id" in r])
+        computer_map = {}
+        for pk, host_id in (
+            Computer.objects.active()
+            .filter(Q(pk__in=pk_set) | Q(host_id__in=host_id_set))
+            .values_list("pk", "host_id")
+        ):
+            computer_map[("computer", pk)] = pk
+            computer_map[("host_id", host_id)] = pk
+        missing = [
+            "{0}={1}".format(*ident)
+            for ident in [("computer", pk) for pk in pk_set]
+            + [("host_id", host_id) for host_id in host_id_set]
+            if ident not in computer_map
+        ]
+        if missing:
+            raise ValidationError(
+                {"computer": ["Unknown computer: {0}".format(", ".join(missing))]}
+            )
+        return computer_map
+
+    def post(self, request, *args, **kwargs):
+        many = isinstance(request.data, list)
+        serializer = self.get_serializer(data=request.data, many=many)
+        serializer.is_valid(raise_exception=True)
+        report_list = serializer.validated_data if many else [serializer.validated_data]
+        computer_map = self.resolve_computers(report_list)
+        reports = []
+        for r in report_list:
+            ident = (
+                ("computer", r["computer"])
+                if "computer" in r
+                else ("host_id", r["host_id"])
+            )
+            reports.append((computer_map[ident], r["statuses"]))
+        status_list = Status.objects.bulk_report(reports)
+        return Response({"created": len(status_list)}, status=status.HTTP_201_CREATED)
+
+
+###############################################################
+
+
+class StatusSeriesView(ItMgmtPermissions, generics.GenericAPIView):
+    """
+    Numeric status values over time, summarized by the database.
+    Query parameters:
+
+    * ``key``: status key slug (required; may be repeated)
+    * ``computer`` (pk) or ``host_id``: may be repeated; default all
+    * ``start``, ``end``: ISO 8601 datetimes; default the last 7 days
+    * ``bucket``: one of minute, hour (default), day, week, month
+
+    Each row gives the computer pk, key slug, bucket start, and the
+    count, minimum, maximum and average of the values in the bucket.
+    The response is streamed as a JSON list, or as newline delimited
+    JSON when requested with ``Accept: application/x-ndjson``.
+    """
+
+    queryset = Status.objects.all()
+
+    def get_datetime(self, name, default):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            result = parse_datetime(value)
+        except ValueError:
+            result = None
+        if result is None:
+            raise ValidationError({name: ["Invalid datetime: {0}".format(value)]})
+        if timezone.is_naive(result):
+            result = timezone.make_aware(result)
+        return result
+
+    def get_keys(self):
+        slugs = self.request.query_params.getlist("key")
+        if not slugs:
+            raise ValidationError({"key": ["At least one key is required."]})
+        keys = list(StatusKey.objects.filter(slug__in=slugs))
+        missing = set(slugs) - set([k.slug for k in keys])
+        if missing:
+            raise ValidationError(
+                {"key": ["Unknown key: {0}".format(", ".join(sorted(missing)))]}
+            )
+        return keys
+
+    def get_computer_pks(self):
+        pk_list = self.request.query_params.getlist("computer")
+        host_id_list = self.request.query_params.getlist("host_id")
+        if not pk_list and not host_id_list:
+            return None
+        try:
+            pk_list = [int(pk) for pk in pk_list]
+        except ValueError:
+            raise ValidationError({"computer": ["Computers are given by pk."]})
+        return list(
+            Computer.objects.filter(
+                Q(pk__in=pk_list) | Q(host_id__in=host_id_list)
+            ).values_list("pk", flat=True)
+        )
+
+    def get(self, request, *args, **kwargs):
+        bucket = request.query_params.get("bucket", "hour")
+        if bucket not in BUCKETS:
+            raise ValidationError(
+                {"bucket": ["Use one of: {0}".format(", ".join(BUCKETS))]}
+            )
+        end = self.get_datetime("end", timezone.now())
+        start = self.get_datetime("start", end - timedelta(days=7))
+        rows = status_series(
+            self.get_keys(), start, end, bucket, self.get_computer_pks()
+        )
+        if "application/x-ndjson" in request.META.get("HTTP_ACCEPT", ""):
+            content = (json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows)
+            return StreamingHttpResponse(content, content_type="application/x-ndjson")
+        return StreamingHttpResponse(
+            self.json_list(rows), content_type="application/json"
+        )
+
+    def json_list(self, rows):
+        yield "["
+        separator = "\n"
+        for row in rows:
+            yield separator + json.dumps(row, cls=DjangoJSONEncoder)
+            separator = ",\n"
+        yield "\n]\n"
+
+
+###############################################################
@@ -1,14 +1,18 @@
 #######################
 from __future__ import print_function, unicode_literals
 
+import calendar
 import json
 import logging
 
 from django.http import Http404, HttpResponse
 from django.utils import six
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.views.generic.base import TemplateView
 from django.views.generic.detail import BaseDetailView
 
+from .. import ipcache
 from ..models import ClientIdentifier, Computer
 from ..utils.random_names import get_random_name
 from .ipware import get_ip
@@ -53,7 +57,10 @@ class ByRequestMixin(object):
         ip_string = get_ip(self.request)
         if ip_string is None:
             raise Http404("Cannot determine IP address of client")
-        queryset = queryset.filter(networkinterface__ip_address__number=ip_string)
+        pk_list = ipcache.computer_pks(ip_string)
+        if not pk_list:
+            raise Http404("No computer found")
+        queryset = queryset.filter(pk__in=pk_list)
         try:
             # Get the single item from the filtered queryset
             obj = queryset.get()
@@ -107,6 +114,39 @@ class TextResponseMixin(object):
 #######################################################################
 
 
+class ConditionalTextResponseMixin(TextResponseMixin):
+    """
+    A text response for computer data, with an ETag and Last-Modified
+    from the computer modification time (which related objects bump; see
+    handlers.computer_related_touch), so that conditional requests
+    can be answered with 304 before any related tables are read.
+    """
+
+    def get_validators(self, obj):
+        last_modified = calendar.timegm(obj.modified.utctimetuple())
+        etag = quote_etag(
+            "{0}-{1}".format(obj.pk, obj.modified.strftime("%Y%m%d%H%M%S%f"))
+        )
+        return etag, last_modified
+
+    def render_to_response(self, context, **response_kwargs):
+        etag, last_modified = self.get_validators(context["object"])
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super(ConditionalTextResponseMixin, self).render_to_response(
+                context, **response_kwargs
+            )
+        if response.status_code in [200, 304]:
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+#######################################################################
+
+
 class JsonResponseMixin(object):
     """
     This will require one of the JsonMixin-s also.
@@ -122,7 +162,7 @@ class JsonResponseMixin(object):
 #######################################################################
 
 
-class CommonNameTextMixin(TextResponseMixin):
+class CommonNameTextMixin(ConditionalTextResponseMixin):
     """
     Return the text string for the common name of the computer making
     this request.
@@ -135,7 +175,7 @@ class CommonNameTextMixin(TextResponseMixin):
 #######################################################################
 
 
-class FlagsTextMixin(TextResponseMixin):
+class FlagsTextMixin(ConditionalTextResponseMixin):
     """
     Return the text string for the common name of the computer making
     this request.
@@ -149,7 +189,7 @@ class FlagsTextMixin(TextResponseMixin):
 #######################################################################
 
 
-class ClientIdentifierListTextMixin(TextResponseMixin):
+class ClientIdentifierListTextMixin(ConditionalTextResponseMixin):
     """
     Return the text string for the common name of the computer making
     this request.
@@ -168,7 +208,7 @@ class ClientIdentifierListTextMixin(TextResponseMixin):
 #######################################################################
 
 
-class ClientIdentifierDetailTextMixin(TextResponseMixin):
+class ClientIdentifierDetailTextMixin(ConditionalTextResponseMixin):
     """
     Return the text string for the common name of the computer making
     this request.
@@ -0,0 +1,190 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import threading
+
+from django.db import transaction
+from django.utils.timezone import now
+from mgmt_common import bulk
+
+from . import conf
+
+#######################
+"""
+Keep the person and room of computers and their assets in agreement.
+
+Changes are applied set-wise: a batch of computers (or assets) costs
+one query to find what differs, and one ``bulk_update()`` to fix it,
+however many rows are involved.  Updates are made without ``save()``,
+so no further signals fire and the two sides can never re-save each
+other.
+
+A computer always pushes its values to its asset; an asset only pushes
+its values to a computer when that is the only computer for the asset.
+When both sides of a pair change in the same batch, the computer wins.
+
+The signal handlers call ``changed()``, which syncs right away, or
+when the transaction commits if "asset_sync:on_commit" is set, or at
+the end of a ``bulk_mode()`` block.
+"""
+#######################################################################
+
+SYNC_FIELDS = ["person", "room"]
+
+_pending = threading.local()
+
+#######################################################################
+
+
+def _attnames():
+    return [name + "_id" for name in SYNC_FIELDS]
+
+
+def _columns():
+    # the computer's values, then its asset's.
+    return _attnames() + ["asset__" + a for a in _attnames()]
+
+
+def copy_values(source, target):
+    """
+    Copy the synchronized foreign keys from ``source`` to ``target``,
+    dropping any related objects ``target`` had cached for them.
+    """
+    for name in SYNC_FIELDS:
+        attname = name + "_id"
+        value = getattr(source, attname)
+        if getattr(target, attname) == value:
+            continue
+        setattr(target, attname, value)
+        field = target._meta.get_field(name)
+        if field.is_cached(target):
+            field.delete_cached_value(target)
+
+
+def _bulk_update(model, changes):
+    """
+    ``changes`` maps pk -> a tuple of values for SYNC_FIELDS.
+    """
+    if not changes:
+        return 0
+    modified = now()
+    objs = []
+    for pk, values in changes.items():
+        obj = model(pk=pk, modified=modified)
+        for attname, value in zip(_attnames(), values):
+            setattr(obj, attname, value)
+        objs.append(obj)
+    model.objects.bulk_update(objs, SYNC_FIELDS + ["modified"])
+    return len(objs)
+
+
+#######################################################################
+
+
+def computers_to_assets(computer_pks):
+    """
+    Copy the person and room of the given computers to their assets.
+    Returns the number of assets updated.
+    """
+    from .models import Asset, Computer
+
+    computer_pks = set(computer_pks)
+    if not computer_pks:
+        return 0
+    rows = (
+        Computer.objects.filter(pk__in=computer_pks, asset__isnull=False)
+        .order_by("modified", "pk")
+        .values_list("asset_id", *_columns())
+    )
+    n = len(SYNC_FIELDS)
+    changes = {}
+    for row in rows:
+        asset_id, values, current = row[0], row[1 : n + 1], row[n + 1 :]
+        # the most recently modified computer wins for shared assets.
+        if values != current:
+            changes[asset_id] = values
+        else:
+            changes.pop(asset_id, None)
+    return _bulk_update(Asset, changes)
+
+
+def assets_to_computers(asset_pks):
+    """
+    Copy the person and room of the given assets to their computer,
+    for assets which belong to exactly one computer.
+    Returns the number of computers updated.
+    """
+    from .models import Computer
+
+    asset_pks = set(asset_pks)
+    if not asset_pks:
+        return 0
+    rows = Computer.objects.filter(asset__in=asset_pks).values_list(
+        "pk", "asset_id", *_columns()
+    )
+    n = len(SYNC_FIELDS)
+    by_asset = {}
+    for row in rows:
+        by_asset.setdefault(row[1], []).append(row)
+    changes = {}
+    for asset_rows in by_asset.values():
+        if len(asset_rows) != 1:
+            continue
+        row = asset_rows[0]
+        current, values = row[2 : n + 2], row[n + 2 :]
+        if values != current:
+            changes[row[0]] = values
+    return _bulk_update(Computer, changes)
+
+
+def sync(computer_pks=(), asset_pks=()):
+    """
+    Synchronize the given computers and assets, computers first.
+    Returns the number of (assets, computers) updated.
+    """
+    return computers_to_assets(computer_pks), assets_to_computers(asset_pks)
+
+
+#######################################################################
+
+
+def _pending_sets():
+    if not hasattr(_pending, "computers"):
+        _pending.computers = set()
+        _pending.assets = set()
+    return _pending.computers, _pending.assets
+
+
+def flush():
+    """
+    Synchronize everything noted by ``changed()`` and not yet done.
+    """
+    computers, assets = _pending_sets()
+    computer_pks, asset_pks = set(computers), set(assets)
+    computers.clear()
+    assets.clear()
+    return sync(computer_pks, asset_pks)
+
+
+def changed(computer_pks=(), asset_pks=()):
+    """
+    Note that the given computers and/or assets have been saved.
+
+    With "asset_sync:on_commit" set, the sync is done for everything
+    noted in the transaction once it commits; every call registers a
+    callback, but the first to run does all of the work.  (Pending
+    pks from a rolled back transaction are harmless: they are synced
+    from whatever the rows hold at the next flush.)
+    """
+    computers, assets = _pending_sets()
+    computers.update(computer_pks)
+    assets.update(asset_pks)
+    if bulk.defer(flush):
+        return
+    if conf.get("asset_sync:on_commit"):
+        transaction.on_commit(flush)
+    else:
+        flush()
+
+
+#######################################################################
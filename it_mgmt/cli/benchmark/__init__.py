@@ -0,0 +1,113 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+#######################
+"""
+Helpers for the benchmark CLI scripts.
+
+Benchmarks generate their own synthetic data inside a transaction which
+is *always* rolled back, so they may be run against a live database
+(although they will hold locks while running -- be nice).
+"""
+################################################################
+
+
+class _Rollback(Exception):
+    pass
+
+
+################################################################
+
+
+@contextmanager
+def scratch_data():
+    """
+    Everything done in this block is rolled back at the end.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+
+################################################################
+
+
+@contextmanager
+def backdating(model, field_name="created"):
+    """
+    Allow explicit values for an ``auto_now_add`` field in this block,
+    so that synthetic history can be generated.
+    """
+    field = model._meta.get_field(field_name)
+    auto_now_add = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = auto_now_add
+
+
+################################################################
+
+
+def measure(func, repeat=1):
+    """
+    Call ``func`` ``repeat`` times.
+    Returns ``(seconds, queries, result)``, where ``seconds`` and
+    ``queries`` are per call, and ``result`` is from the last call.
+    """
+    result = None
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.time()
+        for i in range(repeat):
+            result = func()
+        elapsed = time.time() - start
+    return elapsed / repeat, len(ctx.captured_queries) // repeat, result
+
+
+################################################################
+
+
+def report(rows):
+    """
+    Print ``(label, seconds, queries, ...)`` rows, tab delimited.
+    """
+    print("\t".join(["label", "seconds", "queries"]))
+    for row in rows:
+        label, seconds, queries = row[:3]
+        extra = ["{}".format(e) for e in row[3:]]
+        print(
+            "\t".join([label, "{0:.4f}".format(seconds), "{}".format(queries)] + extra)
+        )
+
+
+################################################################
+
+
+def bulk_computers(n, prefix="benchmark"):
+    """
+    Create ``n`` computers (without signal handlers).
+    Returns the queryset of the new computers.
+    """
+    from ...models import Computer
+
+    Computer.objects.bulk_create(
+        [
+            Computer(common_name="{0}-{1}".format(prefix, i), hardware="synthetic")
+            for i in range(n)
+        ],
+        batch_size=1000,
+    )
+    return Computer.objects.filter(common_name__startswith=prefix + "-")
+
+
+################################################################
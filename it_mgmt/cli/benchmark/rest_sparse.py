@@ -0,0 +1,120 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import time
+from optparse import make_option
+
+from django.contrib.auth import get_user_model
+
+from ...models import ClientIdentifier, NetworkInterface
+from . import bulk_computers, measure, report, scratch_data
+
+#######################
+"""
+Benchmark the REST computer listing in full against sparse fieldsets
+(``?fields=``) and the compact representation (``?expand=``): payload
+size, time and queries per page, on synthetic data (which is rolled back).
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--computers", type=int, default=1000, help="Number of computers (default 1000)"
+    ),
+    make_option(
+        "--interfaces",
+        type=int,
+        default=2,
+        help="Number of network interfaces per computer (default 2)",
+    ),
+    make_option(
+        "--identifiers",
+        type=int,
+        default=3,
+        help="Number of client identifiers per computer (default 3)",
+    ),
+    make_option(
+        "--repeat", type=int, default=5, help="Number of requests to time (default 5)"
+    ),
+)
+
+QUERIES = [
+    ("full", ""),
+    ("sparse", "fields=host_id,common_name"),
+    ("compact", "expand="),
+    ("sparse+nested", "fields=host_id,networkinterface_set.mac_address"),
+]
+
+#######################################################################
+
+
+def populate(n_computers, n_interfaces, n_identifiers):
+    computer_pks = list(bulk_computers(n_computers).values_list("pk", flat=True))
+    NetworkInterface.objects.bulk_create(
+        [
+            NetworkInterface(
+                computer_id=pk,
+                name="en{0}".format(i),
+                type="e",
+                mac_address="02:00:{0:08x}:{1:02x}".format(pk, i),
+            )
+            for pk in computer_pks
+            for i in range(n_interfaces)
+        ],
+        batch_size=1000,
+    )
+    ClientIdentifier.objects.bulk_create(
+        [
+            ClientIdentifier(
+                computer_id=pk, key="id-{0}".format(i), value="{0}".format(pk)
+            )
+            for pk in computer_pks
+            for i in range(n_identifiers)
+        ],
+        batch_size=1000,
+    )
+    return len(computer_pks)
+
+
+#######################################################################
+
+
+def list_computers(user, query, page_size):
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from ...api.rest_v1.views import ComputerViewSet
+
+    url = "/computers/?page_size={0}&{1}".format(page_size, query)
+    request = APIRequestFactory().get(url)
+    force_authenticate(request, user=user)
+    response = ComputerViewSet.as_view({"get": "list"})(request)
+    return response.render().content
+
+
+#######################################################################
+
+
+def main(options, args):
+    from ... import conf
+
+    with scratch_data():
+        start = time.time()
+        n = populate(
+            options["computers"], options["interfaces"], options["identifiers"]
+        )
+        rows = [("populate", time.time() - start, 0, n)]
+        user = get_user_model().objects.create_superuser(
+            "benchmark-rest-sparse", "benchmark@example.com", None
+        )
+        page_size = conf.get("api:max_page_size")
+        for label, query in QUERIES:
+            seconds, queries, content = measure(
+                lambda: list_computers(user, query, page_size), options["repeat"]
+            )
+            rows.append((label, seconds, queries, len(content)))
+        report(rows)
+
+
+#######################################################################
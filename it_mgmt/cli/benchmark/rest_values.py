@@ -0,0 +1,126 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import time
+from optparse import make_option
+
+from django.contrib.auth import get_user_model
+
+from ...models import ComputerFlag, IPAddress, NetworkInterface
+from . import bulk_computers, measure, report, scratch_data
+
+#######################
+"""
+Benchmark the values() fast path for REST lists against the serializers,
+for IP addresses, computer flags and network interfaces: time and queries
+per page, and whether the output is the same, on synthetic data (which
+is rolled back).
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--rows",
+        type=int,
+        default=3000,
+        help="Number of objects of each kind (default 3000)",
+    ),
+    make_option(
+        "--repeat", type=int, default=5, help="Number of requests to time (default 5)"
+    ),
+)
+
+#######################################################################
+
+
+def populate(n):
+    computer_pks = list(bulk_computers(n).values_list("pk", flat=True))
+    IPAddress.objects.bulk_create(
+        [
+            IPAddress(
+                number="10.{0}.{1}.{2}".format(i // 65536, i // 256 % 256, i % 256),
+                hostname="benchmark-{0}.example.com".format(i),
+            )
+            for i in range(n)
+        ],
+        batch_size=1000,
+    )
+    ComputerFlag.objects.bulk_create(
+        [
+            ComputerFlag(
+                slug="benchmark-{0}".format(i), verbose_name="Benchmark {0}".format(i)
+            )
+            for i in range(n)
+        ],
+        batch_size=1000,
+    )
+    NetworkInterface.objects.bulk_create(
+        [
+            NetworkInterface(
+                computer_id=pk,
+                name="en0",
+                type="e",
+                mac_address="02:00:{0:08x}".format(pk),
+            )
+            for pk in computer_pks
+        ],
+        batch_size=1000,
+    )
+
+
+#######################################################################
+
+
+def list_page(viewset, user, page_size, fast_list):
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    request = APIRequestFactory().get("/?page_size={0}".format(page_size))
+    force_authenticate(request, user=user)
+    view = viewset.as_view({"get": "list"}, fast_list=fast_list)
+    return view(request).render().content
+
+
+#######################################################################
+
+
+def main(options, args):
+    from ... import conf
+    from ...api.rest_v1.views import (
+        ComputerFlagViewSet,
+        IPAddressViewSet,
+        NetworkInterfaceViewSet,
+    )
+
+    with scratch_data():
+        start = time.time()
+        populate(options["rows"])
+        rows = [("populate", time.time() - start, 0, options["rows"])]
+        user = get_user_model().objects.create_superuser(
+            "benchmark-rest-values", "benchmark@example.com", None
+        )
+        page_size = conf.get("api:max_page_size")
+        for viewset in [IPAddressViewSet, ComputerFlagViewSet, NetworkInterfaceViewSet]:
+            content = {}
+            for fast_list in [False, True]:
+                seconds, queries, content[fast_list] = measure(
+                    lambda: list_page(viewset, user, page_size, fast_list),
+                    options["repeat"],
+                )
+                label = "{0} {1}".format(
+                    viewset.__name__, "values" if fast_list else "serializer"
+                )
+                rows.append((label, seconds, queries, len(content[fast_list])))
+            rows.append(
+                (
+                    "{0} identical".format(viewset.__name__),
+                    0,
+                    0,
+                    content[True] == content[False],
+                )
+            )
+        report(rows)
+
+
+#######################################################################
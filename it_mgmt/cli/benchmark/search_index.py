@@ -0,0 +1,109 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import time
+from optparse import make_option
+
+from django.test.utils import override_settings
+from mgmt_common import searchindex
+
+from ... import conf
+from ...models import Computer, IPAddress, NetworkInterface
+from . import bulk_computers, measure, report, scratch_data
+
+#######################
+"""
+Benchmark computer searches on the database alone against searches
+narrowed by the process-local index (mgmt_common.searchindex): the time
+to build the index, and time, queries and results per search, on
+synthetic data (which is rolled back).
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--computers",
+        type=int,
+        default=100000,
+        help="Number of computers (default 100000)",
+    ),
+    make_option(
+        "--repeat", type=int, default=5, help="Number of searches to time (default 5)"
+    ),
+)
+
+SEARCHES = [
+    ("name", ["benchmark-4242"]),
+    ("mac", ["02:00:000000a1"]),
+    ("hostname", ["host-777.example"]),
+    ("ip", ["10.0.3.1"]),
+    ("two terms", ["benchmark-12", "host-12"]),
+    ("no match", ["nosuchthing"]),
+]
+
+#######################################################################
+
+
+def populate(n):
+    computer_pks = list(bulk_computers(n).values_list("pk", flat=True))
+    IPAddress.objects.bulk_create(
+        [
+            IPAddress(
+                number="10.{0}.{1}.{2}".format(i // 65536, i // 256 % 256, i % 256),
+                hostname="host-{0}.example.com".format(i),
+            )
+            for i in range(n)
+        ],
+        batch_size=1000,
+    )
+    # (bulk_create() builds the search documents of the computers.)
+    NetworkInterface.objects.bulk_create(
+        [
+            NetworkInterface(
+                computer_id=pk,
+                name="en0",
+                type="e",
+                mac_address="02:00:{0:08x}".format(pk),
+                ip_address_id="10.{0}.{1}.{2}".format(
+                    i // 65536, i // 256 % 256, i % 256
+                ),
+            )
+            for i, pk in enumerate(computer_pks)
+        ],
+        batch_size=1000,
+    )
+
+
+def search(terms):
+    return len(Computer.objects.search(*terms))
+
+
+#######################################################################
+
+
+def main(options, args):
+    settings = conf.get_all()
+    settings["search:memory_index"] = True
+    with scratch_data():
+        start = time.time()
+        populate(options["computers"])
+        rows = [("populate", time.time() - start, 0, options["computers"])]
+
+        index = searchindex.get(Computer, Computer.objects.db)
+        seconds, queries, result = measure(index.refresh)
+        rows.append(("build index", seconds, queries, len(index.postings)))
+
+        for label, terms in SEARCHES:
+            seconds, queries, found = measure(lambda: search(terms), options["repeat"])
+            rows.append(("{0} database".format(label), seconds, queries, found))
+            with override_settings(IT_MGMT_CONFIG=settings):
+                seconds, queries, found = measure(
+                    lambda: search(terms), options["repeat"]
+                )
+            rows.append(("{0} index".format(label), seconds, queries, found))
+        report(rows)
+
+
+#######################################################################
@@ -0,0 +1,93 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import random
+import time
+from datetime import timedelta
+from optparse import make_option
+
+from django.utils.timezone import now
+
+from ...models import Status, StatusKey
+from . import backdating, bulk_computers, measure, report, scratch_data
+
+#######################
+"""
+Benchmark reading a memory usage series for charting: decoding each
+status with ``display()`` against the typed ``columns()``, on synthetic
+data (which is rolled back).
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--computers", type=int, default=500, help="Number of computers (default 500)"
+    ),
+    make_option(
+        "--samples",
+        type=int,
+        default=2000,
+        help="Number of statuses per computer (default 2000)",
+    ),
+    make_option(
+        "--days",
+        type=int,
+        default=30,
+        help="Days of history to spread over (default 30)",
+    ),
+)
+
+#######################################################################
+
+
+def populate(n_computers, n_samples, days):
+    computer_pks = list(bulk_computers(n_computers).values_list("pk", flat=True))
+    key = StatusKey.objects.create(
+        slug="benchmark-memory", verbose_name="Benchmark memory", data_type="m"
+    )
+    start = now() - timedelta(days=days)
+    step = timedelta(days=days) / n_samples
+    with backdating(Status):
+        for pk in computer_pks:
+            status_list = []
+            for i in range(n_samples):
+                status = Status(
+                    computer_id=pk,
+                    key=key,
+                    value="{0}".format(random.randint(0, 2 ** 34)),
+                    created=start + step * i,
+                )
+                status.set_typed_values()
+                status_list.append(status)
+            Status.objects.bulk_create(status_list, batch_size=1000)
+    return key
+
+
+#######################################################################
+
+
+def decode_display(queryset):
+    return [
+        (s.computer_id, s.created, s.display()) for s in queryset.select_related("key")
+    ]
+
+
+#######################################################################
+
+
+def main(options, args):
+    with scratch_data():
+        start = time.time()
+        key = populate(options["computers"], options["samples"], options["days"])
+        queryset = Status.objects.filter(key=key).order_by("computer", "created")
+        rows = [("populate", time.time() - start, 0, queryset.count())]
+        seconds, queries, result = measure(lambda: decode_display(queryset))
+        rows.append(("display", seconds, queries, len(result)))
+        seconds, queries, result = measure(lambda: queryset.columns())
+        rows.append(("columns", seconds, queries, len(result["value_number"])))
+        report(rows)
+
+
+#######################################################################
@@ -0,0 +1,121 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import random
+from datetime import timedelta
+from optparse import make_option
+
+from django.db.models import Max
+from django.utils.timezone import now
+
+from ...models import Status, StatusKey
+from . import bulk_computers, measure, report, scratch_data
+
+#######################
+"""
+Benchmark Status.objects.latest_by_key() against the old
+one-query-per-key loop, on synthetic data (which is rolled back).
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--computers", type=int, default=100, help="Number of computers (default 100)"
+    ),
+    make_option(
+        "--keys", type=int, default=200, help="Number of status keys (default 200)"
+    ),
+    make_option(
+        "--samples",
+        type=int,
+        default=5,
+        help="Number of statuses per computer and key (default 5)",
+    ),
+)
+
+#######################################################################
+
+
+def latest_by_key_loop(queryset, key_slugs=None):
+    """
+    The previous implementation of ``StatusQuerySet.latest_by_key``:
+    N+2 queries, and only meaningful for a single computer.
+    """
+    qs_key_slugs = queryset.statuskeys().values_list("slug", flat=True)
+    if key_slugs is None:
+        key_slugs = qs_key_slugs
+    pk_list = [
+        queryset.filter(key__slug=slug).values_list("pk", flat=True).latest()
+        for slug in key_slugs
+        if slug in qs_key_slugs
+    ]
+    return list(queryset.filter(pk__in=pk_list).order_by("key"))
+
+
+#######################################################################
+
+
+def populate(n_computers, n_keys, n_samples):
+    computer_list = list(bulk_computers(n_computers))
+    StatusKey.objects.bulk_create(
+        [
+            StatusKey(
+                slug="benchmark-{0}".format(i), verbose_name="Benchmark {0}".format(i)
+            )
+            for i in range(n_keys)
+        ]
+    )
+    key_list = list(StatusKey.objects.filter(slug__startswith="benchmark-"))
+    start = now() - timedelta(days=n_samples)
+    for i in range(n_samples):
+        # created is auto_now_add, so backdate each round after the insert.
+        high_water = Status.objects.aggregate(pk=Max("pk"))["pk"] or 0
+        batch = []
+        for computer in computer_list:
+            for key in key_list:
+                batch.append(
+                    Status(
+                        computer=computer, key=key, value="{}".format(random.random())
+                    )
+                )
+            if len(batch) >= 5000:
+                Status.objects.bulk_create(batch)
+                batch = []
+        Status.objects.bulk_create(batch)
+        Status.objects.filter(pk__gt=high_water).update(
+            created=start + timedelta(days=i)
+        )
+    return computer_list
+
+
+#######################################################################
+
+
+def main(options, args):
+    with scratch_data():
+        computer_list = populate(
+            options["computers"], options["keys"], options["samples"]
+        )
+        computer = computer_list[0]
+        single = computer.status_set.all()
+        every = Status.objects.filter(computer__in=computer_list)
+
+        rows = []
+        seconds, queries, result = measure(lambda: latest_by_key_loop(single), 3)
+        rows.append(("loop, one computer", seconds, queries, len(result)))
+        seconds, queries, result = measure(lambda: list(single.latest_by_key()), 3)
+        rows.append(("set-based, one computer", seconds, queries, len(result)))
+        seconds, queries, result = measure(
+            lambda: sum(
+                [len(latest_by_key_loop(c.status_set.all())) for c in computer_list]
+            )
+        )
+        rows.append(("loop, every computer", seconds, queries, result))
+        seconds, queries, result = measure(lambda: len(list(every.latest_by_key())))
+        rows.append(("set-based, every computer", seconds, queries, result))
+        report(rows)
+
+
+#######################################################################
@@ -0,0 +1,105 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import random
+import time
+from datetime import timedelta
+from optparse import make_option
+
+from django.utils.timezone import now
+
+from ...models import Status, StatusAggregate, StatusKey
+from ...retention import apply_retention
+from . import backdating, bulk_computers, measure, report, scratch_data
+
+#######################
+"""
+Benchmark the status retention policy on a synthetic status table
+(which is rolled back).  Half of the keys are volatile and numeric.
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--rows",
+        type=int,
+        default=10000000,
+        help="Number of statuses (default 10,000,000)",
+    ),
+    make_option(
+        "--computers", type=int, default=500, help="Number of computers (default 500)"
+    ),
+    make_option(
+        "--keys", type=int, default=20, help="Number of status keys (default 20)"
+    ),
+    make_option(
+        "--history",
+        type=int,
+        default=90,
+        help="Number of days of history to generate (default 90)",
+    ),
+    make_option(
+        "--days", type=int, default=30, help="Raw retention in days (default 30)"
+    ),
+)
+
+#######################################################################
+
+
+def populate(n_rows, n_computers, n_keys, history):
+    computer_pks = list(bulk_computers(n_computers).values_list("pk", flat=True))
+    StatusKey.objects.bulk_create(
+        [
+            StatusKey(
+                slug="benchmark-{0}".format(i),
+                verbose_name="Benchmark {0}".format(i),
+                volatile=i % 2 == 0,
+                data_type="f" if i % 2 == 0 else "r",
+            )
+            for i in range(n_keys)
+        ]
+    )
+    key_pks = list(
+        StatusKey.objects.filter(slug__startswith="benchmark-").values_list(
+            "pk", flat=True
+        )
+    )
+    start = now() - timedelta(days=history)
+    span = history * 24 * 3600
+    with backdating(Status):
+        for i in range(0, n_rows, 10000):
+            Status.objects.bulk_create(
+                [
+                    Status(
+                        computer_id=random.choice(computer_pks),
+                        key_id=random.choice(key_pks),
+                        value="{0:.3f}".format(random.random() * 100),
+                        created=start + timedelta(seconds=random.randint(0, span)),
+                    )
+                    for j in range(min(10000, n_rows - i))
+                ]
+            )
+
+
+#######################################################################
+
+
+def main(options, args):
+    with scratch_data():
+        start = time.time()
+        populate(
+            options["rows"], options["computers"], options["keys"], options["history"]
+        )
+        rows = [("populate", time.time() - start, 0, Status.objects.count())]
+        seconds, queries, result = measure(
+            lambda: apply_retention(days=options["days"])
+        )
+        rows.append(("retention", seconds, queries, "{0} removed".format(result[0])))
+        rows.append(("remaining", 0, 0, Status.objects.count()))
+        rows.append(("aggregates", 0, 0, StatusAggregate.objects.count()))
+        report(rows)
+
+
+#######################################################################
@@ -7,6 +7,7 @@ import codecs
 import sys
 from optparse import make_option
 
+from mgmt_common.bulk import bulk_mode
 from office_mgmt.cli.asset_copy import asset_copy, copy_obj
 
 from ..models import Computer, NetworkInterface
@@ -50,6 +51,7 @@ EXCLUDE_FIELDS = [
     "licence_set",
     "networkinterface_set",
     "status_set",
+    "currentstatus_set",
     "worknote_set",
     "asset",
 ]
@@ -66,6 +68,7 @@ NETWORK_TYPE_ERROR_MSG += " ."
 #######################################################################
 
 
+@bulk_mode()
 def computer_copy(src, iface_list=None, serial_number=None, **kwargs):
     """
     Copy the ``src`` Computer, including all related information.
@@ -85,13 +88,17 @@ def computer_copy(src, iface_list=None, serial_number=None, **kwargs):
         dst.asset = asset_copy(src.asset, serial_number)
         dst.save()
 
-    first = True
-    for name, type, mac_address in iface_list:
-        NetworkInterface.objects.create(
-            primary=first, name=name, type=type, mac_address=mac_address, computer=dst
+    iface_objs = [
+        NetworkInterface(
+            primary=(i == 0),
+            name=name,
+            type=type,
+            mac_address=mac_address,
+            computer=dst,
         )
-        if first:
-            first = False
+        for i, (name, type, mac_address) in enumerate(iface_list)
+    ]
+    NetworkInterface.objects.bulk_save(iface_objs, [], ["computer", "name"])
     return dst
 
 
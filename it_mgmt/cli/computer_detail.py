@@ -26,14 +26,14 @@ sys.stdout = codecs.getwriter("utf-8")(sys.stdout)
 
 M2M_FIELDS = ["flags"]
 RELATED_ONLY = None  # Specify a list or None; None means introspect for related
-RELATED_EXCLUDE = ["status_set"]  # any related fields to skip
+RELATED_EXCLUDE = ["status_set", "currentstatus_set"]  # any related fields to skip
 
 #######################################################################
 
 
 def print_object(obj):
     print(obj.__class__.__name__ + "\t" + "{}".format(obj))
-    fields = [f.name for f in obj.__class__._meta.fields]
+    fields = [f.name for f in obj.__class__._meta.fields if f.name != "search_text"]
     for f in fields:
         print("\t" + f + "\t" + "{}".format(getattr(obj, f)))
 
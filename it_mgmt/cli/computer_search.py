@@ -2,12 +2,13 @@
 from __future__ import print_function, unicode_literals
 
 #######################
+import sys
 from optparse import make_option
 
-from ..models import Computer as Model  # relies on the model manager search()
+from ..models import Computer as Model  # relies on the model manager search_query()
 from . import computer_detail as detail
 
-HELP_TEXT = "Search"
+HELP_TEXT = "Search (terms may be ip:, mac:, flag:, room: or os: operators)"
 DJANGO_COMMAND = "main"
 OPTION_LIST = (
     make_option(
@@ -18,11 +19,16 @@ OPTION_LIST = (
         help="By default, when only one result is returned, details will be printed also.  Giving this flag supresses this behaviour",
     ),
 )
-ARGS_USAGE = "[search terms]"
+ARGS_USAGE = "[search terms, e.g., ip:10.0.0.0/24 flag:lab]"
 
 
 def main(options, args):
-    obj_list = Model.objects.search(*args)
+    try:
+        obj_list = Model.objects.search_query(*args)
+    except ValueError as e:
+        print("Error: {0}".format(e), file=sys.stderr)
+        print("Usage: computer_search {0}".format(ARGS_USAGE), file=sys.stderr)
+        return
     if options["show-detail"] and obj_list.count() == 1:
         obj = obj_list.get()
         detail.main({}, [obj.pk])
@@ -0,0 +1,49 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from optparse import make_option
+
+from ..models import CurrentStatus, Status
+
+#######################
+"""
+Rebuild the current status table from the status history.
+
+Give computer primary keys to rebuild only those computers; otherwise
+every computer with a status history is rebuilt.
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--batch",
+        type=int,
+        default=100,
+        help="Number of computers to rebuild in each transaction (default 100)",
+    ),
+)
+ARGS_USAGE = "[pk [pk ...]]"
+
+#######################################################################
+
+
+def main(options, args):
+    verbosity = int(options.get("verbosity", 1))
+    batch = options["batch"]
+    if args:
+        pk_list = [int(pk) for pk in args]
+    else:
+        pk_list = list(Status.objects.active().computers().values_list("pk", flat=True))
+    pk_list.sort()
+    for i in range(0, len(pk_list), batch):
+        chunk = pk_list[i : i + batch]
+        CurrentStatus.objects.rebuild(Status.objects.filter(computer__in=chunk))
+        if verbosity > 1:
+            print("rebuilt", chunk[0], "to", chunk[-1])
+    if verbosity > 0:
+        print(len(pk_list), "computers rebuilt")
+
+
+#######################################################################
@@ -23,9 +23,15 @@ search_fields = ["common_name"]
 
 
 def search(term):
+    # search operators (e.g., "ip:10.0.0.0/24", see ComputerQuerySet)
+    # are applied first; any other text is matched against search_fields.
+    queryset, terms = Computer.objects.all().apply_search_operators([term])
+    if not terms:
+        return list(queryset)
+    text = " ".join(terms)
     results = []
     for field in search_fields:
-        results += list(Computer.objects.filter(**{"%s__icontains" % field: term}))
+        results += list(queryset.filter(**{"%s__icontains" % field: text}))
     return results
 
 
@@ -68,7 +74,12 @@ def entrypoint(options, args):
         main(args, True)
         return
     for arg in args:
-        main(arg)
+        try:
+            main(arg)
+        except ValueError as e:
+            print("Error: {0}".format(e), file=sys.stderr)
+            print("Usage: ip_mgmt_req {0}".format(ARGS_USAGE), file=sys.stderr)
+            return
 
 
 #
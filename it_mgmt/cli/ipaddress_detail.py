@@ -24,7 +24,7 @@ RELATED_EXCLUDE = []  # any related fields to skip
 
 def print_object(obj):
     print(obj.__class__.__name__ + "\t" + "{}".format(obj))
-    fields = [f.name for f in obj.__class__._meta.fields]
+    fields = [f.name for f in obj.__class__._meta.fields if f.name != "packed"]
     for f in fields:
         print("\t" + f + "\t" + "{}".format(getattr(obj, f)))
 
@@ -0,0 +1,46 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from optparse import make_option
+
+from ..models import IPAddress
+
+#######################
+"""
+Reconcile the ``in_use`` flag of IP addresses with the network
+interfaces which have them.
+
+Give IP addresses to reconcile only those; otherwise every address
+is reconciled (in a single UPDATE).
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--dry-run",
+        action="store_true",
+        default=False,
+        help="Only report the number of addresses which would change",
+    ),
+)
+ARGS_USAGE = "[ip [ip ...]]"
+
+#######################################################################
+
+
+def main(options, args):
+    verbosity = int(options.get("verbosity", 1))
+    queryset = IPAddress.objects.all()
+    if args:
+        queryset = queryset.filter(number__in=args)
+    if options["dry_run"]:
+        changed = queryset.in_use_wrong().count()
+    else:
+        changed = queryset.update_in_use()
+    if verbosity > 0:
+        print(changed, "addresses", "would change" if options["dry_run"] else "changed")
+
+
+#######################################################################
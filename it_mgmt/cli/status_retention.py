@@ -0,0 +1,51 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from optparse import make_option
+
+from ..retention import apply_retention
+
+#######################
+"""
+Apply the retention policy to the status history of volatile keys.
+
+Old numeric statuses are rolled up into hourly aggregates and old hourly
+aggregates into daily ones; defaults come from the IT_MGMT_CONFIG
+"status:..." settings.  Suitable for running from cron.
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option("--days", type=int, help="Keep raw statuses for this many days"),
+    make_option(
+        "--hourly-days",
+        type=int,
+        dest="hourly_days",
+        help="Keep hourly aggregates for this many days",
+    ),
+    make_option(
+        "--batch-size",
+        type=int,
+        dest="batch_size",
+        help="Number of rows handled in each transaction",
+    ),
+)
+
+#######################################################################
+
+
+def main(options, args):
+    verbosity = int(options.get("verbosity", 1))
+    statuses, hourly = apply_retention(
+        days=options["days"],
+        hourly_days=options["hourly_days"],
+        batch_size=options["batch_size"],
+        verbosity=verbosity,
+    )
+    if verbosity > 0:
+        print(statuses, "statuses and", hourly, "hourly aggregates rolled up")
+
+
+#######################################################################
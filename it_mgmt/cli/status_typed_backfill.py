@@ -0,0 +1,83 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from optparse import make_option
+
+from django.db import transaction
+
+from ..models import NUMERIC_DATA_TYPES, Status, StatusKey
+
+#######################
+"""
+Fill in the typed value columns of existing statuses.
+
+New statuses get their typed values when they are written; run this
+after upgrading, or after changing the data type of a status key.
+Give status key slugs to fill in only those keys.
+"""
+#######################################################################
+
+HELP_TEXT = __doc__.strip()
+DJANGO_COMMAND = "main"
+OPTION_LIST = (
+    make_option(
+        "--batch-size",
+        type=int,
+        dest="batch_size",
+        default=1000,
+        help="Number of statuses updated in each transaction (default 1000)",
+    ),
+)
+ARGS_USAGE = "[slug [slug ...]]"
+
+#######################################################################
+
+
+def backfill_key(key, batch_size, verbosity=0):
+    """
+    Update the typed value columns for all statuses of ``key``.
+    Returns the number of statuses changed.
+    """
+    queryset = Status.objects.filter(key=key).only(
+        "pk", "value", "value_number", "value_datetime"
+    )
+    changed = 0
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        update_list = []
+        for status in chunk:
+            typed = key.typed_values(status.value)
+            if typed != (status.value_number, status.value_datetime):
+                status.value_number, status.value_datetime = typed
+                update_list.append(status)
+        with transaction.atomic():
+            Status.objects.bulk_update(update_list, ["value_number", "value_datetime"])
+        changed += len(update_list)
+        if verbosity > 1:
+            print(key.slug, "up to pk", last_pk, "-", changed, "changed")
+    return changed
+
+
+#######################################################################
+
+
+def main(options, args):
+    verbosity = int(options.get("verbosity", 1))
+    keys = StatusKey.objects.all()
+    if args:
+        keys = keys.filter(slug__in=args)
+    changed = 0
+    for key in keys:
+        if key.data_type not in NUMERIC_DATA_TYPES + ["dt"] and not args:
+            # untyped keys only need clearing when asked for explicitly.
+            continue
+        changed += backfill_key(key, options["batch_size"], verbosity)
+    if verbosity > 0:
+        print(changed, "statuses updated")
+
+
+#######################################################################
@@ -30,7 +30,7 @@ OPTION_LIST = (
         dest="computer",
         action="store_true",
         default=False,
-        help="Specify wake on lan targets by computer primary keys (default is search)",
+        help="Specify wake on lan targets by computer primary keys (default is search, e.g., ip:10.0.0.0/24 flag:lab)",
     ),
     make_option(
         "-a",
@@ -41,7 +41,7 @@ OPTION_LIST = (
         help="Specify wake on lan targets by IP address (default is search)",
     ),
 )
-ARGS_USAGE = "[pk ...]"
+ARGS_USAGE = "[pk ... | search terms, e.g., ip:10.0.0.0/24 flag:lab]"
 
 #######################################################################
 
@@ -117,7 +117,12 @@ def main(options, args):
     elif options["ipaddress"]:
         object_list = IPAddress.objects.filter(pk__in=args)
     else:
-        object_list = Computer.objects.active().search(*args)
+        try:
+            object_list = Computer.objects.active().search_query(*args)
+        except ValueError as e:
+            print("Error: {0}".format(e), file=sys.stderr)
+            print("Usage: wakeonlan {0}".format(ARGS_USAGE), file=sys.stderr)
+            return
     for o in object_list:
         wake_object(o)
         time.sleep(0.25)
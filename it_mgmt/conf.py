@@ -13,6 +13,39 @@ CONFIG_NAME = "IT_MGMT_CONFIG"  # must be uppercase!
 
 DEFAULT = {
     # put application configuration items here.
+    # Raw statuses for volatile keys are kept for this many days;
+    # older numeric values are rolled up into hourly aggregates.
+    "status:retention_days": 30,
+    # Hourly aggregates older than this many days are rolled up into
+    # daily aggregates.
+    "status:hourly_retention_days": 365,
+    # The number of rows handled by each retention transaction.
+    "status:retention_batch_size": 1000,
+    # Client IP address -> computer resolution for the by-request API
+    # (see it_mgmt.ipcache): the number of addresses each process keeps,
+    # for how many seconds, and the name of a CACHES entry to share them
+    # between processes (None for per-process only).  Without a shared
+    # backend, changes made by other processes are only seen when the
+    # entries expire, so they are kept for "ip_cache:local_timeout".
+    "ip_cache:size": 4096,
+    "ip_cache:timeout": 300,
+    "ip_cache:local_timeout": 5,
+    "ip_cache:backend": None,
+    # REST API list pages: the default and largest ``?page_size=``.
+    "api:page_size": 100,
+    "api:max_page_size": 1000,
+    # Objects serialized at a time for ``?stream=`` lists.
+    "api:stream_chunk_size": 500,
+    # Build simple read-only list pages straight from values() rows
+    # (see api/rest_v1/values.py) for the viewsets which allow it.
+    "api:fast_lists": True,
+    # Synchronize computer and asset person/room changes (see
+    # it_mgmt.assetsync) when the transaction commits, rather than
+    # as each record is saved.
+    "asset_sync:on_commit": False,
+    # Narrow computer searches with a process-local inverted index
+    # (see mgmt_common.searchindex); for databases other than PostgreSQL.
+    "search:memory_index": False,
 }
 
 #########################################################################
@@ -1,6 +1,12 @@
 #######################
 from __future__ import print_function, unicode_literals
 
+from django.db import models, transaction
+from django.utils.timezone import now
+from mgmt_common import bulk, search
+
+from . import assetsync, ipcache
+
 #######################
 """
 Handlers for various signals in the IT Management application.
@@ -14,7 +20,8 @@ at runtime.
 
 def ipaddress_fk_pre_save(sender, instance, raw, **kwargs):
     """
-    Update IP usage when an object with an IPAddress ForeignKey is saved.
+    Note the IP addresses whose usage may change when an object with an
+    IPAddress ForeignKey is saved (see ipaddress_fk_post_save).
 
     This signal handler can be registered for any model which
     has an IPAddress ForeignKey field named 'ip_address'.
@@ -22,33 +29,147 @@ def ipaddress_fk_pre_save(sender, instance, raw, **kwargs):
     if raw:
         return  # do not change other fields in this case.
 
-    if instance.pk:
-        # fetch old instance to look for a change
-        old_instance = sender.objects.get(pk=instance.pk)
-        if old_instance.ip_address != instance.ip_address:
-            if old_instance.ip_address:
-                old_instance.ip_address.in_use = False
-                old_instance.ip_address.save()
+    # cached client IP lookups (see ipcache) change with the address
+    # or the computer of the instance.
+    attnames = ["ip_address_id"]
+    if hasattr(instance, "computer_id"):
+        attnames.append("computer_id")
+    current = tuple([getattr(instance, a) for a in attnames])
+    old = None
+    if not instance._state.adding and hasattr(instance, "saved_value"):
+        # as loaded (see MgmtBaseModel); no need to fetch the old row.
+        old = tuple([instance.saved_value(a) for a in attnames])
+        if models.DEFERRED in old:
+            old = None
+    if old is None and instance.pk:
+        old = sender._default_manager.filter(pk=instance.pk).values_list(*attnames)
+        old = old.first()
+    if old is None:
+        numbers = set([current[0]])
+        invalidate = current[0] is not None
+    else:
+        numbers = set([old[0], current[0]]) if old[0] != current[0] else set()
+        invalidate = old != current
+    numbers -= set([None])
+    if numbers or invalidate:
+        if bulk.defer(reconcile_ip_addresses, numbers):
+            return
+    instance._ipaddress_fk_changes = (numbers, invalidate)
 
-    if instance.ip_address and not instance.ip_address.in_use:
-        instance.ip_address.in_use = True
-        instance.ip_address.save()
+
+################################################################
+
+
+def ipaddress_fk_post_save(sender, instance, raw, **kwargs):
+    """
+    Update IP usage when an object with an IPAddress ForeignKey is saved.
+
+    This signal handler can be registered for any model which
+    has an IPAddress ForeignKey field named 'ip_address'.
+    """
+    from .models import IPAddress
+
+    changes = instance.__dict__.pop("_ipaddress_fk_changes", None)
+    if raw or changes is None:
+        return
+    numbers, invalidate = changes
+    if numbers:
+        IPAddress.objects.filter(pk__in=numbers).update_in_use()
+        if sender._meta.get_field("ip_address").is_cached(instance):
+            if instance.ip_address is not None:
+                instance.ip_address.in_use = True
+    if invalidate:
+        transaction.on_commit(ipcache.invalidate)
 
 
 ################################################################
 
 
-def ipaddress_fk_pre_delete(sender, instance, **kwargs):
+def ipaddress_fk_post_delete(sender, instance, **kwargs):
     """
     Update IP usage when an object with an IPAddress ForeignKey is deleted.
 
     This signal handler can be registered for any model which
     has an IPAddress ForeignKey field named 'ip_address'.
     """
-    if instance.ip_address:
-        instance.ip_address.in_use = False
-        instance.ip_address.save()
-    instance.ip_address = None
+    from .models import IPAddress
+
+    if instance.ip_address_id is None:
+        return
+    if bulk.defer(reconcile_ip_addresses, [instance.ip_address_id]):
+        return
+    IPAddress.objects.filter(pk=instance.ip_address_id).update_in_use()
+    transaction.on_commit(ipcache.invalidate)
+
+
+################################################################
+
+
+def reconcile_ip_addresses(numbers):
+    """
+    Fix the usage of the IP addresses ``numbers`` at once (for bulk
+    mode): those which the saved or deleted objects had or have.
+    """
+    from .models import IPAddress
+
+    if numbers:
+        IPAddress.objects.filter(pk__in=numbers).update_in_use()
+    transaction.on_commit(ipcache.invalidate)
+
+
+################################################################
+
+
+def computer_search_text_touch(sender, instance, raw=False, **kwargs):
+    """
+    Refresh the search documents of the computers which a network
+    interface or IP address belongs to, when it is deleted, or saved
+    with a change to what the documents hold.
+
+    This signal handler should only be registered for NetworkInterface
+    or IPAddress objects.
+    """
+    from .models import Computer
+
+    if raw:
+        return
+    if kwargs.get("signal") is models.signals.post_save:
+        # as loaded (see MgmtBaseModel); unknown counts as changed.
+        fields = sender._default_manager.get_queryset().search_document_fields
+        attnames = set([sender._meta.get_field(f).attname for f in fields])
+        saved = [(a, instance.saved_value(a)) for a in attnames]
+        if all([v is not models.DEFERRED for a, v in saved]) and all(
+            [getattr(instance, a) == v for a, v in saved]
+        ):
+            return
+    if hasattr(instance, "computer_id"):
+        # an interface may have moved from another computer.
+        pks = [instance.computer_id, instance.saved_value("computer_id")]
+        pks = [pk for pk in pks if pk is not models.DEFERRED]
+    else:
+        pks = Computer.objects.filter(
+            networkinterface__ip_address=instance.pk
+        ).values_list("pk", flat=True)
+    search.changed(Computer, pks)
+
+
+def computer_search_text_ip_pre_delete(sender, instance, using, **kwargs):
+    """
+    Refresh the search documents of the computers using an IP address
+    which is deleted, once that commits.  (The network interfaces'
+    ``ip_address`` is then set to NULL without any signals.)
+
+    This signal handler should only be registered for IPAddress objects.
+    """
+    from .models import Computer
+
+    pks = list(
+        Computer.objects.using(using)
+        .filter(networkinterface__ip_address=instance.pk)
+        .values_list("pk", flat=True)
+    )
+    if pks:
+        transaction.on_commit(lambda: search.changed(Computer, pks), using=using)
 
 
 ################################################################
@@ -57,24 +178,18 @@ def ipaddress_fk_pre_delete(sender, instance, **kwargs):
 def computer_asset_sync_post_save(sender, instance, created, raw, **kwargs):
     """
     Synchronize updates between Computer records and a corresponding
-    Asset record.
+    Asset record (see assetsync).
     
     This signal handler should only be registered for Computer objects.
     """
     if raw:
         return
-    if instance.asset is None:
+    if instance.asset_id is None:
         return
 
-    save = False
-    if instance.asset.person != instance.person:
-        instance.asset.person = instance.person
-        save = True
-    if instance.asset.room != instance.room:
-        instance.asset.room = instance.room
-        save = True
-    if save:
-        instance.asset.save()
+    assetsync.changed(computer_pks=[instance.pk])
+    if sender._meta.get_field("asset").is_cached(instance):
+        assetsync.copy_values(instance, instance.asset)
 
 
 ################################################################
@@ -83,7 +198,7 @@ def computer_asset_sync_post_save(sender, instance, created, raw, **kwargs):
 def asset_computer_sync_post_save(sender, instance, created, raw, **kwargs):
     """
     Synchronize updates between Asset records and a corresponding
-    Computer record.
+    Computer record (see assetsync).
     
     This signal handler should only be registered for Asset objects.
     """
@@ -95,20 +210,7 @@ def asset_computer_sync_post_save(sender, instance, created, raw, **kwargs):
         print("asset_computer_sync_post_save(): No instance pk / doing nothing.")
         return
 
-    related_computer_list = instance.computer_set.all()
-    if related_computer_list.count() != 1:
-        return
-
-    computer = related_computer_list.get()
-    save = False
-    if computer.person != instance.person:
-        computer.person = instance.person
-        save = True
-    if computer.room != instance.room:
-        computer.room = instance.room
-        save = True
-    if save:
-        computer.save()
+    assetsync.changed(asset_pks=[instance.pk])
 
 
 ################################################################
@@ -123,10 +225,117 @@ def create_api_key(sender, instance, created, raw, **kwargs):
     """
     if raw:
         return
-    if kwargs.get("created") is True:
+    if created:
         from .models import ComputerKey
 
-        ComputerKey.objects.create(computer=kwargs.get("instance"))
+        if bulk.defer(create_api_keys, [instance.pk]):
+            return
+        ComputerKey.objects.create(computer=instance)
+
+
+################################################################
+
+
+def create_api_keys(computer_pks):
+    """
+    Create the missing ``ComputerKey`` for any of the given computers,
+    with a single insert (for bulk mode).
+    """
+    from .models import Computer, ComputerKey
+
+    computer_pks = Computer.objects.filter(
+        pk__in=computer_pks, api_key__isnull=True
+    ).values_list("pk", flat=True)
+    keys = [ComputerKey(computer_id=pk) for pk in computer_pks]
+    for key in keys:
+        key.key = key.generate_key()
+    ComputerKey.objects.bulk_create(keys)
+
+
+################################################################
+
+
+def current_status_post_save(sender, instance, created, raw, **kwargs):
+    """
+    Keep the ``CurrentStatus`` for the computer and key up to date
+    when a new ``Status`` is reported.
+
+    This signal handler should only be registered for Status objects.
+    """
+    if raw or not created:
+        return
+    from .models import CurrentStatus
+
+    CurrentStatus.objects.record([instance])
+
+
+################################################################
+
+
+def touch_computers(queryset):
+    """
+    Bump the modification time of the computers in ``queryset``,
+    without saving them (and so without any further signals).
+    The text API uses this as the validator for conditional requests.
+    """
+    queryset.update(modified=now())
+
+
+################################################################
+
+
+def computer_related_touch(sender, instance, **kwargs):
+    """
+    Mark the computer as modified when a related object is saved or
+    deleted.
+
+    This signal handler can be registered (post_save and post_delete)
+    for any model which has a Computer ForeignKey field named 'computer'.
+    """
+    if kwargs.get("raw"):
+        return
+    from .models import Computer
+
+    touch_computers(Computer.objects.filter(pk=instance.computer_id))
+
+
+################################################################
+
+
+def computer_flags_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Mark computers as modified when their flags change.
+
+    This signal handler should only be registered for Computer.flags.through
+    """
+    if action not in ["post_add", "post_remove", "pre_clear"]:
+        return
+    from .models import Computer
+
+    if not reverse:
+        touch_computers(Computer.objects.filter(pk=instance.pk))
+    elif action == "pre_clear":
+        touch_computers(Computer.objects.filter(flags=instance))
+    else:
+        touch_computers(Computer.objects.filter(pk__in=pk_set))
+
+
+################################################################
+
+
+def computer_flag_touch(sender, instance, **kwargs):
+    """
+    Mark the computers with a flag as modified when the flag is saved or
+    about to be deleted.
+
+    This signal handler should only be registered (post_save and pre_delete)
+    for ComputerFlag objects.
+    """
+    if kwargs.get("raw") or instance.pk is None:
+        return
+    from .models import Computer
+
+    touch_computers(Computer.objects.filter(flags=instance))
 
 
 ################################################################
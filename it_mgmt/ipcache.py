@@ -0,0 +1,122 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+from . import conf
+
+#######################
+"""
+A cache for resolving client IP addresses to computers.
+
+Each process keeps a small LRU of IP address -> computer pks.  When
+the "ip_cache:backend" setting names one of the Django CACHES, entries
+are shared through it, along with a generation number that is bumped
+whenever a network interface changes; a request then only costs one
+cache lookup, and invalidation reaches every process.
+Without a shared backend, other processes only see changes when their
+entries expire, so those are kept for the much shorter
+"ip_cache:local_timeout".  Addresses with no computer are never
+cached, so a newly added interface is found straight away.
+
+Invalidation is done by the NetworkInterface signal handlers.
+"""
+#######################################################################
+
+GENERATION_KEY = "it_mgmt:ip_cache:generation"
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # ip_string -> (generation, expires, pk_list)
+
+#######################################################################
+
+
+def _shared_cache():
+    alias = conf.get("ip_cache:backend")
+    if alias is None:
+        return None
+    return caches[alias]
+
+
+def _generation(cache):
+    if cache is None:
+        return None
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # start from the clock, so a lost counter never reuses old values.
+        cache.add(GENERATION_KEY, int(time.time()), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+#######################################################################
+
+
+def computer_pks(ip_string):
+    """
+    Return the list of pks for the computers with a network interface
+    at ``ip_string`` (normally just one); looked up every time when
+    there are none.
+    """
+    from .models import NetworkInterface
+
+    cache = _shared_cache()
+    generation = _generation(cache)
+    if cache is None:
+        timeout = conf.get("ip_cache:local_timeout")
+    else:
+        timeout = conf.get("ip_cache:timeout")
+    current = time.time()
+    with _lock:
+        entry = _entries.pop(ip_string, None)
+        if entry is not None and entry[0] == generation and entry[1] > current:
+            _entries[ip_string] = entry
+            return entry[2]
+
+    shared_key = "it_mgmt:ip_cache:{0}:{1}".format(generation, ip_string)
+    pk_list = None
+    if cache is not None:
+        pk_list = cache.get(shared_key)
+    if pk_list is None:
+        pk_list = list(
+            NetworkInterface.objects.filter(ip_address=ip_string)
+            .order_by("computer")
+            .values_list("computer", flat=True)
+            .distinct()
+        )
+        if not pk_list:
+            return pk_list
+        if cache is not None:
+            cache.set(shared_key, pk_list, timeout)
+
+    with _lock:
+        _entries[ip_string] = (generation, current + timeout, pk_list)
+        while len(_entries) > conf.get("ip_cache:size"):
+            _entries.popitem(last=False)
+    return pk_list
+
+
+#######################################################################
+
+
+def invalidate():
+    """
+    Forget all cached IP addresses, in this and (with a shared backend)
+    every other process.
+    """
+    with _lock:
+        _entries.clear()
+    cache = _shared_cache()
+    if cache is not None:
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            # no counter yet; the next lookup starts one.
+            pass
+
+
+#######################################################################
@@ -6,9 +6,11 @@ from mgmt_common.base import MgmtBaseManager
 from .querysets import (
     ComputerFlagQuerySet,
     ComputerQuerySet,
+    CurrentStatusQuerySet,
     IPAddressQuerySet,
     LicenceQuerySet,
     NetworkInterfaceQuerySet,
+    StatusAggregateQuerySet,
     StatusKeyQuerySet,
     StatusQuerySet,
     WorkNoteQuerySet,
@@ -98,3 +100,22 @@ class StatusManager(MgmtBaseManager):
 StatusManager = StatusManager.from_queryset(StatusQuerySet)
 
 #######################################################################
+
+
+class CurrentStatusManager(MgmtBaseManager):
+    queryset_class = CurrentStatusQuerySet
+    always_select_related = ["key"]
+
+
+CurrentStatusManager = CurrentStatusManager.from_queryset(CurrentStatusQuerySet)
+
+#######################################################################
+
+
+class StatusAggregateManager(MgmtBaseManager):
+    queryset_class = StatusAggregateQuerySet
+
+
+StatusAggregateManager = StatusAggregateManager.from_queryset(StatusAggregateQuerySet)
+
+#######################################################################
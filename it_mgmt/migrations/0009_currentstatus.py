@@ -0,0 +1,103 @@
+# Generated by Django 2.2.28 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_current_statuses(apps, schema_editor):
+    # the latest active status of each (computer, key) pair, as
+    # CurrentStatusQuerySet.rebuild() does; one sorted pass, since the
+    # (computer, key, created) index only comes with 0012.
+    Status = apps.get_model("it_mgmt", "Status")
+    CurrentStatus = apps.get_model("it_mgmt", "CurrentStatus")
+    db_alias = schema_editor.connection.alias
+    rows = (
+        Status.objects.using(db_alias)
+        .filter(active=True)
+        .order_by("computer_id", "key_id", "-created", "-pk")
+        .values_list("computer_id", "key_id", "pk", "value", "created")
+    )
+    current = []
+    last = None
+    for computer_id, key_id, pk, value, created in rows.iterator():
+        if (computer_id, key_id) == last:
+            continue
+        last = (computer_id, key_id)
+        current.append(
+            CurrentStatus(
+                computer_id=computer_id,
+                key_id=key_id,
+                status_id=pk,
+                value=value,
+                reported=created,
+            )
+        )
+    CurrentStatus.objects.using(db_alias).bulk_create(current, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0008_auto_20180228_1335")]
+
+    operations = [
+        migrations.CreateModel(
+            name="CurrentStatus",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("active", models.BooleanField(default=True)),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="creation time"
+                    ),
+                ),
+                (
+                    "modified",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="last modification time"
+                    ),
+                ),
+                ("value", models.TextField()),
+                ("reported", models.DateTimeField(verbose_name="report time")),
+                (
+                    "computer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="it_mgmt.Computer",
+                    ),
+                ),
+                (
+                    "key",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="it_mgmt.StatusKey",
+                    ),
+                ),
+                (
+                    "status",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="it_mgmt.Status",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "current statuses",
+                "ordering": ["computer", "key"],
+                "get_latest_by": "reported",
+                "base_manager_name": "objects",
+                "unique_together": {("computer", "key")},
+            },
+        ),
+        migrations.RunPython(fill_current_statuses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 2.2.28 on 2026-10-18 15:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0009_currentstatus")]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatusAggregate",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("active", models.BooleanField(default=True)),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="creation time"
+                    ),
+                ),
+                (
+                    "modified",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="last modification time"
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("h", "hourly"), ("d", "daily")], max_length=1
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("minimum", models.FloatField()),
+                ("maximum", models.FloatField()),
+                ("total", models.FloatField()),
+                (
+                    "computer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="it_mgmt.Computer",
+                    ),
+                ),
+                (
+                    "key",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="it_mgmt.StatusKey",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["computer", "key", "period", "start"],
+                "get_latest_by": "start",
+                "base_manager_name": "objects",
+                "unique_together": {("computer", "key", "period", "start")},
+            },
+        )
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0010_statusaggregate")]
+
+    operations = [
+        migrations.AddField(
+            model_name="status",
+            name="value_datetime",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="status",
+            name="value_number",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0011_status_typed_values")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="status",
+            index=models.Index(
+                fields=["computer", "key", "created"], name="it_mgmt_status_series_idx"
+            ),
+        )
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0012_status_series_index")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="networkinterface",
+            index=models.Index(fields=["mac_address"], name="it_mgmt_netif_mac_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="networkinterface",
+            index=models.Index(
+                fields=["computer", "primary", "name"], name="it_mgmt_netif_primary_idx"
+            ),
+        ),
+    ]
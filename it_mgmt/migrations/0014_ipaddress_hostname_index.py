@@ -0,0 +1,16 @@
+# Generated by Django 2.2.28 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0013_networkinterface_indexes")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ipaddress",
+            name="hostname",
+            field=models.CharField(db_index=True, max_length=64),
+        )
+    ]
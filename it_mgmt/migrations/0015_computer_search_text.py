@@ -0,0 +1,35 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:10
+
+from django.db import migrations, models
+from mgmt_common import search
+
+# ComputerQuerySet.search_fields, as of this migration.
+SEARCH_FIELDS = [
+    "common_name",
+    "hardware",
+    "networkinterface__mac_address",
+    "networkinterface__ip_address__number",
+    "networkinterface__ip_address__hostname",
+    "networkinterface__ip_address__aliases",
+]
+
+
+def fill_search_text(apps, schema_editor):
+    Computer = apps.get_model("it_mgmt", "Computer")
+    db_alias = schema_editor.connection.alias
+    search.refresh(Computer.objects.using(db_alias), SEARCH_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0014_ipaddress_hostname_index")]
+
+    operations = [
+        migrations.AddField(
+            model_name="computer",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        search.SearchIndex("computer"),
+    ]
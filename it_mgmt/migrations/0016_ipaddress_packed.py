@@ -0,0 +1,31 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:40
+
+from django.db import migrations, models
+from it_mgmt.utils import ip_numbers
+
+
+def fill_packed(apps, schema_editor):
+    IPAddress = apps.get_model("it_mgmt", "IPAddress")
+    db_alias = schema_editor.connection.alias
+    addresses = list(IPAddress.objects.using(db_alias).only("pk"))
+    for address in addresses:
+        address.packed = ip_numbers.pack(address.pk)
+    IPAddress.objects.using(db_alias).bulk_update(
+        addresses, ["packed"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0015_computer_search_text")]
+
+    operations = [
+        migrations.AddField(
+            model_name="ipaddress",
+            name="packed",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=32
+            ),
+        ),
+        migrations.RunPython(fill_packed, migrations.RunPython.noop),
+    ]
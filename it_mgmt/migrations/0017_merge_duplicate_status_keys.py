@@ -0,0 +1,71 @@
+# Generated by Django 2.2.28 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+def merge_duplicate_keys(apps, schema_editor):
+    # concurrent reports could create a slug twice; everything moves to
+    # the oldest key of each slug, so that 0018 can make slugs unique.
+    StatusKey = apps.get_model("it_mgmt", "StatusKey")
+    Status = apps.get_model("it_mgmt", "Status")
+    CurrentStatus = apps.get_model("it_mgmt", "CurrentStatus")
+    StatusAggregate = apps.get_model("it_mgmt", "StatusAggregate")
+    db_alias = schema_editor.connection.alias
+    duplicates = (
+        StatusKey.objects.using(db_alias)
+        .order_by()
+        .values("slug")
+        .annotate(keys=models.Count("pk"))
+        .filter(keys__gt=1)
+        .values_list("slug", flat=True)
+    )
+    for slug in list(duplicates):
+        pks = list(
+            StatusKey.objects.using(db_alias)
+            .filter(slug=slug)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        keep, others = pks[0], pks[1:]
+        Status.objects.using(db_alias).filter(key__in=others).update(key=keep)
+
+        # one current status per computer: the latest report wins.
+        current = CurrentStatus.objects.using(db_alias)
+        for row in current.filter(key__in=others).order_by("reported", "pk"):
+            kept = current.filter(computer=row.computer_id, key=keep).first()
+            if kept is None:
+                row.key_id = keep
+                row.save()
+                continue
+            if row.reported > kept.reported:
+                kept.status_id = row.status_id
+                kept.value = row.value
+                kept.reported = row.reported
+                kept.save()
+            row.delete()
+
+        # aggregates of the same period are combined.
+        aggregates = StatusAggregate.objects.using(db_alias)
+        for row in aggregates.filter(key__in=others).order_by("pk"):
+            kept = aggregates.filter(
+                computer=row.computer_id, key=keep, period=row.period, start=row.start
+            ).first()
+            if kept is None:
+                row.key_id = keep
+                row.save()
+                continue
+            kept.count += row.count
+            kept.minimum = min(kept.minimum, row.minimum)
+            kept.maximum = max(kept.maximum, row.maximum)
+            kept.total += row.total
+            kept.save()
+            row.delete()
+
+        StatusKey.objects.using(db_alias).filter(pk__in=others).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0016_ipaddress_packed")]
+
+    operations = [migrations.RunPython(merge_duplicate_keys, migrations.RunPython.noop)]
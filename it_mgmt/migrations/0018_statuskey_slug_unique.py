@@ -0,0 +1,16 @@
+# Generated by Django 2.2.28 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("it_mgmt", "0017_merge_duplicate_status_keys")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="statuskey",
+            name="slug",
+            field=models.SlugField(max_length=64, unique=True),
+        )
+    ]
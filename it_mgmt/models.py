@@ -6,14 +6,17 @@ Models for the it_mgmt application.
 from __future__ import print_function, unicode_literals
 
 import hmac
+import numbers
 import os
 import uuid
 
-from dateutil.parser import parser as DateTimeParser
+from dateutil.parser import parse as parse_datetime
 from django.conf import global_settings, settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 from django.utils.encoding import python_2_unicode_compatible
+from mgmt_common import search
 from mgmt_common.base import MgmtBaseModel
 from office_mgmt.models import Asset
 
@@ -21,13 +24,16 @@ from . import handlers
 from .managers import (
     ComputerFlagManager,
     ComputerManager,
+    CurrentStatusManager,
     IPAddressManager,
     LicenceManager,
     NetworkInterfaceManager,
+    StatusAggregateManager,
     StatusKeyManager,
     StatusManager,
     WorkNoteManager,
 )
+from .utils import ip_numbers
 
 ###############
 
@@ -65,12 +71,19 @@ class IPAddress(MgmtBaseModel):
     """
 
     number = models.GenericIPAddressField(primary_key=True)
-    hostname = models.CharField(max_length=64)
+    hostname = models.CharField(max_length=64, db_index=True)
     aliases = models.CharField(max_length=256, null=True, blank=True)
     in_use = models.BooleanField(default=False)
     # updated by Computer.save()
+    # the number, sortable and searchable by network (see utils.ip_numbers);
+    # maintained by save(), bulk_create() and update().
+    packed = models.CharField(
+        max_length=ip_numbers.PACKED_LENGTH, db_index=True, default="", editable=False
+    )
 
     objects = IPAddressManager()
+    # for the computers' search documents (see handlers).
+    tracked_fields = ("hostname", "aliases")
 
     class Meta:
         verbose_name = "IP Address"
@@ -80,6 +93,10 @@ class IPAddress(MgmtBaseModel):
     def __str__(self):
         return self.hostname + " (" + self.number + ")"
 
+    def save(self, *args, **kwargs):
+        self.packed = ip_numbers.pack(self.number)
+        return super(IPAddress, self).save(*args, **kwargs)
+
     @property
     def alive(self):
         if not PING_EXE:
@@ -92,6 +109,11 @@ class IPAddress(MgmtBaseModel):
         )
 
 
+models.signals.post_save.connect(handlers.computer_search_text_touch, sender=IPAddress)
+models.signals.pre_delete.connect(
+    handlers.computer_search_text_ip_pre_delete, sender=IPAddress
+)
+
 #######################################################################
 
 
@@ -169,6 +191,9 @@ class Computer(MgmtBaseModel):
 
     notes = models.TextField(null=True, blank=True)
 
+    # maintained from ComputerQuerySet.search_fields (see mgmt_common.search)
+    search_text = models.TextField(blank=True, default="", editable=False)
+
     objects = ComputerManager()
 
     class Meta:
@@ -197,10 +222,16 @@ class Computer(MgmtBaseModel):
 
 
 models.signals.post_save.connect(handlers.create_api_key, sender=Computer)
+models.signals.m2m_changed.connect(
+    handlers.computer_flags_m2m_changed, sender=Computer.flags.through
+)
+models.signals.post_save.connect(handlers.computer_flag_touch, sender=ComputerFlag)
+models.signals.pre_delete.connect(handlers.computer_flag_touch, sender=ComputerFlag)
 models.signals.post_save.connect(
     handlers.computer_asset_sync_post_save, sender=Computer
 )
 models.signals.post_save.connect(handlers.asset_computer_sync_post_save, sender=Asset)
+models.signals.post_save.connect(search.search_text_post_save, sender=Computer)
 
 #######################################################################
 
@@ -234,19 +265,38 @@ class NetworkInterface(MgmtBaseModel):
     )
 
     objects = NetworkInterfaceManager()
+    # for the computer's search document (see handlers).
+    tracked_fields = ("mac_address",)
 
     class Meta:
         ordering = ("-primary", "name")
         unique_together = (("computer", "name"),)
         base_manager_name = "objects"
+        indexes = [
+            models.Index(fields=["mac_address"], name="it_mgmt_netif_mac_idx"),
+            # the primary interface(s) of a computer, in the default ordering.
+            models.Index(
+                fields=["computer", "primary", "name"],
+                name="it_mgmt_netif_primary_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
 models.signals.pre_save.connect(handlers.ipaddress_fk_pre_save, sender=NetworkInterface)
-models.signals.pre_delete.connect(
-    handlers.ipaddress_fk_pre_delete, sender=NetworkInterface
+models.signals.post_save.connect(
+    handlers.ipaddress_fk_post_save, sender=NetworkInterface
+)
+models.signals.post_delete.connect(
+    handlers.ipaddress_fk_post_delete, sender=NetworkInterface
+)
+models.signals.post_save.connect(
+    handlers.computer_search_text_touch, sender=NetworkInterface
+)
+models.signals.post_delete.connect(
+    handlers.computer_search_text_touch, sender=NetworkInterface
 )
 
 #######################################################################
@@ -276,7 +326,7 @@ class ComputerKey(MgmtBaseModel):
         # Get a random UUID.
         new_uuid = uuid.uuid4()
         # Hmac that beast.
-        return hmac.new(str(new_uuid), digestmod=sha1).hexdigest()
+        return hmac.new(str(new_uuid).encode("utf-8"), digestmod=sha1).hexdigest()
 
 
 #######################################################################
@@ -298,6 +348,14 @@ class ClientIdentifier(MgmtBaseModel):
         return self.key + ":" + self.value
 
 
+models.signals.post_save.connect(
+    handlers.computer_related_touch, sender=ClientIdentifier
+)
+models.signals.post_delete.connect(
+    handlers.computer_related_touch, sender=ClientIdentifier
+)
+
+
 #######################################################################
 
 
@@ -362,6 +420,9 @@ DATATYPE_CHOICES = (
     ("p", "percentage"),
 )
 
+# data types which have a numeric value, and so can be aggregated.
+NUMERIC_DATA_TYPES = ["i", "f", "m", "p", "du"]
+
 
 @python_2_unicode_compatible
 class StatusKey(MgmtBaseModel):
@@ -369,7 +430,7 @@ class StatusKey(MgmtBaseModel):
     Key for indicating status
     """
 
-    slug = models.SlugField(max_length=64, db_index=True)
+    slug = models.SlugField(max_length=64, unique=True)
     verbose_name = models.CharField(max_length=64)
     volatile = models.BooleanField(
         default=False,
@@ -393,17 +454,35 @@ class StatusKey(MgmtBaseModel):
         try:
             if self.data_type in ["i", "m"]:
                 return int(value)
-            if self.data_type == ["f", "p"]:
+            if self.data_type in ["f", "p"]:
                 return float(value)
             if self.data_type == "dt":
-                return DateTimeParser().parse(value)
+                return parse_datetime(value)
             if self.data_type == "du":
                 label, amount = value.split("\t", 1)
                 return {"label": label, "amount": float(amount)}
-        except ValueError:
+        except (ValueError, OverflowError):
             pass
         return value
 
+    def typed_values(self, value):
+        """
+        Return ``(number, datetime)`` for the typed status columns
+        of a raw ``value``; either is None when it does not apply.
+        """
+        if self.data_type not in NUMERIC_DATA_TYPES + ["dt"]:
+            return None, None
+        result = self.data_type_format(value)
+        if self.data_type == "du" and isinstance(result, dict):
+            return result["amount"], None
+        if self.data_type == "dt" and hasattr(result, "tzinfo"):
+            if timezone.is_naive(result) and settings.USE_TZ:
+                result = timezone.make_aware(result)
+            return None, result
+        if isinstance(result, numbers.Real):
+            return float(result), None
+        return None, None
+
 
 #######################################################################
 
@@ -417,17 +496,41 @@ class Status(MgmtBaseModel):
     computer = models.ForeignKey(Computer, on_delete=models.CASCADE)
     key = models.ForeignKey(StatusKey, on_delete=models.CASCADE)
     value = models.TextField()
+    # typed copies of the value, filled in from the key data_type when
+    # the status is written; see StatusKey.typed_values().
+    value_number = models.FloatField(null=True, blank=True, editable=False)
+    value_datetime = models.DateTimeField(null=True, blank=True, editable=False)
 
     objects = StatusManager()
 
     class Meta:
         get_latest_by = "created"
         base_manager_name = "objects"
+        indexes = [
+            # for time series of a computer and key (see it_mgmt.series).
+            models.Index(
+                fields=["computer", "key", "created"], name="it_mgmt_status_series_idx",
+            )
+        ]
 
     def __str__(self):
         return self.value
         # return '{self.key}: {self.value}'.format(self=self)
 
+    def save(self, *args, **kwargs):
+        # The current status (see handlers.current_status_post_save) is
+        # updated in the same transaction as the insert.
+        using = kwargs.get("using") or router.db_for_write(Status, instance=self)
+        self.set_typed_values()
+        with transaction.atomic(using=using):
+            return super(Status, self).save(*args, **kwargs)
+
+    def set_typed_values(self):
+        """
+        Fill in the typed value columns from the value.
+        """
+        self.value_number, self.value_datetime = self.key.typed_values(self.value)
+
     def display(self):
         """
         Use the key data_type to cast the value appropriately.
@@ -435,4 +538,84 @@ class Status(MgmtBaseModel):
         return self.key.data_type_format(self.value)
 
 
+models.signals.post_save.connect(handlers.current_status_post_save, sender=Status)
+
+#######################################################################
+
+
+@python_2_unicode_compatible
+class CurrentStatus(MgmtBaseModel):
+    """
+    The most recent status report for a computer and key.
+    This is maintained from ``Status`` as reports come in, so reading
+    current values never needs to look through the status history.
+    """
+
+    computer = models.ForeignKey(Computer, on_delete=models.CASCADE)
+    key = models.ForeignKey(StatusKey, on_delete=models.CASCADE)
+    status = models.ForeignKey(Status, on_delete=models.SET_NULL, null=True, blank=True)
+    value = models.TextField()
+    reported = models.DateTimeField(verbose_name="report time")
+
+    objects = CurrentStatusManager()
+
+    class Meta:
+        ordering = ["computer", "key"]
+        unique_together = (("computer", "key"),)
+        get_latest_by = "reported"
+        verbose_name_plural = "current statuses"
+        base_manager_name = "objects"
+
+    def __str__(self):
+        return self.value
+
+    def display(self):
+        """
+        Use the key data_type to cast the value appropriately.
+        """
+        return self.key.data_type_format(self.value)
+
+
+#######################################################################
+
+AGGREGATE_PERIOD_CHOICES = (("h", "hourly"), ("d", "daily"))
+
+
+@python_2_unicode_compatible
+class StatusAggregate(MgmtBaseModel):
+    """
+    Summary of the numeric status values for a computer and key over
+    an hour or a day.  Old volatile statuses are rolled up into these
+    (see ``it_mgmt.retention``).
+    """
+
+    computer = models.ForeignKey(Computer, on_delete=models.CASCADE)
+    key = models.ForeignKey(StatusKey, on_delete=models.CASCADE)
+    period = models.CharField(max_length=1, choices=AGGREGATE_PERIOD_CHOICES)
+    start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+    minimum = models.FloatField()
+    maximum = models.FloatField()
+    total = models.FloatField()
+
+    objects = StatusAggregateManager()
+
+    class Meta:
+        ordering = ["computer", "key", "period", "start"]
+        unique_together = (("computer", "key", "period", "start"),)
+        get_latest_by = "start"
+        base_manager_name = "objects"
+
+    def __str__(self):
+        return "{0} {1}: {2}".format(
+            self.get_period_display(), self.start, self.average
+        )
+
+    @property
+    def average(self):
+        if not self.count:
+            return None
+        return self.total / self.count
+
+
 #######################################################################
@@ -1,9 +1,27 @@
 #######################
 from __future__ import print_function, unicode_literals
 
-from django.db import models
+import operator
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.validators import validate_ipv46_address
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models.functions import Trunc
+from django.utils.timezone import is_aware, make_naive, now, utc
+from mgmt_common import bulk, search
 from mgmt_common.base import MgmtBaseQuerySet
 
+from . import conf, ipcache
+from .utils import ip_numbers
+
+#######################
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 #######################
 """
 Models for the it_mgmt application.
@@ -29,6 +47,104 @@ class ComputerQuerySet(MgmtBaseQuerySet):
         "networkinterface__ip_address__aliases",
     ]
 
+    # "name:value" words understood by search_query(): name -> method.
+    search_operators = {
+        "ip": "with_ip",
+        "mac": "with_mac",
+        "flag": "with_flag",
+        "room": "in_room",
+        "os": "with_os",
+    }
+
+    def use_search_index(self):
+        return conf.get("search:memory_index")
+
+    def apply_search_operators(self, criteria):
+        """
+        Apply the search operators (e.g., "ip:10.0.0.0/24", see
+        search_operators) in ``criteria``, a list of strings.
+        Returns ``(queryset, terms)``, where ``terms`` is the list of
+        the other (free text) words.
+        """
+        qs = self
+        terms = []
+        for word in " ".join(["{}".format(c) for c in criteria]).split():
+            name, sep, value = word.partition(":")
+            method = self.search_operators.get(name.lower())
+            if method is None or not value:
+                terms.append(word)
+            else:
+                qs = getattr(qs, method)(value)
+        return qs, terms
+
+    def search_query(self, *criteria):
+        """
+        As for search(), but "name:value" words are applied as targeted
+        filters (see search_operators) rather than searched for in every
+        search field.  Free text words, if any, are passed on to search().
+        Raises ValueError for a malformed value (e.g., "ip:10.0.1.0/99").
+        """
+        qs, terms = self.apply_search_operators(criteria)
+        if terms:
+            return qs.search(*terms)
+        return qs.filter(active=True)
+
+    def _with_interfaces(self, interfaces):
+        return self.filter(pk__in=interfaces.values("computer"))
+
+    def with_ip(self, value):
+        """
+        Restrict to computers with an interface on the address ``value``:
+        a network ("10.0.0.0/24"), an address, or the start of one
+        ("10.0.3.").
+        """
+        from .models import IPAddress, NetworkInterface
+
+        addresses = IPAddress.objects.using(self.db)
+        if "/" in value:
+            addresses = addresses.in_network(value)
+        else:
+            try:
+                validate_ipv46_address(value)
+            except ValidationError:
+                addresses = addresses.filter(pk__startswith=value)
+            else:
+                addresses = addresses.filter(pk=value)
+        interfaces = NetworkInterface.objects.using(self.db).filter(
+            ip_address__in=addresses.values("pk")
+        )
+        return self._with_interfaces(interfaces)
+
+    def with_mac(self, value):
+        """
+        Restrict to computers with an interface whose MAC address
+        contains ``value``.
+        """
+        from .models import NetworkInterface
+
+        interfaces = NetworkInterface.objects.using(self.db).filter(
+            mac_address__icontains=value
+        )
+        return self._with_interfaces(interfaces)
+
+    def with_flag(self, slug):
+        """
+        Restrict to computers with the flag ``slug``.
+        """
+        return self.filter(flags__slug=slug)
+
+    def in_room(self, number):
+        """
+        Restrict to computers in the room numbered ``number``.
+        """
+        return self.filter(room__number__iexact=number)
+
+    def with_os(self, value):
+        """
+        Restrict to computers whose operating system contains ``value``.
+        """
+        return self.filter(operating_system__icontains=value)
+
 
 #######################################################################
 
@@ -55,22 +171,210 @@ class ComputerFlagQuerySet(MgmtBaseQuerySet):
 #######################################################################
 
 
-class IPAddressQuerySet(MgmtBaseQuerySet):
+class BulkSaveQuerySet(MgmtBaseQuerySet):
+    """
+    A QuerySet which can save many new and changed objects at once.
+    """
+
+    def by_keys(self, key_fields, keys):
+        """
+        Restrict to the objects whose values for ``key_fields`` (e.g.,
+        ``["computer", "name"]``) are one of the tuples in ``keys``.
+        """
+        keys = list(keys)
+        if not keys:
+            return self.none()
+        q_list = [models.Q(**dict(zip(key_fields, key))) for key in keys]
+        return self.filter(reduce(operator.or_, q_list))
+
+    def bulk_save(self, objs, update_fields, key_fields):
+        """
+        Save model instances in bulk: new ones (never saved or loaded)
+        are created, and the ``update_fields`` of the others are updated.
+        ``key_fields`` are unique together; they are used to find the
+        primary keys of new objects on backends which do not return them.
+        This takes a constant number of queries, and bypasses ``save()``
+        and its signals.
+        """
+        created = [obj for obj in objs if obj._state.adding]
+        updated = [obj for obj in objs if not obj._state.adding]
+        with transaction.atomic(using=self.db):
+            self.bulk_create(created, batch_size=1000)
+            if updated:
+                timestamp = now()
+                for obj in updated:
+                    obj.modified = timestamp
+                self.bulk_update(
+                    updated, list(update_fields) + ["modified"], batch_size=1000
+                )
+        attnames = [self.model._meta.get_field(f).attname for f in update_fields]
+        for obj in created:
+            obj._state.adding = False
+            obj._track()
+        for obj in updated:
+            obj._track(attnames)
+        missing = [obj for obj in created if obj.pk is None]
+        if missing:
+            attnames = [self.model._meta.get_field(f).attname for f in key_fields]
+
+            def key(obj):
+                return tuple([getattr(obj, attname) for attname in attnames])
+
+            rows = self.by_keys(attnames, [key(obj) for obj in missing]).values_list(
+                *(attnames + ["pk"])
+            )
+            pk_map = dict([(row[:-1], row[-1]) for row in rows])
+            for obj in missing:
+                obj.pk = pk_map[key(obj)]
+        return objs
+
+
+#######################################################################
+
+
+class IPAddressQuerySet(BulkSaveQuerySet):
     """
     Provide a custom model API.  Urls, views, etc. should only
     use these methods, never .filter(...).
     """
 
+    # changes to these affect the search documents of the computers.
+    search_document_fields = ["hostname", "aliases"]
+
+    def _used(self):
+        from .models import NetworkInterface
+
+        return models.Exists(
+            NetworkInterface.objects.filter(ip_address=models.OuterRef("pk"))
+        )
+
+    def in_use_wrong(self):
+        """
+        Restrict to the addresses whose ``in_use`` flag is wrong.
+        """
+        return self.annotate(used=self._used()).exclude(in_use=models.F("used"))
+
+    def update_in_use(self):
+        """
+        Recompute ``in_use`` for these addresses, in a single UPDATE: an
+        address is in use when a network interface has it.
+        Returns the number of addresses changed.
+        """
+        return self.in_use_wrong().update(in_use=self._used())
+
+    def in_network(self, cidr):
+        """
+        Restrict to the addresses in the network ``cidr`` (e.g.,
+        "130.179.24.0/22"): a range scan of the packed numbers.
+        Raises ValueError for anything which is not a network.
+        """
+        first, last = ip_numbers.network_range(cidr)
+        return self.filter(packed__gte=first, packed__lte=last)
+
+    def by_number(self):
+        """
+        Order by address, numerically.
+        """
+        return self.order_by("packed")
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        As for QuerySet.bulk_create(), filling in the packed numbers.
+        """
+        objs = list(objs)
+        for obj in objs:
+            obj.packed = ip_numbers.pack(obj.number)
+        return super(IPAddressQuerySet, self).bulk_create(objs, *args, **kwargs)
+
+    def update(self, **kwargs):
+        """
+        As for QuerySet.update(), keeping the packed number right, and
+        refreshing the search documents of the computers using the
+        addresses when their names change.
+        """
+        number = kwargs.get("number")
+        if number is not None and not hasattr(number, "resolve_expression"):
+            kwargs["packed"] = ip_numbers.pack(number)
+        if not set(kwargs) & set(self.search_document_fields):
+            return super(IPAddressQuerySet, self).update(**kwargs)
+        from .models import Computer
+
+        with transaction.atomic(using=self.db):
+            computers = Computer.objects.using(self.db).filter(
+                networkinterface__ip_address__in=self.values("pk")
+            )
+            computer_pks = list(computers.values_list("pk", flat=True))
+            rows = super(IPAddressQuerySet, self).update(**kwargs)
+            search.changed(Computer, computer_pks)
+        return rows
+
 
 #######################################################################
 
 
-class NetworkInterfaceQuerySet(MgmtBaseQuerySet):
+class NetworkInterfaceQuerySet(BulkSaveQuerySet):
     """
     Provide a custom model API.  Urls, views, etc. should only
     use these methods, never .filter(...).
     """
 
+    # changes to these affect address usage, or the client IP lookups
+    # (see handlers.ipaddress_fk_pre_save).
+    ip_address_fields = ["ip_address", "ip_address_id", "computer", "computer_id"]
+    # changes to these affect the search documents of the computers.
+    search_document_fields = ip_address_fields + ["mac_address"]
+
+    def _ip_addresses_changed(self, numbers):
+        from .handlers import reconcile_ip_addresses
+        from .models import IPAddress
+
+        numbers = set(numbers) - set([None])
+        if bulk.defer(reconcile_ip_addresses, numbers):
+            return
+        if numbers:
+            IPAddress.objects.using(self.db).filter(pk__in=numbers).update_in_use()
+        transaction.on_commit(ipcache.invalidate, using=self.db)
+
+    def _computers_changed(self, computer_pks):
+        from .models import Computer
+
+        search.changed(Computer, computer_pks)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        As for QuerySet.bulk_create(), keeping the ``in_use`` flag of
+        the new interfaces' addresses, and the search documents of
+        their computers, right.
+        """
+        with transaction.atomic(using=self.db):
+            objs = super(NetworkInterfaceQuerySet, self).bulk_create(
+                objs, *args, **kwargs
+            )
+            self._ip_addresses_changed([obj.ip_address_id for obj in objs])
+            self._computers_changed([obj.computer_id for obj in objs])
+        return objs
+
+    def update(self, **kwargs):
+        """
+        As for QuerySet.update(), keeping the ``in_use`` flag of the old
+        and new addresses of the interfaces, and the search documents
+        of their computers, right.  (``bulk_update()`` comes here too.)
+        """
+        fields = set(kwargs)
+        if not fields & set(self.search_document_fields):
+            return super(NetworkInterfaceQuerySet, self).update(**kwargs)
+        with transaction.atomic(using=self.db):
+            old = list(self.values_list("pk", "ip_address", "computer"))
+            rows = super(NetworkInterfaceQuerySet, self).update(**kwargs)
+            new = self.model._default_manager.using(self.db).filter(
+                pk__in=[row[0] for row in old]
+            )
+            new = list(new.values_list("pk", "ip_address", "computer"))
+            if fields & set(self.ip_address_fields):
+                self._ip_addresses_changed([row[1] for row in old + new])
+            self._computers_changed([row[2] for row in old + new])
+        return rows
+
     def primary(self):
         """
         Restrict to primary interfaces
@@ -141,6 +445,42 @@ class StatusKeyQuerySet(MgmtBaseQuerySet):
     use these methods, never .filter(...).
     """
 
+    def volatile(self):
+        """
+        Restrict to keys with frequently changing values.
+        """
+        return self.filter(volatile=True)
+
+    def numeric(self):
+        """
+        Restrict to keys whose values are numeric.
+        """
+        from .models import NUMERIC_DATA_TYPES
+
+        return self.filter(data_type__in=NUMERIC_DATA_TYPES)
+
+    def get_or_create_slugs(self, slugs):
+        """
+        Return a dictionary mapping each of the ``slugs`` to its key;
+        keys which do not exist yet are created (named by their slug).
+        A key created at the same time by a concurrent report is used
+        rather than duplicated (slugs are unique).
+        """
+        slugs = set(slugs)
+
+        def _slug_map():
+            return dict([(k.slug, k) for k in self.filter(slug__in=slugs)])
+
+        key_map = _slug_map()
+        missing = slugs - set(key_map)
+        if missing:
+            self.bulk_create(
+                [self.model(slug=slug, verbose_name=slug) for slug in sorted(missing)],
+                ignore_conflicts=True,
+            )
+            key_map = _slug_map()
+        return key_map
+
 
 #######################################################################
 
@@ -151,23 +491,74 @@ class StatusQuerySet(MgmtBaseQuerySet):
     use these methods, never .filter(...).
     """
 
-    #     # is this one even necessary??
-    #     def bulk_create_from_dict(self, computer, d):
-    #         """
-    #         Bulk create a new set of statuses for an individual computer.
-    #         The keys of the update dictionary correspond to StatusKey slug
-    #         fields, and created if they checked before creation.
-    #         """
-    #         from .models import StatusKey
-    #         key_list = d.keys()
-    #         statuskey_map = StatusKey.objects.in_bulk(key_list)
-    #         result = []
-    #         for slug in key_list:
-    #             value = d[slug]
-    #             key = statuskey_map[slug]
-    #             result.append( self.create(computer=computer, key=key,
-    #                                        value=value) )
-    #         return result
+    def bulk_create_from_dict(self, computer, d):
+        """
+        Bulk create a new set of statuses for an individual computer.
+        The keys of the update dictionary correspond to StatusKey slug
+        fields, and are created if they do not exist.
+        """
+        return self.bulk_report([(computer, d)])
+
+    def bulk_report(self, reports):
+        """
+        Bulk create the statuses for a list of ``(computer, d)`` reports,
+        where ``d`` maps StatusKey slugs to values (as in
+        ``bulk_create_from_dict``).  ``computer`` is a Computer or its pk.
+        This takes a constant number of queries, however many computers
+        and keys are involved.
+        Returns the list of new statuses.
+        """
+        from .models import CurrentStatus, StatusKey
+
+        slugs = set()
+        for computer, d in reports:
+            slugs.update(d)
+        with transaction.atomic(using=self.db):
+            key_map = StatusKey.objects.using(self.db).get_or_create_slugs(slugs)
+            status_list = [
+                self.model(
+                    computer_id=getattr(computer, "pk", computer),
+                    key=key_map[slug],
+                    value="{}".format(value),
+                )
+                for computer, d in reports
+                for slug, value in d.items()
+            ]
+            for status in status_list:
+                status.set_typed_values()
+            self.bulk_create(status_list, batch_size=1000)
+            self._fill_pks(status_list)
+            CurrentStatus.objects.using(self.db).record(status_list)
+        return status_list
+
+    def _fill_pks(self, status_list):
+        """
+        Read back the pks of statuses from ``bulk_create`` on databases
+        which do not return them, so the current statuses can link to
+        them (and retention keeps them).
+        """
+        missing = [status for status in status_list if status.pk is None]
+        if not missing:
+            return
+        created = [status.created for status in missing]
+        rows = (
+            self.filter(
+                computer_id__in=set([status.computer_id for status in missing]),
+                key_id__in=set([status.key_id for status in missing]),
+                created__gte=min(created),
+                created__lte=max(created),
+            )
+            .order_by("pk")
+            .values_list("computer_id", "key_id", "created", "pk")
+        )
+        pk_map = {}
+        for computer_id, key_id, created, pk in rows:
+            pk_map.setdefault((computer_id, key_id, created), []).append(pk)
+        # rows were inserted in order, so equal keys get ascending pks.
+        for status in missing:
+            pks = pk_map.get((status.computer_id, status.key_id, status.created))
+            if pks:
+                status.pk = pks.pop(0)
 
     def computers(self):
         """
@@ -189,23 +580,281 @@ class StatusQuerySet(MgmtBaseQuerySet):
 
     def latest_by_key(self, key_slugs=None):
         """
-        Return the latest status for the given key slugs.
+        Return the latest status for each (computer, key) pair, restricted
+        to the given key slugs.
         If ``key_slugs`` is None, then return for *all* keys.
-        
-        N+2 queries... is there no better way?
-        """
-        qs_key_slugs = self.statuskeys().values_list("slug", flat=True)
-        if key_slugs is None:
-            key_slugs = qs_key_slugs
-        # this is probably not the most efficient way, in terms of
-        # queryset, etc.
-        pk_list = [
-            self.filter(key__slug=slug).values_list("pk", flat=True).latest()
-            for slug in key_slugs
-            if slug in qs_key_slugs
-        ]
-        qs = self.filter(pk__in=pk_list).order_by("key")
-        return qs
+
+        This is evaluated as a single query, for any number of computers:
+        ``DISTINCT ON`` when the database supports it (PostgreSQL),
+        otherwise a correlated subquery picking the newest row of each pair.
+        """
+        qs = self
+        if key_slugs is not None:
+            qs = qs.filter(key__slug__in=key_slugs)
+        if connections[self.db].features.can_distinct_on_fields:
+            latest = qs.order_by("computer_id", "key_id", "-created", "-pk").distinct(
+                "computer_id", "key_id"
+            )
+        else:
+            newest = (
+                qs.filter(
+                    computer=models.OuterRef("computer"), key=models.OuterRef("key")
+                )
+                .order_by("-created", "-pk")
+                .values("pk")[:1]
+            )
+            latest = qs.filter(pk=models.Subquery(newest))
+        return self.filter(pk__in=latest.values("pk")).order_by("computer", "key")
+
+    def columns(self, *fields):
+        """
+        Return the statuses as a dictionary of columns, one for each of
+        the ``fields`` (by default ``computer``, ``created`` and
+        ``value_number``), suitable for charting.
+        The typed value columns are read directly, so no values are
+        parsed.  When NumPy is available, the columns are arrays:
+        datetimes are (UTC) ``datetime64`` with ``NaT`` for missing values,
+        and numbers are floats with ``nan`` for missing values.
+        Otherwise, the columns are lists.
+        """
+        fields = fields or ("computer", "created", "value_number")
+        rows = list(self.values_list(*fields))
+        if rows:
+            values = zip(*rows)
+        else:
+            values = [()] * len(fields)
+        columns = {}
+        for name, column in zip(fields, values):
+            columns[name] = list(column)
+            if numpy is not None:
+                columns[name] = self._numpy_column(name, columns[name])
+        return columns
+
+    def series(self, bucket):
+        """
+        Summarize the numeric values in ``bucket`` sized periods
+        (a ``Trunc`` kind: "minute", "hour", "day", ...; in UTC).
+        Returns rows of
+        ``(computer_id, key_id, start, count, minimum, maximum, total)``,
+        computed by the database, ordered by computer, key and start.
+        """
+        return (
+            self.filter(value_number__isnull=False)
+            .annotate(start=Trunc("created", bucket, tzinfo=utc))
+            .order_by()
+            .values_list("computer_id", "key_id", "start")
+            .annotate(
+                count=models.Count("value_number"),
+                minimum=models.Min("value_number"),
+                maximum=models.Max("value_number"),
+                total=models.Sum("value_number"),
+            )
+            .order_by("computer_id", "key_id", "start")
+        )
+
+    def _numpy_column(self, name, column):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if isinstance(field, models.DateTimeField):
+            column = [
+                make_naive(dt, utc) if dt is not None and is_aware(dt) else dt
+                for dt in column
+            ]
+            return numpy.array(column, dtype="datetime64[us]")
+        if isinstance(field, models.FloatField):
+            return numpy.array(column, dtype=float)
+        return numpy.array(column)
+
+
+#######################################################################
+
+
+class CurrentStatusQuerySet(MgmtBaseQuerySet):
+    """
+    Provide a custom model API.  Urls, views, etc. should only
+    use these methods, never .filter(...).
+    """
+
+    def computers(self):
+        """
+        Return the queryset of computers.
+        """
+        from .models import Computer
+
+        pk_set = self.values_list("computer", flat=True).distinct()
+        return Computer.objects.filter(pk__in=pk_set)
+
+    def record(self, status_list, retry=True):
+        """
+        Update the current statuses from the given (saved) ``Status``
+        objects; older reports never replace newer ones.
+        Statuses without a pk (from ``bulk_create``, on databases which
+        do not return them) leave the current status with no ``status``
+        link; ``StatusQuerySet.bulk_report`` reads the pks back first.
+        This takes a constant number of queries, however many statuses
+        and computers are involved.  The current rows are locked while
+        they are compared, so concurrent reports cannot let an older
+        status overwrite a newer one.
+        """
+        newest = {}
+        for status in status_list:
+            if not status.active:
+                continue
+            pair = (status.computer_id, status.key_id)
+            if pair not in newest or (newest[pair].created, newest[pair].pk or 0) < (
+                status.created,
+                status.pk or 0,
+            ):
+                newest[pair] = status
+        if not newest:
+            return
+
+        with transaction.atomic(using=self.db):
+            # (locked in a fixed order, so concurrent reports queue up
+            # rather than deadlock.)
+            existing = (
+                self.filter(
+                    computer_id__in=set([c for c, k in newest]),
+                    key_id__in=set([k for c, k in newest]),
+                )
+                .select_related(None)
+                .select_for_update()
+                .order_by("computer_id", "key_id")
+            )
+            existing = dict([((o.computer_id, o.key_id), o) for o in existing])
+            create_list = []
+            update_list = []
+            for pair, status in newest.items():
+                current = existing.get(pair)
+                if current is None:
+                    current = self.model(computer_id=pair[0], key_id=pair[1])
+                    create_list.append(current)
+                elif current.reported > status.created:
+                    continue
+                else:
+                    update_list.append(current)
+                current.status_id = status.pk
+                current.value = status.value
+                current.reported = status.created
+                current.modified = now()
+
+            if update_list:
+                self.bulk_update(
+                    update_list, ["status", "value", "reported", "modified"]
+                )
+            try:
+                with transaction.atomic(using=self.db):
+                    self.bulk_create(create_list)
+            except IntegrityError:
+                # a concurrent report got there first.
+                if not retry:
+                    raise
+                self.record(newest.values(), retry=False)
+
+    def rebuild(self, status_queryset):
+        """
+        Replace the current statuses of the computers in
+        ``status_queryset`` with the latest active statuses from it.
+        """
+        latest = status_queryset.active().latest_by_key().select_related(None)
+        with transaction.atomic(using=self.db):
+            self.filter(computer__in=status_queryset.values("computer")).delete()
+            self.bulk_create(
+                [
+                    self.model(
+                        computer_id=status.computer_id,
+                        key_id=status.key_id,
+                        status_id=status.pk,
+                        value=status.value,
+                        reported=status.created,
+                    )
+                    for status in latest
+                ],
+                batch_size=1000,
+            )
+
+
+#######################################################################
+
+
+class StatusAggregateQuerySet(MgmtBaseQuerySet):
+    """
+    Provide a custom model API.  Urls, views, etc. should only
+    use these methods, never .filter(...).
+    """
+
+    def hourly(self):
+        return self.filter(period="h")
+
+    def daily(self):
+        return self.filter(period="d")
+
+    def series(self, bucket):
+        """
+        Like ``StatusQuerySet.series``, for the aggregated history.
+        Aggregates are never split: when ``bucket`` is finer than the
+        aggregate period, each aggregate is its own bucket.
+        """
+        return (
+            self.annotate(bucket_start=Trunc("start", bucket, tzinfo=utc))
+            .order_by()
+            .values_list("computer_id", "key_id", "bucket_start")
+            .annotate(
+                bucket_count=models.Sum("count"),
+                bucket_minimum=models.Min("minimum"),
+                bucket_maximum=models.Max("maximum"),
+                bucket_total=models.Sum("total"),
+            )
+            .order_by("computer_id", "key_id", "bucket_start")
+        )
+
+    def merge(self, period, buckets):
+        """
+        Add the ``buckets`` into the aggregates for the ``period``.
+        ``buckets`` is a dictionary mapping
+        ``(computer_id, key_id, start)`` to ``[count, minimum, maximum, total]``.
+        This takes a constant number of queries.
+        """
+        if not buckets:
+            return
+        existing = self.filter(
+            period=period,
+            computer_id__in=set([b[0] for b in buckets]),
+            key_id__in=set([b[1] for b in buckets]),
+            start__in=set([b[2] for b in buckets]),
+        )
+        existing = dict([((o.computer_id, o.key_id, o.start), o) for o in existing])
+        create_list = []
+        update_list = []
+        for bucket, (count, minimum, maximum, total) in buckets.items():
+            aggregate = existing.get(bucket)
+            if aggregate is None:
+                create_list.append(
+                    self.model(
+                        computer_id=bucket[0],
+                        key_id=bucket[1],
+                        period=period,
+                        start=bucket[2],
+                        count=count,
+                        minimum=minimum,
+                        maximum=maximum,
+                        total=total,
+                    )
+                )
+            else:
+                aggregate.count += count
+                aggregate.minimum = min(aggregate.minimum, minimum)
+                aggregate.maximum = max(aggregate.maximum, maximum)
+                aggregate.total += total
+                aggregate.modified = now()
+                update_list.append(aggregate)
+        with transaction.atomic(using=self.db):
+            self.bulk_update(
+                update_list, ["count", "minimum", "maximum", "total", "modified"]
+            )
+            self.bulk_create(create_list)
 
 
 #######################################################################
@@ -0,0 +1,185 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import conf
+from .models import (
+    NUMERIC_DATA_TYPES,
+    CurrentStatus,
+    Status,
+    StatusAggregate,
+    StatusKey,
+)
+
+#######################
+"""
+Retention for the status history of volatile status keys.
+
+Raw statuses older than the retention window are deleted; those with
+numeric data types are first rolled up into hourly aggregates, and
+hourly aggregates are in turn rolled up into daily aggregates.
+The current status of each computer and key is always kept.
+
+Work is done in bounded batches, each in its own short transaction,
+so a run never holds locks on large parts of the status table.
+"""
+#######################################################################
+
+#######################################################################
+
+
+def bucket_start(dt, period):
+    """
+    The start of the hour (``period="h"``) or day (``period="d"``)
+    containing ``dt``.
+    """
+    dt = dt.replace(minute=0, second=0, microsecond=0)
+    if period == "d":
+        dt = dt.replace(hour=0)
+    return dt
+
+
+#######################################################################
+
+
+def numeric_value(data_type, value):
+    """
+    The numeric value of a raw status ``value``, or None.
+    """
+    try:
+        if data_type == "du":
+            value = value.split("\t", 1)[1]
+        return float(value)
+    except (ValueError, IndexError):
+        return None
+
+
+#######################################################################
+
+
+def add_to_bucket(buckets, bucket, count, minimum, maximum, total):
+    """
+    Combine a summary into the ``buckets`` dictionary.
+    """
+    if bucket not in buckets:
+        buckets[bucket] = [count, minimum, maximum, total]
+        return
+    current = buckets[bucket]
+    current[0] += count
+    current[1] = min(current[1], minimum)
+    current[2] = max(current[2], maximum)
+    current[3] += total
+
+
+#######################################################################
+
+
+def expire_statuses(key, cutoff, batch_size, verbosity=0):
+    """
+    Delete the statuses for ``key`` older than ``cutoff``, rolling
+    numeric values into hourly aggregates.
+    Returns the number of statuses removed.
+    """
+    numeric = key.data_type in NUMERIC_DATA_TYPES
+    current = CurrentStatus.objects.filter(key=key, status__isnull=False)
+    queryset = Status.objects.filter(key=key, created__lt=cutoff).exclude(
+        pk__in=current.values("status")
+    )
+    removed = 0
+    while True:
+        chunk = list(
+            queryset.order_by("pk").values_list(
+                "pk", "computer_id", "created", "value", "value_number"
+            )[:batch_size]
+        )
+        if not chunk:
+            break
+        buckets = {}
+        if numeric:
+            for pk, computer_id, created, value, number in chunk:
+                if number is None:
+                    # not yet backfilled (see cli/status_typed_backfill).
+                    number = numeric_value(key.data_type, value)
+                if number is None:
+                    continue
+                bucket = (computer_id, key.pk, bucket_start(created, "h"))
+                add_to_bucket(buckets, bucket, 1, number, number, number)
+        with transaction.atomic():
+            StatusAggregate.objects.merge("h", buckets)
+            Status.objects.filter(pk__in=[row[0] for row in chunk]).delete()
+        removed += len(chunk)
+        if verbosity > 1:
+            print(key.slug, "removed", removed, "statuses")
+    return removed
+
+
+#######################################################################
+
+
+def expire_hourly(cutoff, batch_size, verbosity=0):
+    """
+    Roll hourly aggregates older than ``cutoff`` into daily aggregates.
+    Returns the number of hourly aggregates removed.
+    """
+    queryset = StatusAggregate.objects.hourly().filter(start__lt=cutoff)
+    removed = 0
+    while True:
+        chunk = list(queryset.order_by("pk")[:batch_size])
+        if not chunk:
+            break
+        buckets = {}
+        for aggregate in chunk:
+            bucket = (
+                aggregate.computer_id,
+                aggregate.key_id,
+                bucket_start(aggregate.start, "d"),
+            )
+            add_to_bucket(
+                buckets,
+                bucket,
+                aggregate.count,
+                aggregate.minimum,
+                aggregate.maximum,
+                aggregate.total,
+            )
+        with transaction.atomic():
+            StatusAggregate.objects.merge("d", buckets)
+            StatusAggregate.objects.filter(pk__in=[a.pk for a in chunk]).delete()
+        removed += len(chunk)
+        if verbosity > 1:
+            print("removed", removed, "hourly aggregates")
+    return removed
+
+
+#######################################################################
+
+
+def apply_retention(days=None, hourly_days=None, batch_size=None, verbosity=0):
+    """
+    Apply the retention policy to all volatile status keys.
+    Settings not given are taken from the application configuration.
+    Returns ``(statuses_removed, hourly_aggregates_removed)``.
+    """
+    if days is None:
+        days = conf.get("status:retention_days")
+    if hourly_days is None:
+        hourly_days = conf.get("status:hourly_retention_days")
+    if batch_size is None:
+        batch_size = conf.get("status:retention_batch_size")
+
+    # cut on bucket boundaries, so that buckets are rolled up whole.
+    cutoff = bucket_start(now() - timedelta(days=days), "h")
+    statuses = 0
+    for key in StatusKey.objects.volatile():
+        statuses += expire_statuses(key, cutoff, batch_size, verbosity)
+
+    cutoff = bucket_start(now() - timedelta(days=hourly_days), "d")
+    hourly = expire_hourly(cutoff, batch_size, verbosity)
+    return statuses, hourly
+
+
+#######################################################################
@@ -0,0 +1,84 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from .models import Status, StatusAggregate
+
+#######################
+"""
+Time series of numeric status values, bucketed by the database.
+
+Recent history comes from the raw statuses, older history from the
+aggregates left behind by the retention policy (see ``it_mgmt.retention``);
+the two are merged into a single series for each computer and key.
+"""
+#######################################################################
+
+BUCKETS = ["minute", "hour", "day", "week", "month"]
+
+#######################################################################
+
+
+def _merge(rows_a, rows_b):
+    """
+    Merge two ordered series, combining rows for the same bucket.
+    """
+    rows_a = iter(rows_a)
+    rows_b = iter(rows_b)
+    a = next(rows_a, None)
+    b = next(rows_b, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a[:3] < b[:3]):
+            yield a
+            a = next(rows_a, None)
+        elif a is None or b[:3] < a[:3]:
+            yield b
+            b = next(rows_b, None)
+        else:
+            yield a[:3] + (
+                a[3] + b[3],
+                min(a[4], b[4]),
+                max(a[5], b[5]),
+                a[6] + b[6],
+            )
+            a = next(rows_a, None)
+            b = next(rows_b, None)
+
+
+#######################################################################
+
+
+def status_series(keys, start, end, bucket="hour", computer_pks=None):
+    """
+    Generate the series for the status ``keys`` from ``start`` up to
+    ``end``, for the given computers (default: all).
+    Yields dictionaries with the computer pk, key slug, bucket start,
+    and the count, minimum, maximum and average of the values.
+    Rows are streamed from the database, never held all at once.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError("Unknown bucket: {0!r}".format(bucket))
+    slugs = dict([(key.pk, key.slug) for key in keys])
+    statuses = Status.objects.filter(key__in=slugs, created__gte=start, created__lt=end)
+    aggregates = StatusAggregate.objects.filter(
+        key__in=slugs, start__gte=start, start__lt=end
+    )
+    if computer_pks is not None:
+        statuses = statuses.filter(computer__in=computer_pks)
+        aggregates = aggregates.filter(computer__in=computer_pks)
+
+    for row in _merge(
+        aggregates.series(bucket).iterator(), statuses.series(bucket).iterator()
+    ):
+        computer_id, key_id, bucket_start, count, minimum, maximum, total = row
+        yield {
+            "computer": computer_id,
+            "key": slugs[key_id],
+            "start": bucket_start,
+            "count": count,
+            "minimum": minimum,
+            "maximum": maximum,
+            "average": total / count,
+        }
+
+
+#######################################################################
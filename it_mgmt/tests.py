@@ -1,9 +1,29 @@
 #######################
 from __future__ import print_function, unicode_literals
 
-from django.test import TestCase
+from datetime import datetime, timedelta
 
-from .models import Computer, IPAddress
+from django.db import connection, models
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils.timezone import now
+
+from . import assetsync, bulk_mode
+from .models import (
+    Asset,
+    ClientIdentifier,
+    Computer,
+    ComputerFlag,
+    ComputerKey,
+    CurrentStatus,
+    IPAddress,
+    Licence,
+    NetworkInterface,
+    Status,
+    StatusAggregate,
+    StatusKey,
+    WorkNote,
+)
 
 #######################
 """
@@ -19,6 +39,33 @@ http://toastdriven.com/blog/2011/apr/10/guide-to-testing-in-django/
 
 #######################################################################
 
+
+def make_related(model, field_name):
+    """
+    Create an object for the foreign key ``field_name`` of ``model``
+    (e.g., a person or room, from applications outside this package),
+    with placeholder values for whatever fields it requires.
+    """
+    related_model = model._meta.get_field(field_name).related_model
+    values = {}
+    for field in related_model._meta.concrete_fields:
+        if field.primary_key or field.null or field.has_default():
+            continue
+        if field.many_to_one or field.one_to_one:
+            values[field.attname] = make_related(related_model, field.name).pk
+        elif isinstance(field, models.BooleanField):
+            values[field.attname] = False
+        elif isinstance(field, models.DateTimeField):
+            values[field.attname] = now()
+        elif isinstance(field, models.DateField):
+            values[field.attname] = now().date()
+        elif isinstance(field, (models.IntegerField, models.FloatField)):
+            values[field.attname] = 1
+        else:
+            values[field.attname] = "test"
+    return related_model.objects.create(**values)
+
+
 #######################################################################
 
 
@@ -107,3 +154,1291 @@ class ComputerIPChangeTestCase(TestCase):
         self.computer1.delete()
         self.assertEqual(self.addr1.in_use, False)
         self.assertEqual(self.addr2.in_use, True)
+
+
+#######################################################################
+
+
+class IPAddressInUseTestCase(TestCase):
+    """
+    Check that ``in_use`` follows the network interfaces, whether they
+    are saved one at a time or in bulk.
+    """
+
+    def setUp(self):
+        self.computer = Computer.objects.create(common_name="computer")
+        for i in range(3):
+            IPAddress.objects.create(
+                number="10.0.0.{0}".format(i), hostname="host{0}".format(i)
+            )
+
+    def in_use(self):
+        return list(
+            IPAddress.objects.filter(in_use=True)
+            .order_by("number")
+            .values_list("number", flat=True)
+        )
+
+    def test_save(self):
+        iface = NetworkInterface.objects.create(
+            computer=self.computer, name="en0", type="e", ip_address_id="10.0.0.0"
+        )
+        self.assertEqual(self.in_use(), ["10.0.0.0"])
+        iface.ip_address_id = "10.0.0.1"
+        iface.save()
+        self.assertEqual(self.in_use(), ["10.0.0.1"])
+        iface.delete()
+        self.assertEqual(self.in_use(), [])
+
+    def test_saved_values(self):
+        NetworkInterface.objects.create(
+            computer=self.computer, name="en0", type="e", ip_address_id="10.0.0.0"
+        )
+        iface = NetworkInterface.objects.get(name="en0")
+        self.assertEqual(iface.saved_value("ip_address_id"), "10.0.0.0")
+        iface.name = "eth0"
+        with self.assertNumQueries(1):
+            iface.save()  # no reload of the old row, and no address change.
+        iface.mac_address = "00"
+        # two queries to refresh the computer's search document.
+        with self.assertNumQueries(3):
+            iface.save()
+        iface.ip_address_id = "10.0.0.1"
+        with self.assertNumQueries(4):
+            iface.save()
+        self.assertEqual(iface.saved_value("ip_address_id"), "10.0.0.1")
+        self.assertEqual(self.in_use(), ["10.0.0.1"])
+        address = IPAddress.objects.get(number="10.0.0.1")
+        address.active = False
+        with self.assertNumQueries(1):
+            address.save()  # no search document holds ``active``.
+
+    def test_shared(self):
+        for name in ["en0", "en1"]:
+            NetworkInterface.objects.create(
+                computer=self.computer, name=name, type="e", ip_address_id="10.0.0.0"
+            )
+        NetworkInterface.objects.get(name="en0").delete()
+        self.assertEqual(self.in_use(), ["10.0.0.0"])
+
+    def test_bulk(self):
+        NetworkInterface.objects.bulk_create(
+            [
+                NetworkInterface(
+                    computer=self.computer,
+                    name="en{0}".format(i),
+                    type="e",
+                    ip_address_id="10.0.0.{0}".format(i),
+                )
+                for i in range(2)
+            ]
+        )
+        self.assertEqual(self.in_use(), ["10.0.0.0", "10.0.0.1"])
+        NetworkInterface.objects.filter(name="en0").update(ip_address="10.0.0.2")
+        self.assertEqual(self.in_use(), ["10.0.0.1", "10.0.0.2"])
+
+    def test_reconcile(self):
+        NetworkInterface.objects.create(
+            computer=self.computer, name="en0", type="e", ip_address_id="10.0.0.0"
+        )
+        IPAddress.objects.all().update(in_use=True)
+        self.assertEqual(IPAddress.objects.in_use_wrong().count(), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(IPAddress.objects.update_in_use(), 2)
+        self.assertEqual(self.in_use(), ["10.0.0.0"])
+
+
+#######################################################################
+
+
+class IPAddressPackedTestCase(TestCase):
+    """
+    Check the numeric order of addresses, and network range queries.
+    """
+
+    def setUp(self):
+        IPAddress.objects.create(number="10.0.0.10", hostname="a")
+        IPAddress.objects.bulk_create(
+            [
+                IPAddress(number=number, hostname="b")
+                for number in ["10.0.0.9", "9.255.0.1", "130.179.27.255"]
+            ]
+        )
+        IPAddress.objects.create(number="130.179.28.0", hostname="c")
+        IPAddress.objects.create(number="2001:db8::1", hostname="d")
+
+    def numbers(self, queryset):
+        return list(queryset.values_list("number", flat=True))
+
+    def test_order(self):
+        self.assertEqual(
+            self.numbers(IPAddress.objects.by_number()),
+            [
+                "9.255.0.1",
+                "10.0.0.9",
+                "10.0.0.10",
+                "130.179.27.255",
+                "130.179.28.0",
+                "2001:db8::1",
+            ],
+        )
+
+    def test_in_network(self):
+        def in_network(cidr):
+            return self.numbers(IPAddress.objects.in_network(cidr).by_number())
+
+        self.assertEqual(in_network("10.0.0.0/8"), ["10.0.0.9", "10.0.0.10"])
+        self.assertEqual(in_network("130.179.24.0/22"), ["130.179.27.255"])
+        self.assertEqual(in_network("10.0.0.9/32"), ["10.0.0.9"])
+        self.assertEqual(in_network("2001:db8::/32"), ["2001:db8::1"])
+        with self.assertRaises(ValueError):
+            in_network("10.0.0.0/99")
+
+    def test_update(self):
+        IPAddress.objects.filter(number="10.0.0.9").update(number="10.0.0.99")
+        self.assertEqual(
+            self.numbers(IPAddress.objects.in_network("10.0.0.64/26")), ["10.0.0.99"]
+        )
+
+
+#######################################################################
+
+
+class AssetSyncTestCase(TestCase):
+    """
+    Check that computers and their assets are synchronized set-wise,
+    without the two sides saving each other.
+    """
+
+    def setUp(self):
+        self.person_id = make_related(Computer, "person").pk
+        self.room_id = make_related(Computer, "room").pk
+        self.computers = []
+        for i in range(5):
+            asset = Asset.objects.create(description="asset", serial_number=i)
+            self.computers.append(
+                Computer.objects.create(common_name="computer", asset=asset)
+            )
+
+    def test_computers_to_assets(self):
+        pks = [c.pk for c in self.computers]
+        Computer.objects.filter(pk__in=pks[:3]).update(
+            person_id=self.person_id, room_id=self.room_id
+        )
+        with self.assertNumQueries(2):
+            self.assertEqual(assetsync.computers_to_assets(pks), 3)
+        self.assertEqual(Asset.objects.filter(person_id=self.person_id).count(), 3)
+        self.assertEqual(Asset.objects.filter(room_id=self.room_id).count(), 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(assetsync.computers_to_assets(pks), 0)
+
+    def test_assets_to_computers(self):
+        shared = self.computers[0].asset
+        Computer.objects.filter(pk=self.computers[1].pk).update(asset=shared)
+        Asset.objects.update(person_id=self.person_id)
+        asset_pks = list(Asset.objects.values_list("pk", flat=True))
+        with self.assertNumQueries(2):
+            self.assertEqual(assetsync.assets_to_computers(asset_pks), 3)
+        # the shared asset has two computers, so neither is changed.
+        self.assertFalse(
+            Computer.objects.filter(asset=shared, person_id=self.person_id).exists()
+        )
+
+    def test_save(self):
+        computer = Computer.objects.select_related("asset").get(pk=self.computers[0].pk)
+        computer.person_id = self.person_id
+        # the update, finding the asset's values, and updating it; and
+        # building the (unchanged) search document.
+        with self.assertNumQueries(4):
+            computer.save()
+        self.assertEqual(computer.asset.person_id, self.person_id)
+        asset = Asset.objects.get(pk=computer.asset_id)
+        self.assertEqual(asset.person_id, self.person_id)
+        asset.save()  # nothing to do.
+        asset.person_id = None
+        asset.save()
+        self.assertIsNone(Computer.objects.get(pk=computer.pk).person_id)
+
+
+#######################################################################
+
+
+class BulkModeTestCase(TestCase):
+    """
+    Check that the signal handlers do their work once, at the end of
+    a bulk mode block.
+    """
+
+    def setUp(self):
+        for i in range(2):
+            IPAddress.objects.create(
+                number="10.0.0.{0}".format(i), hostname="host{0}".format(i)
+            )
+
+    def test_create(self):
+        Computer.objects.create(common_name="computer")
+        self.assertEqual(ComputerKey.objects.count(), 1)
+        with bulk_mode():
+            for i in range(4):
+                computer = Computer.objects.create(common_name="computer")
+                NetworkInterface.objects.create(
+                    computer=computer,
+                    name="en0",
+                    type="e",
+                    ip_address_id="10.0.0.{0}".format(i % 2),
+                )
+            self.assertEqual(ComputerKey.objects.count(), 1)
+            self.assertFalse(IPAddress.objects.filter(in_use=True).exists())
+        self.assertEqual(ComputerKey.objects.count(), 5)
+        self.assertEqual(IPAddress.objects.filter(in_use=True).count(), 2)
+
+    def test_reconcile_changed(self):
+        computer = Computer.objects.create(common_name="computer")
+        # a stale flag on an address nobody touches is left for the
+        # ipaddress_in_use command; the block fixes its own addresses.
+        IPAddress.objects.filter(number="10.0.0.1").update(in_use=True)
+        with bulk_mode():
+            NetworkInterface.objects.create(
+                computer=computer, name="en0", type="e", ip_address_id="10.0.0.0"
+            )
+        self.assertEqual(
+            list(
+                IPAddress.objects.filter(in_use=True)
+                .order_by("number")
+                .values_list("number", flat=True)
+            ),
+            ["10.0.0.0", "10.0.0.1"],
+        )
+        with bulk_mode():
+            NetworkInterface.objects.filter(name="en0").delete()
+        self.assertFalse(IPAddress.objects.get(number="10.0.0.0").in_use)
+
+    def test_rollback(self):
+        with bulk_mode():
+            try:
+                with bulk_mode():
+                    Computer.objects.create(common_name="gone")
+                    raise ValueError
+            except ValueError:
+                pass
+            Computer.objects.create(common_name="kept")
+        self.assertEqual(
+            list(ComputerKey.objects.values_list("computer__common_name", flat=True)),
+            ["kept"],
+        )
+
+
+#######################################################################
+
+
+class ComputerSearchTestCase(TestCase):
+    """
+    Check that computers are searched through their search documents,
+    which follow changes to the computer and its network interfaces.
+    """
+
+    def setUp(self):
+        self.computer = Computer.objects.create(common_name="Euler", hardware="iMac")
+        for i in range(3):
+            ip = IPAddress.objects.create(
+                number="10.0.1.{0}".format(i), hostname="host{0}.example.org".format(i)
+            )
+            NetworkInterface.objects.create(
+                computer=self.computer,
+                name="en{0}".format(i),
+                type="e",
+                mac_address="00:1a:2b:3c:4d:5{0}".format(i),
+                ip_address=ip,
+            )
+        Computer.objects.create(common_name="Gauss", hardware="PC")
+
+    def search(self, *terms):
+        return list(
+            Computer.objects.search(*terms).values_list("common_name", flat=True)
+        )
+
+    def test_search(self):
+        self.assertEqual(self.search("euler"), ["Euler"])
+        self.assertEqual(self.search("HOST2.example"), ["Euler"])
+        self.assertEqual(self.search("4d:51 imac"), ["Euler"])
+        self.assertEqual(self.search("10.0.1"), ["Euler"])
+        self.assertEqual(self.search("pc"), ["Gauss"])
+        self.assertEqual(self.search("euler", "pc"), [])
+        self.assertNotIn("JOIN", str(Computer.objects.search("euler").query))
+
+    def test_search_fields_filter(self):
+        def search(*terms):
+            qs = Computer.objects.all().search_fields_filter(terms)
+            self.assertNotIn("DISTINCT", str(qs.query))
+            return list(qs.values_list("common_name", flat=True))
+
+        self.assertEqual(search("euler"), ["Euler"])
+        self.assertEqual(search("host2.example", "imac"), ["Euler"])
+        self.assertEqual(search("10.0.1"), ["Euler"])
+        self.assertEqual(search("pc"), ["Gauss"])
+        self.assertEqual(search("host1", "pc"), [])
+
+    def test_search_query(self):
+        flag = ComputerFlag.objects.create(slug="lab", verbose_name="Lab")
+        self.computer.flags.add(flag)
+        Computer.objects.filter(common_name="Gauss").update(operating_system="Windows")
+
+        def search(*terms):
+            qs = Computer.objects.search_query(*terms)
+            return list(qs.values_list("common_name", flat=True))
+
+        self.assertEqual(search("ip:10.0.1.0/24"), ["Euler"])
+        self.assertEqual(search("ip:10.0.0.0/16"), ["Euler"])
+        self.assertEqual(search("ip:10.0.2.0/24"), [])
+        self.assertEqual(search("ip:10.0.1.2"), ["Euler"])
+        self.assertEqual(search("mac:4d:51"), ["Euler"])
+        self.assertEqual(search("flag:lab"), ["Euler"])
+        self.assertEqual(search("os:win"), ["Gauss"])
+        self.assertEqual(search("flag:lab imac"), ["Euler"])
+        self.assertEqual(search("flag:lab pc"), [])
+        self.assertEqual(search("euler"), ["Euler"])
+        # targeted filters only: no search of every field.
+        where = str(Computer.objects.search_query("os:win").query).split("WHERE")[1]
+        self.assertNotIn("search_text", where)
+        with self.assertRaises(ValueError):
+            search("ip:10.0.1.0/99")
+
+    def test_changes(self):
+        IPAddress.objects.filter(number="10.0.1.0").update(aliases="www")
+        self.assertEqual(self.search("www"), ["Euler"])
+        iface = NetworkInterface.objects.get(name="en0")
+        iface.computer = Computer.objects.get(common_name="Gauss")
+        iface.save()
+        self.assertEqual(self.search("host0"), ["Gauss"])
+        Computer.objects.filter(common_name="Gauss").update(common_name="Riemann")
+        self.assertEqual(self.search("riemann"), ["Riemann"])
+        NetworkInterface.objects.filter(name="en1").delete()
+        self.assertEqual(self.search("host1"), [])
+
+
+#######################################################################
+
+
+@override_settings(IT_MGMT_CONFIG={"search:memory_index": True})
+class ComputerSearchIndexTestCase(ComputerSearchTestCase):
+    """
+    The same searches, narrowed by the process-local index.
+    """
+
+    def setUp(self):
+        from mgmt_common import searchindex
+
+        searchindex._indexes.clear()
+        super(ComputerSearchIndexTestCase, self).setUp()
+
+    def test_candidates(self):
+        from mgmt_common import searchindex
+
+        euler = Computer.objects.get(common_name="Euler")
+        self.assertEqual(
+            searchindex.candidates(Computer, "default", ["4d:51"]), set([euler.pk])
+        )
+        self.assertEqual(
+            searchindex.candidates(Computer, "default", ["nothing"]), set()
+        )
+        self.assertIn("IN (", str(Computer.objects.search("euler").query))
+
+    def test_late_commit(self):
+        from mgmt_common import searchindex
+
+        index = searchindex.get(Computer, "default")
+        index.refresh()
+        # as if committed by another process, after the newest row read
+        # but modified (a little) before it.
+        Computer.objects.bulk_create(
+            [Computer(common_name="Noether", search_text="noether")]
+        )
+        Computer.objects.filter(common_name="Noether").update(
+            modified=index.modified - timedelta(seconds=1)
+        )
+        index.dirty = True
+        self.assertEqual(self.search("noether"), ["Noether"])
+
+
+#######################################################################
+
+
+class IPCacheTestCase(TransactionTestCase):
+    """
+    Check the cached client IP address -> computer resolution.
+    (Invalidation happens on commit.)
+    """
+
+    def setUp(self):
+        from . import ipcache
+
+        ipcache.invalidate()
+        self.computer = Computer.objects.create(common_name="computer 1")
+        self.ip = IPAddress.objects.create(number="10.0.0.5", hostname="host-5")
+        self.interface = NetworkInterface.objects.create(
+            computer=self.computer,
+            name="en0",
+            type="e",
+            mac_address="00:11:22:33:44:55",
+            ip_address=self.ip,
+        )
+
+    def test_cached(self):
+        from . import ipcache
+
+        self.assertEqual(ipcache.computer_pks("10.0.0.5"), [self.computer.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(ipcache.computer_pks("10.0.0.5"), [self.computer.pk])
+        self.assertEqual(ipcache.computer_pks("10.0.0.6"), [])
+        # misses are not cached: another process may add the interface.
+        with self.assertNumQueries(1):
+            self.assertEqual(ipcache.computer_pks("10.0.0.6"), [])
+
+    def test_invalidate(self):
+        from . import ipcache
+
+        self.assertEqual(ipcache.computer_pks("10.0.0.5"), [self.computer.pk])
+        self.interface.ip_address = None
+        self.interface.save()
+        self.assertEqual(ipcache.computer_pks("10.0.0.5"), [])
+        self.interface.ip_address = self.ip
+        self.interface.save()
+        self.assertEqual(ipcache.computer_pks("10.0.0.5"), [self.computer.pk])
+        self.interface.delete()
+        self.assertEqual(ipcache.computer_pks("10.0.0.5"), [])
+
+
+#######################################################################
+
+
+class ComputerSearchIPDeleteTestCase(TransactionTestCase):
+    """
+    Check that deleting an IP address refreshes the search documents
+    of its computers (on commit).
+    """
+
+    def test_delete(self):
+        computer = Computer.objects.create(common_name="computer 1")
+        ip = IPAddress.objects.create(number="10.0.0.5", hostname="doomed")
+        NetworkInterface.objects.create(
+            computer=computer, name="en0", type="e", ip_address=ip
+        )
+        self.assertEqual(list(Computer.objects.search("doomed")), [computer])
+        ip.delete()
+        self.assertEqual(list(Computer.objects.search("doomed")), [])
+        self.assertEqual(list(Computer.objects.search("computer")), [computer])
+
+
+#######################################################################
+
+
+class ConditionalTextTestCase(TestCase):
+    """
+    Check conditional requests on the computer text API.
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.computer = Computer.objects.create(common_name="computer 1", host_id="abc")
+        self.flag = ComputerFlag.objects.create(slug="lab", verbose_name="Lab")
+        self.computer.flags.add(self.flag)
+
+    def get(self, view_class, etag=None, **kwargs):
+        headers = {}
+        if etag is not None:
+            headers["HTTP_IF_NONE_MATCH"] = etag
+        request = self.factory.get("/", **headers)
+        return view_class.as_view()(request, host_id="abc", **kwargs)
+
+    def test_not_modified(self):
+        from .api.views import ComputerByHostIdFlags
+
+        response = self.get(ComputerByHostIdFlags)
+        self.assertEqual(response.content, b"lab")
+        with self.assertNumQueries(1):
+            response = self.get(ComputerByHostIdFlags, etag=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_flags_changed(self):
+        from .api.views import ComputerByHostIdFlags
+
+        etag = self.get(ComputerByHostIdFlags)["ETag"]
+        self.computer.flags.add(
+            ComputerFlag.objects.create(slug="staff", verbose_name="Staff")
+        )
+        response = self.get(ComputerByHostIdFlags, etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_client_id_changed(self):
+        from .api.views import ComputerByHostIdClientIdentifierList
+
+        etag = self.get(ComputerByHostIdClientIdentifierList)["ETag"]
+        ClientIdentifier.objects.create(computer=self.computer, key="a", value="1")
+        response = self.get(ComputerByHostIdClientIdentifierList, etag=etag)
+        self.assertEqual(response.content, b"a\t1")
+
+
+#######################################################################
+
+
+class RestQueryCountTestCase(TestCase):
+    """
+    Check that REST API lists take a fixed number of queries.
+    """
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        self.user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        self.flag = ComputerFlag.objects.create(slug="lab", verbose_name="Lab")
+
+    def add_computers(self, n):
+        for i in range(n):
+            computer = Computer.objects.create(common_name="computer")
+            computer.flags.add(self.flag)
+            NetworkInterface.objects.create(
+                computer=computer, name="en0", type="e", mac_address="00"
+            )
+            ClientIdentifier.objects.create(computer=computer, key="a", value="1")
+            WorkNote.objects.create(computer=computer, user=self.user, value="note")
+            Licence.objects.create(computer=computer, value="licence")
+
+    def list_queries(self, viewset, url="/"):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = viewset.as_view({"get": "list"})(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        self.response = response
+        return len(context.captured_queries)
+
+    def test_computer_list(self):
+        from .api.rest_v1.views import ComputerViewSet
+
+        self.add_computers(2)
+        queries = self.list_queries(ComputerViewSet)
+        self.add_computers(8)
+        self.assertEqual(self.list_queries(ComputerViewSet), queries)
+
+    def test_worknote_list(self):
+        from .api.rest_v1.views import WorkNoteViewSet
+
+        self.add_computers(2)
+        queries = self.list_queries(WorkNoteViewSet)
+        self.add_computers(8)
+        self.assertEqual(self.list_queries(WorkNoteViewSet), queries)
+
+    def test_sparse_computer_list(self):
+        from .api.rest_v1.views import ComputerViewSet
+
+        self.add_computers(3)
+        queries = self.list_queries(ComputerViewSet)
+        self.assertEqual(
+            self.list_queries(ComputerViewSet, "/?fields=host_id,common_name"), 1
+        )
+        self.assertEqual(
+            list(self.response.data["results"][0]), ["common_name", "host_id"]
+        )
+        self.assertEqual(
+            self.list_queries(ComputerViewSet, "/?fields=pk&expand=licence_set"), 2
+        )
+        self.assertEqual(
+            self.response.data["results"][0]["licence_set"], [{"value": "licence"}]
+        )
+        nested = "/?fields=networkinterface_set.mac_address"
+        self.assertLess(self.list_queries(ComputerViewSet, nested), queries)
+        self.assertEqual(
+            self.response.data["results"][0],
+            {"networkinterface_set": [{"mac_address": "00"}]},
+        )
+
+
+#######################################################################
+
+
+class RestListTestCase(TestCase):
+    """
+    Check REST API list pagination and streaming.
+    """
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        self.user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        for i in range(5):
+            Computer.objects.create(common_name="computer {0}".format(i))
+
+    def get(self, url):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        from .api.rest_v1.views import ComputerViewSet
+
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.user)
+        return ComputerViewSet.as_view({"get": "list"})(request)
+
+    def test_cursor_pages(self):
+        names = []
+        url = "/computers/?page_size=2"
+        while url:
+            response = self.get(url)
+            self.assertNotIn("count", response.data)
+            names.extend([c["common_name"] for c in response.data["results"]])
+            url = response.data["next"]
+        self.assertEqual(names, ["computer {0}".format(i) for i in range(5)])
+
+    def test_cursor_key(self):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from .api.rest_v1.pagination import ItMgmtCursorPagination
+
+        Computer.objects.update(created=now())
+        response = self.get("/computers/?page_size=2")
+        last = Computer.objects.get(
+            common_name=response.data["results"][-1]["common_name"]
+        )
+        request = Request(APIRequestFactory().get(response.data["next"]))
+        cursor = ItMgmtCursorPagination().decode_cursor(request)
+        self.assertEqual((cursor.offset, cursor.position), (0, "{0}".format(last.pk)))
+
+    def test_filtered_count(self):
+        response = self.get("/computers/?host_id=")
+        self.assertEqual(response.data["count"], 5)
+
+    def test_stream_ndjson(self):
+        import json
+
+        response = self.get("/computers/?stream=ndjson")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0])["common_name"], "computer 0")
+
+    def test_stream_txt(self):
+        response = self.get("/computers/?stream=txt")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertIn("\tcommon_name\tcomputer 4", lines)
+
+
+#######################################################################
+
+
+class PlainTextRendererTestCase(TestCase):
+    """
+    Check the tab delimited text renderer.
+    """
+
+    def render(self, data):
+        from .api.rest_v1.renderers import PlainTextRenderer
+
+        return PlainTextRenderer().render(data).decode("utf-8")
+
+    def test_scalars(self):
+        data = {
+            "name": "a\tb\nc\\d",
+            "size": 1.5,
+            "count": 3,
+            "managed": False,
+            "aliases": None,
+            "created": datetime(2020, 1, 2, 3, 4, 5),
+        }
+        self.assertEqual(
+            self.render(data),
+            "name\ta\\tb\\nc\\\\d\n"
+            "size\t1.5\n"
+            "count\t3\n"
+            "managed\tfalse\n"
+            "aliases\t\n"
+            "created\t2020-01-02T03:04:05\n",
+        )
+
+    def test_nested(self):
+        data = {"results": [{"key": "a", "value": "1"}], "next": None}
+        self.assertEqual(
+            self.render(data), "results\t\t\tkey\ta\n\t\t\tvalue\t1\nnext\t\n"
+        )
+
+    def test_generator(self):
+        from .api.rest_v1.renderers import PlainTextRenderer
+
+        rows = ({"pk": i} for i in range(3))
+        lines = PlainTextRenderer().render_lines(rows)
+        self.assertEqual(next(lines), "\tpk\t0\n")
+        self.assertEqual(len(list(lines)), 2)
+
+
+#######################################################################
+
+
+class RestFastListTestCase(TestCase):
+    """
+    Check that the values() fast path gives the serializers' output.
+    """
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        self.user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        ComputerFlag.objects.create(slug="lab", verbose_name="Lab")
+        for i in range(3):
+            ip = IPAddress.objects.create(
+                number="10.0.0.{0}".format(i), hostname="host{0}".format(i)
+            )
+            computer = Computer.objects.create(common_name="computer")
+            NetworkInterface.objects.create(
+                computer=computer,
+                name="en0",
+                type="e",
+                mac_address="0{0}".format(i),
+                ip_address=ip if i else None,
+            )
+
+    def content(self, viewset, url, fast_list):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = viewset.as_view({"get": "list"}, fast_list=fast_list)(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.content, len(context.captured_queries)
+
+    def assertSameContent(self, viewset, url="/"):
+        content, queries = self.content(viewset, url, True)
+        self.assertEqual(content, self.content(viewset, url, False)[0])
+        self.assertEqual(queries, 1)
+
+    def test_lists(self):
+        from .api.rest_v1.views import (
+            ComputerFlagViewSet,
+            IPAddressViewSet,
+            NetworkInterfaceViewSet,
+        )
+
+        self.assertSameContent(ComputerFlagViewSet)
+        self.assertSameContent(IPAddressViewSet, "/?page_size=2&ordering=-number")
+        self.assertSameContent(NetworkInterfaceViewSet)
+
+
+#######################################################################
+
+
+class RestBulkUpsertTestCase(TestCase):
+    """
+    Check bulk create/update of network interfaces and IP addresses.
+    """
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        self.user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        self.computer = Computer.objects.create(common_name="computer")
+        self.ip = IPAddress.objects.create(number="10.0.0.1", hostname="host1")
+
+    def bulk(self, viewset, method, data):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        request = getattr(APIRequestFactory(), method)("/", data, format="json")
+        force_authenticate(request, user=self.user)
+        return viewset.as_view({method: "bulk"})(request)
+
+    def interface_rows(self, ip_address):
+        from django.urls import reverse
+
+        computer = reverse("computer-detail", args=[self.computer.pk])
+        return [
+            {
+                "computer": computer,
+                "name": "en0",
+                "type": "e",
+                "mac_address": "00",
+                "ip_address": ip_address,
+            },
+            {"computer": computer, "name": "en1", "type": "w", "mac_address": "01"},
+        ]
+
+    def test_network_interfaces(self):
+        from django.urls import reverse
+
+        from .api.rest_v1.views import NetworkInterfaceViewSet
+
+        ip_url = reverse("ipaddress-detail", args=[self.ip.pk])
+        response = self.bulk(
+            NetworkInterfaceViewSet, "post", self.interface_rows(ip_url)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["status"] for r in response.data], ["created", "created"])
+        self.assertTrue(IPAddress.objects.get(pk=self.ip.pk).in_use)
+
+        response = self.bulk(NetworkInterfaceViewSet, "post", self.interface_rows(None))
+        self.assertEqual([r["status"] for r in response.data], ["updated", "updated"])
+        self.assertEqual(NetworkInterface.objects.count(), 2)
+        self.assertFalse(IPAddress.objects.get(pk=self.ip.pk).in_use)
+
+    def test_invalid(self):
+        from .api.rest_v1.views import NetworkInterfaceViewSet
+
+        rows = self.interface_rows(None)
+        rows[1]["name"] = "en0"
+        response = self.bulk(NetworkInterfaceViewSet, "post", rows)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("errors", response.data[1])
+        response = self.bulk(NetworkInterfaceViewSet, "patch", rows[:1])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(NetworkInterface.objects.count(), 0)
+
+    def test_ip_addresses(self):
+        from .api.rest_v1.views import IPAddressViewSet
+
+        rows = [
+            {"number": "10.0.0.1", "hostname": "renamed"},
+            {"number": "10.0.0.2", "hostname": "host2"},
+        ]
+        response = self.bulk(IPAddressViewSet, "post", rows)
+        self.assertEqual([r["status"] for r in response.data], ["updated", "created"])
+        self.assertEqual(
+            list(
+                IPAddress.objects.order_by("number").values_list("hostname", flat=True)
+            ),
+            ["renamed", "host2"],
+        )
+
+
+#######################################################################
+
+
+class RestFilterTestCase(TestCase):
+    """
+    Check REST API query filters and ordering.
+    """
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        self.user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        for i in range(4):
+            IPAddress.objects.create(
+                number="10.0.0.{0}".format(i),
+                hostname="host{0}.example.com".format(i),
+                in_use=bool(i % 2),
+            )
+
+    def get(self, url):
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        from .api.rest_v1.views import IPAddressViewSet
+
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.user)
+        return IPAddressViewSet.as_view({"get": "list"})(request)
+
+    def numbers(self, response):
+        return [ip["number"] for ip in response.data["results"]]
+
+    def test_operators(self):
+        response = self.get("/ip/?number__in=10.0.0.1,10.0.0.3&ordering=number")
+        self.assertEqual(self.numbers(response), ["10.0.0.1", "10.0.0.3"])
+        self.assertEqual(response.data["count"], 2)
+        response = self.get("/ip/?number=10.0.0.1&number=10.0.0.2&ordering=number")
+        self.assertEqual(self.numbers(response), ["10.0.0.1", "10.0.0.2"])
+        response = self.get("/ip/?hostname__prefix=host2")
+        self.assertEqual(self.numbers(response), ["10.0.0.2"])
+        response = self.get("/ip/?number__range=10.0.0.1,10.0.0.2&ordering=-number")
+        self.assertEqual(self.numbers(response), ["10.0.0.2", "10.0.0.1"])
+        response = self.get("/ip/?hostname__prefix=host&aliases__isnull=yes")
+        self.assertEqual(response.data["count"], 4)
+
+    def test_unindexed(self):
+        response = self.get("/ip/?in_use=1")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("in_use", response.data)
+        response = self.get("/ip/?hostname__prefix=host&in_use=1&ordering=number")
+        self.assertEqual(self.numbers(response), ["10.0.0.1", "10.0.0.3"])
+
+    def test_invalid(self):
+        self.assertEqual(self.get("/ip/?ordering=aliases").status_code, 400)
+        self.assertEqual(self.get("/ip/?number__range=10.0.0.1").status_code, 400)
+
+    def test_ignored(self):
+        response = self.get("/ip/?number__regex=.*&bogus=1")
+        self.assertEqual(len(self.numbers(response)), 4)
+        self.assertNotIn("count", response.data)
+
+    def test_query_plan(self):
+        from django.test import override_settings
+
+        with override_settings(DEBUG=True):
+            response = self.get("/ip/?hostname=host1.example.com")
+        self.assertIn("X-Query-Plan", response)
+        response = self.get("/ip/?hostname=host1.example.com")
+        self.assertNotIn("X-Query-Plan", response)
+
+
+#######################################################################
+
+
+class StatusLatestByKeyTestCase(TestCase):
+    """
+    Check that the latest status for each computer and key is found,
+    in a single query.
+    """
+
+    def setUp(self):
+        self.computer1 = Computer.objects.create(common_name="computer 1")
+        self.computer2 = Computer.objects.create(common_name="computer 2")
+        self.load = StatusKey.objects.create(slug="load", verbose_name="Load")
+        self.user = StatusKey.objects.create(slug="user", verbose_name="User")
+        for computer in [self.computer1, self.computer2]:
+            for key in [self.load, self.user]:
+                for i in range(3):
+                    status = Status.objects.create(
+                        computer=computer, key=key, value="{0}".format(i)
+                    )
+                    Status.objects.filter(pk=status.pk).update(
+                        created=now() - timedelta(hours=i)
+                    )
+
+    def test_single_computer(self):
+        with self.assertNumQueries(1):
+            result = list(self.computer1.status_set.latest_by_key())
+        self.assertEqual([s.key for s in result], [self.load, self.user])
+        self.assertEqual([s.value for s in result], ["0", "0"])
+
+    def test_key_slugs(self):
+        result = list(self.computer1.status_set.latest_by_key(["user", "missing"]))
+        self.assertEqual([s.key for s in result], [self.user])
+
+    def test_many_computers(self):
+        with self.assertNumQueries(1):
+            result = list(Status.objects.active().latest_by_key(["load"]))
+        self.assertEqual(
+            [(s.computer, s.value) for s in result],
+            [(self.computer1, "0"), (self.computer2, "0")],
+        )
+
+
+#######################################################################
+
+
+class CurrentStatusTestCase(TestCase):
+    """
+    Check that the current status table follows the status reports.
+    """
+
+    def setUp(self):
+        self.computer = Computer.objects.create(common_name="computer 1")
+        self.key = StatusKey.objects.create(slug="disk", verbose_name="Disk")
+
+    def test_new_report(self):
+        Status.objects.create(computer=self.computer, key=self.key, value="10")
+        status = Status.objects.create(computer=self.computer, key=self.key, value="20")
+        current = CurrentStatus.objects.get(computer=self.computer, key=self.key)
+        self.assertEqual(current.value, "20")
+        self.assertEqual(current.status, status)
+
+    def test_older_report(self):
+        Status.objects.create(computer=self.computer, key=self.key, value="20")
+        CurrentStatus.objects.record(
+            [
+                Status(
+                    pk=0,
+                    computer=self.computer,
+                    key=self.key,
+                    value="10",
+                    created=now() - timedelta(days=1),
+                )
+            ]
+        )
+        current = CurrentStatus.objects.get(computer=self.computer, key=self.key)
+        self.assertEqual(current.value, "20")
+
+    def test_rebuild(self):
+        Status.objects.create(computer=self.computer, key=self.key, value="10")
+        Status.objects.create(computer=self.computer, key=self.key, value="20")
+        CurrentStatus.objects.all().delete()
+        CurrentStatus.objects.rebuild(Status.objects.all())
+        self.assertEqual(
+            list(CurrentStatus.objects.values_list("value", flat=True)), ["20"]
+        )
+
+
+#######################################################################
+
+
+class StatusBulkReportTestCase(TestCase):
+    """
+    Check that batches of status reports are written set-wise.
+    """
+
+    def setUp(self):
+        self.computer1 = Computer.objects.create(common_name="computer 1")
+        self.computer2 = Computer.objects.create(common_name="computer 2")
+        self.key = StatusKey.objects.create(slug="disk", verbose_name="Disk")
+
+    def test_bulk_report(self):
+        reports = [
+            (self.computer1, {"disk": "10", "uptime": "3"}),
+            (self.computer2.pk, {"disk": "20"}),
+        ]
+        status_list = Status.objects.bulk_report(reports)
+        self.assertEqual(len(status_list), 3)
+        self.assertEqual(StatusKey.objects.get(slug="uptime").verbose_name, "uptime")
+        self.assertEqual(
+            list(
+                CurrentStatus.objects.filter(key=self.key).values_list(
+                    "computer", "value"
+                )
+            ),
+            [(self.computer1.pk, "10"), (self.computer2.pk, "20")],
+        )
+
+    def test_new_key_once(self):
+        keys = StatusKey.objects.get_or_create_slugs(["disk", "uptime"])
+        self.assertEqual(keys["disk"], self.key)
+        # the insert of a report which missed "uptime" in its SELECT, as
+        # a concurrent one would, creates no second key.
+        StatusKey.objects.bulk_create(
+            [StatusKey(slug="uptime", verbose_name="uptime")], ignore_conflicts=True
+        )
+        self.assertEqual(StatusKey.objects.filter(slug="uptime").count(), 1)
+
+    def test_query_count(self):
+        def count_queries(prefix, computers, n):
+            keys = dict([("{0}{1}".format(prefix, i), i) for i in range(n)])
+            Status.objects.bulk_create_from_dict(self.computer1, {prefix + "0": "x"})
+            with CaptureQueriesContext(connection) as ctx:
+                Status.objects.bulk_report([(c, keys) for c in computers])
+            return len(ctx.captured_queries)
+
+        few = count_queries("few", [self.computer1], 2)
+        many = count_queries("many", [self.computer1, self.computer2], 20)
+        self.assertEqual(few, many)
+
+    def test_key_validation(self):
+        from .api.rest_v1.serializers import StatusReportSerializer
+
+        def valid(statuses):
+            data = {"computer": self.computer1.pk, "statuses": statuses}
+            return StatusReportSerializer(data=data).is_valid()
+
+        self.assertTrue(valid({"disk": "10", "disk-free_2": "3"}))
+        self.assertFalse(valid({"not a slug": "1"}))
+        self.assertFalse(valid({"k" * 65: "1"}))
+        self.assertTrue(valid({"k" * 64: "1"}))
+
+    def test_retention(self):
+        from .retention import expire_statuses
+
+        for value in ["10", "20"]:
+            Status.objects.bulk_report([(self.computer1, {"disk": value})])
+        current = CurrentStatus.objects.get(computer=self.computer1, key=self.key)
+        self.assertIsNotNone(current.status_id)
+        expire_statuses(self.key, now() + timedelta(days=1), 100)
+        self.assertEqual(
+            list(Status.objects.filter(key=self.key).values_list("value", flat=True)),
+            ["20"],
+        )
+        self.assertEqual(CurrentStatus.objects.get(pk=current.pk).status.value, "20")
+
+
+#######################################################################
+
+
+class StatusTypedValuesTestCase(TestCase):
+    """
+    Check that statuses get typed values when they are written.
+    """
+
+    def setUp(self):
+        self.computer = Computer.objects.create(common_name="computer 1")
+        self.load = StatusKey.objects.create(
+            slug="load", verbose_name="Load", data_type="f"
+        )
+        self.boot = StatusKey.objects.create(
+            slug="boot", verbose_name="Boot", data_type="dt"
+        )
+
+    def test_data_type_format(self):
+        self.assertEqual(self.load.data_type_format("1.5"), 1.5)
+        self.assertEqual(self.load.data_type_format("high"), "high")
+
+    def test_create(self):
+        status = Status.objects.create(computer=self.computer, key=self.load, value="2")
+        self.assertEqual(status.value_number, 2.0)
+        self.assertIsNone(status.value_datetime)
+
+    def test_bulk_report(self):
+        Status.objects.bulk_report(
+            [(self.computer, {"load": "0.5", "boot": "2020-01-02T03:04:05Z"})]
+        )
+        self.assertEqual(Status.objects.get(key=self.load).value_number, 0.5)
+        self.assertEqual(Status.objects.get(key=self.boot).value_datetime.year, 2020)
+
+    def test_columns(self):
+        for value in ["1", "2", "x"]:
+            Status.objects.create(computer=self.computer, key=self.load, value=value)
+        columns = Status.objects.filter(key=self.load).order_by("pk").columns()
+        self.assertEqual(list(columns["computer"]), [self.computer.pk] * 3)
+        self.assertEqual(list(columns["value_number"])[:2], [1.0, 2.0])
+        self.assertEqual(len(columns["created"]), 3)
+
+
+#######################################################################
+
+
+class StatusSeriesTestCase(TestCase):
+    """
+    Check the bucketed time series of status values.
+    """
+
+    def setUp(self):
+        self.computer = Computer.objects.create(common_name="computer 1")
+        self.key = StatusKey.objects.create(
+            slug="load", verbose_name="Load", data_type="f"
+        )
+        self.hour = now().replace(minute=0, second=0, microsecond=0)
+        for minutes, value in [(0, "1"), (20, "3"), (70, "5")]:
+            status = Status.objects.create(
+                computer=self.computer, key=self.key, value=value
+            )
+            Status.objects.filter(pk=status.pk).update(
+                created=self.hour - timedelta(hours=2, minutes=-minutes)
+            )
+
+    def test_hourly(self):
+        from .series import status_series
+
+        rows = list(
+            status_series([self.key], self.hour - timedelta(days=1), now(), "hour")
+        )
+        self.assertEqual([r["count"] for r in rows], [2, 1])
+        self.assertEqual([r["average"] for r in rows], [2, 5])
+
+    def test_merge_aggregates(self):
+        from .series import status_series
+
+        StatusAggregate.objects.create(
+            computer=self.computer,
+            key=self.key,
+            period="h",
+            start=self.hour - timedelta(hours=2),
+            count=2,
+            minimum=0,
+            maximum=10,
+            total=10,
+        )
+        rows = list(
+            status_series([self.key], self.hour - timedelta(days=1), now(), "hour")
+        )
+        self.assertEqual([r["count"] for r in rows], [4, 1])
+        self.assertEqual(rows[0]["minimum"], 0)
+        self.assertEqual(rows[0]["maximum"], 10)
+
+
+#######################################################################
+
+
+class StatusRetentionTestCase(TestCase):
+    """
+    Check that old volatile statuses are rolled up into aggregates.
+    """
+
+    def setUp(self):
+        self.computer = Computer.objects.create(common_name="computer 1")
+        self.key = StatusKey.objects.create(
+            slug="load", verbose_name="Load", volatile=True, data_type="f"
+        )
+        self.old = now() - timedelta(days=60)
+        for value in ["1", "2", "6"]:
+            status = Status.objects.create(
+                computer=self.computer, key=self.key, value=value
+            )
+            Status.objects.filter(pk=status.pk).update(created=self.old)
+        self.current = Status.objects.create(
+            computer=self.computer, key=self.key, value="5"
+        )
+
+    def test_apply_retention(self):
+        from .retention import apply_retention
+
+        statuses, hourly = apply_retention(days=30)
+        self.assertEqual(statuses, 3)
+        self.assertEqual(list(Status.objects.all()), [self.current])
+        aggregate = StatusAggregate.objects.hourly().get()
+        self.assertEqual(aggregate.count, 3)
+        self.assertEqual(aggregate.minimum, 1)
+        self.assertEqual(aggregate.maximum, 6)
+        self.assertEqual(aggregate.average, 3)
+
+    def test_keep_current(self):
+        from .retention import apply_retention
+
+        Status.objects.filter(pk=self.current.pk).update(created=self.old)
+        apply_retention(days=30)
+        self.assertEqual(list(Status.objects.all()), [self.current])
+
+
+#######################################################################
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Check that the hot lookup queries use their indexes.
+    """
+
+    def setUp(self):
+        if connection.vendor not in ["sqlite", "postgresql"]:
+            self.skipTest("query plans are only checked on SQLite and PostgreSQL")
+        if connection.vendor == "postgresql":
+            # the test tables are too small for the planner to use indexes.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        self.computer = Computer.objects.create(common_name="computer 1")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_status_series(self):
+        self.assertUsesIndex(
+            Status.objects.filter(computer=self.computer, key=1).order_by("-created"),
+            "it_mgmt_status_series_idx",
+        )
+
+    def test_computer_host_id(self):
+        self.assertUsesIndex(
+            Computer.objects.filter(host_id="abc"), "it_mgmt_computer_host_id"
+        )
+
+    def test_computer_by_ip_address(self):
+        self.assertUsesIndex(
+            Computer.objects.filter(networkinterface__ip_address__number="10.0.0.1"),
+            "it_mgmt_networkinterface_ip_address_id",
+        )
+
+    def test_networkinterface_mac_address(self):
+        self.assertUsesIndex(
+            NetworkInterface.objects.filter(mac_address="00:11:22:33:44:55"),
+            "it_mgmt_netif_mac_idx",
+        )
+
+    def test_networkinterface_primary(self):
+        self.assertUsesIndex(
+            self.computer.networkinterface_set.primary(), "it_mgmt_netif_primary_idx"
+        )
@@ -0,0 +1,61 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from netaddr import INET_PTON, AddrFormatError, IPAddress, IPNetwork
+
+#######################
+"""
+Sortable numeric representations of IP addresses.
+
+An address is packed as 32 hexadecimal digits of its 128 bit value,
+with IPv4 addresses mapped into IPv6 (::ffff:a.b.c.d), so that packed
+values sort (and compare, as text) in numeric order for both versions,
+and a network is a contiguous range of them.
+"""
+######################################################################
+
+PACKED_LENGTH = 32
+IPV4_MAPPED = 0xFFFF00000000
+
+######################################################################
+
+
+def _pack_int(value, version):
+    if version == 4:
+        value += IPV4_MAPPED
+    return "{0:0{1}x}".format(value, PACKED_LENGTH)
+
+
+def pack(number):
+    """
+    pack(number) -> <string>
+
+    The packed form of the address ``number`` (e.g., "130.179.24.1"),
+    or "" if it is not an address.
+    """
+    try:
+        address = IPAddress("{}".format(number), flags=INET_PTON)
+    except (AddrFormatError, ValueError, TypeError):
+        return ""
+    return _pack_int(int(address), address.version)
+
+
+def network_range(cidr):
+    """
+    network_range(cidr) -> (first, last)
+
+    The packed forms of the first and last addresses of the network
+    ``cidr`` (e.g., "130.179.24.0/22").  Raises ValueError for anything
+    which is not a network.
+    """
+    try:
+        network = IPNetwork("{}".format(cidr))
+    except (AddrFormatError, ValueError, TypeError) as e:
+        raise ValueError("Invalid network {0!r}: {1}".format(cidr, e))
+    return (
+        _pack_int(network.first, network.version),
+        _pack_int(network.last, network.version),
+    )
+
+
+######################################################################
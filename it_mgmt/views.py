@@ -17,7 +17,7 @@ from django.views.generic.detail import DetailView
 from django.views.generic.list import ListView
 from office_mgmt.models import Asset
 
-from .models import Computer, NetworkInterface, Status
+from .models import Computer, CurrentStatus, NetworkInterface
 
 #######################
 
@@ -30,7 +30,7 @@ logger = logging.getLogger(__name__)
 
 
 class ComputerStatusMixin(object):
-    queryset = Status.objects.active().computers()
+    queryset = CurrentStatus.objects.active().computers()
 
     def get_template_names(self):
         names = super(ComputerStatusMixin, self).get_template_names()
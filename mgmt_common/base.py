@@ -2,10 +2,15 @@
 from __future__ import print_function, unicode_literals
 
 import operator
+from collections import OrderedDict
 from functools import reduce
 
 from django.core.exceptions import ImproperlyConfigured
-from django.db import models
+from django.db import models, transaction
+from django.db.models.constants import LOOKUP_SEP
+
+from . import search as search_documents
+from . import searchindex
 
 #######################
 """
@@ -52,6 +57,37 @@ class MgmtBaseQuerySet(models.query.QuerySet):
         if len(terms) == 1:
             terms = terms[0].split()
 
+        qs = self.filter(active=True)
+        if search_documents.usable(self.model, self.search_fields):
+            # one column, rather than joins (see mgmt_common.search).
+            pks = None
+            if self.use_search_index():
+                pks = searchindex.candidates(self.model, self.db, terms)
+            if pks is not None:
+                qs = qs.filter(pk__in=pks)
+                for bit in terms:
+                    qs = qs.filter(search_text__contains=bit.lower())
+                return qs
+            for bit in terms:
+                qs = search_documents.filter_term(qs, bit)
+            return qs
+        return qs.search_fields_filter(terms)
+
+    def search_fields_filter(self, terms):
+        """
+        Restrict to the objects which match each of ``terms`` in at least
+        one of the search_fields, without a search document: what
+        ``search()`` does for a model with no ``search_text`` field, or
+        with prefixed search_fields (see mgmt_common.search.usable).
+        (Computer, the one model with multi-valued search_fields, has a
+        search document, so its searches do not come here.)
+
+        Search fields reached through a multi-valued relation (e.g.,
+        "networkinterface__...") are grouped into one ``pk__in``
+        subquery per relation and term, rather than joined: the outer
+        query then has one row per object, and needs no DISTINCT.
+        """
+
         def construct_search(field_name):
             if field_name.startswith("^"):
                 return "%s__istartswith" % field_name[1:]
@@ -62,16 +98,90 @@ class MgmtBaseQuerySet(models.query.QuerySet):
             else:
                 return "%s__icontains" % field_name
 
-        qs = self.filter(active=True)
         orm_lookups = [
             construct_search("{}".format(search_field))
             for search_field in self.search_fields
         ]
+        local_lookups, related_lookups = self._split_lookups(orm_lookups)
+        qs = self
         for bit in terms:
-            or_queries = [models.Q(**{orm_lookup: bit}) for orm_lookup in orm_lookups]
+            or_queries = [models.Q(**{orm_lookup: bit}) for orm_lookup in local_lookups]
+            for name, lookups in related_lookups.items():
+                or_queries.append(self._related_search(name, lookups, bit))
             qs = qs.filter(reduce(operator.or_, or_queries))
+        return qs
 
-        return qs.distinct()
+    def _split_lookups(self, orm_lookups):
+        """
+        Split ``orm_lookups`` into a list of those which do not
+        multiply rows, and a dictionary mapping each multi-valued
+        relation to the lookups through it.
+        """
+        local_lookups = []
+        related_lookups = OrderedDict()
+        for orm_lookup in orm_lookups:
+            name = orm_lookup.split(LOOKUP_SEP, 1)[0]
+            field = self.model._meta.get_field(name)
+            if field.one_to_many or field.many_to_many:
+                related_lookups.setdefault(name, []).append(orm_lookup)
+            else:
+                local_lookups.append(orm_lookup)
+        return local_lookups, related_lookups
+
+    def _related_search(self, name, lookups, bit):
+        """
+        A Q object for ``pk__in`` the objects with a ``name`` related
+        object matching any of ``lookups``.
+        """
+        field = self.model._meta.get_field(name)
+        if isinstance(field, models.ManyToOneRel):
+            # straight from the related table, by its foreign key.
+            prefix = name + LOOKUP_SEP
+            or_queries = [
+                models.Q(**{lookup[len(prefix) :]: bit}) for lookup in lookups
+            ]
+            subquery = field.related_model._base_manager.filter(
+                reduce(operator.or_, or_queries)
+            ).values(field.field.attname)
+            return models.Q(
+                **{"{0}__in".format(field.field.target_field.attname): subquery}
+            )
+        or_queries = [models.Q(**{lookup: bit}) for lookup in lookups]
+        subquery = self.model._base_manager.filter(
+            reduce(operator.or_, or_queries)
+        ).values("pk")
+        return models.Q(pk__in=subquery)
+
+    def use_search_index(self):
+        """
+        Should ``search()`` narrow its query with the process-local
+        index (see mgmt_common.searchindex)?  Override to enable.
+        """
+        return False
+
+    def update_search_text(self):
+        """
+        Refresh the search documents (see mgmt_common.search) of these
+        objects.  Returns the number changed.
+        """
+        return search_documents.refresh(self, self.search_fields)
+
+    def update(self, **kwargs):
+        """
+        As for QuerySet.update(), refreshing the search documents of
+        the objects when a search field is changed.
+        """
+        local_fields = set()
+        if search_documents.supports(self.model):
+            search_fields = getattr(self, "search_fields", [])
+            local_fields = search_documents.local_fields(self.model, search_fields)
+        if not set(kwargs) & local_fields:
+            return super(MgmtBaseQuerySet, self).update(**kwargs)
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list("pk", flat=True))
+            rows = super(MgmtBaseQuerySet, self).update(**kwargs)
+            search_documents.changed(self.model, pks)
+        return rows
 
 
 #######################################################################
@@ -109,8 +219,16 @@ class MgmtBaseManager(models.Manager):
 class MgmtBaseModel(models.Model):
     """
     An abstract base class.
+
+    The foreign key values of an object (and those of the fields named
+    in ``tracked_fields``) are remembered as they were when it was
+    loaded from (or last saved to) the database, so that signal handlers
+    can tell what changed without a query; see ``saved_value()``.
     """
 
+    # the names of other fields whose saved values are remembered.
+    tracked_fields = ()
+
     active = models.BooleanField(default=True)
     created = models.DateTimeField(
         auto_now_add=True, editable=False, verbose_name="creation time"
@@ -122,6 +240,70 @@ class MgmtBaseModel(models.Model):
     class Meta:
         abstract = True
 
+    @classmethod
+    def _tracked_attnames(cls):
+        # computed once per model class.
+        if "_tracked_attnames_cache" not in cls.__dict__:
+            cls._tracked_attnames_cache = tuple(
+                [
+                    f.attname
+                    for f in cls._meta.concrete_fields
+                    if f.many_to_one or f.one_to_one or f.name in cls.tracked_fields
+                ]
+            )
+        return cls._tracked_attnames_cache
+
+    def _track(self, attnames=None):
+        """
+        Remember the current values of the tracked fields ``attnames``
+        (default: all of them) as saved.
+        """
+        tracked = self._tracked_attnames()
+        saved = getattr(self, "_saved_values", None)
+        if saved is None:
+            saved = (models.DEFERRED,) * len(tracked)
+        # a tuple (rather than a dictionary) for each loaded object.
+        self._saved_values = tuple(
+            [
+                self.__dict__.get(attname, models.DEFERRED)
+                if attnames is None or attname in attnames
+                else value
+                for attname, value in zip(tracked, saved)
+            ]
+        )
+
+    def saved_value(self, attname):
+        """
+        Return the value of the foreign key or tracked field ``attname``
+        (e.g., ``"computer_id"``) when this object was loaded from or last saved
+        to the database; or ``models.DEFERRED`` when that is not known
+        (e.g., the object has never been saved, or the field was deferred).
+        """
+        saved = getattr(self, "_saved_values", None)
+        tracked = self._tracked_attnames()
+        if saved is None or attname not in tracked:
+            return models.DEFERRED
+        return saved[tracked.index(attname)]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(MgmtBaseModel, cls).from_db(db, field_names, values)
+        instance._track()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super(MgmtBaseModel, self).refresh_from_db(using=using, fields=fields)
+        if fields is not None:
+            fields = [self._meta.get_field(f).attname for f in fields]
+        self._track(fields)
+
+    def save(self, *args, **kwargs):
+        super(MgmtBaseModel, self).save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = [self._meta.get_field(f).attname for f in update_fields]
+        self._track(update_fields)
+
 
 #######################################################################
 #######################################################################
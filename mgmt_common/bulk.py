@@ -0,0 +1,113 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import ContextDecorator
+
+from django.db import transaction
+
+#######################
+"""
+Bulk mode: defer the work of per-row signal handlers, and do it
+set-wise once a block of saves is finished.
+
+    with bulk_mode():
+        for row in rows:
+            Computer.objects.create(**row)
+
+A handler which supports this calls ``defer()`` and returns when it
+answers True; the deferred functions run once, in the order they were
+first deferred, when the outermost bulk mode block exits.  The block
+is atomic: when it raises, the deferred work is dropped along with the
+saves.  Deferred functions should only assume that the items they are
+given *were* saved (a nested block may have rolled them back).
+
+``bulk_mode`` also works as a decorator.
+"""
+#######################################################################
+
+_state = threading.local()
+
+#######################################################################
+
+
+def _stack():
+    if not hasattr(_state, "stack"):
+        _state.stack = []
+        _state.pending = OrderedDict()
+    return _state.stack
+
+
+def active():
+    """
+    Is bulk mode on in this thread?
+    """
+    return bool(_stack())
+
+
+def defer(func, items=None):
+    """
+    If bulk mode is on, note that ``func`` should be called at the end
+    of the block, and return True; otherwise return False.
+
+    With ``items`` (an iterable), ``func`` is called once with the set
+    of all the items deferred for it; otherwise it is called with no
+    arguments.
+    """
+    if not active():
+        return False
+    pending = _state.pending.setdefault(func, None)
+    if items is not None:
+        if pending is None:
+            pending = _state.pending[func] = set()
+        pending.update(items)
+    return True
+
+
+def _run_pending():
+    # deferred functions may save things themselves; with the stack
+    # empty that is done directly.
+    while _state.pending:
+        func, items = _state.pending.popitem(last=False)
+        if items is None:
+            func()
+        else:
+            func(items)
+
+
+#######################################################################
+
+
+class bulk_mode(ContextDecorator):
+    """
+    Defer supporting signal handlers until the end of the block (see
+    the module documentation).
+    """
+
+    def __init__(self, using=None):
+        self.using = using
+
+    def __enter__(self):
+        atomic = transaction.atomic(using=self.using)
+        atomic.__enter__()
+        _stack().append(atomic)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        atomic = _stack().pop()
+        outermost = not _stack()
+        try:
+            if exc_type is None and outermost:
+                _run_pending()
+        except Exception:
+            _state.pending.clear()
+            atomic.__exit__(*sys.exc_info())
+            raise
+        if outermost:
+            _state.pending.clear()
+        return atomic.__exit__(exc_type, exc_value, traceback)
+
+
+#######################################################################
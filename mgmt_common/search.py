@@ -0,0 +1,317 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.migrations.operations.base import Operation
+from django.utils.timezone import now
+
+from . import bulk, searchindex
+
+#######################
+"""
+Search documents for ``MgmtBaseQuerySet.search()``.
+
+A model with a ``search_text`` field keeps a lower-cased copy of the
+values of its QuerySet's ``search_fields`` there, one value per line,
+including those reached through relations.  ``search()`` then matches
+each term against that one column: no joins, and no DISTINCT.
+
+How a term is matched depends on the database:
+
+* PostgreSQL: ``LIKE`` on search_text, which a pg_trgm GIN index serves.
+* SQLite: ``MATCH`` on an FTS5 table using the trigram tokenizer (for
+  terms of three or more characters), which triggers keep in step with
+  search_text.
+* Anything else, or when those are missing: ``LIKE`` on search_text.
+
+The indexes are made by the ``SearchIndex`` migration operation.  (A
+later SQLite migration which rebuilds the table drops the triggers;
+searching then falls back to ``LIKE`` until ``SearchIndex`` is run
+again.)
+
+Documents are refreshed on save by ``search_text_post_save`` (and for
+related records, by handlers which call ``changed()``), and by
+``MgmtBaseQuerySet.update()``.
+"""
+#######################################################################
+
+SEPARATOR = "\n"
+PREFIXES = "^=@"
+# the trigram tokenizer cannot match shorter terms.
+MIN_TRIGRAM_LENGTH = 3
+# (alias, database name) -> the FTS5 tables present.
+_fts_tables = {}
+
+#######################################################################
+
+
+def supports(model):
+    """
+    Does ``model`` have a search document?
+    """
+    try:
+        model._meta.get_field("search_text")
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def usable(model, search_fields):
+    """
+    Can ``search()`` use the search document for these ``search_fields``?
+    Not if any of them asks for a particular kind of match (e.g., "^name").
+    """
+    if not supports(model):
+        return False
+    return not [f for f in search_fields if f[:1] in PREFIXES]
+
+
+def local_fields(model, search_fields):
+    """
+    The attnames of the ``search_fields`` which are on ``model`` itself.
+    """
+    result = set()
+    for name in search_fields:
+        if "__" not in name:
+            field = model._meta.get_field(name)
+            result.update([field.name, field.attname])
+    return result
+
+
+#######################################################################
+
+
+def documents(queryset, search_fields):
+    """
+    Return a dictionary mapping the pks of ``queryset`` to pairs
+    (current search_text, new search_text).
+    """
+    rows = queryset.order_by().values_list("pk", "search_text", *search_fields)
+    values = {}
+    current = {}
+    for row in rows:
+        pk = row[0]
+        current[pk] = row[1]
+        doc = values.setdefault(pk, [])
+        for value in row[2:]:
+            if value is None:
+                continue
+            value = "{}".format(value).lower().strip()
+            if value and value not in doc:
+                doc.append(value)
+    return dict(
+        [(pk, (current[pk], SEPARATOR.join(doc))) for pk, doc in values.items()]
+    )
+
+
+def refresh(queryset, search_fields):
+    """
+    Bring the search documents of ``queryset`` up to date, with one
+    query to build them and one ``bulk_update()`` for those changed.
+    Returns the number changed.
+    """
+    model = queryset.model
+    modified = now()
+    objs = []
+    for pk, (current, doc) in documents(queryset, search_fields).items():
+        if doc != current:
+            objs.append(model(pk=pk, search_text=doc, modified=modified))
+    if objs:
+        # (the modification time is what searchindex refreshes from.)
+        model._base_manager.db_manager(queryset.db).bulk_update(
+            objs, ["search_text", "modified"], batch_size=1000
+        )
+        searchindex.changed(model, queryset.db)
+    return len(objs)
+
+
+def _refresh_pending(items):
+    by_model = {}
+    for label, pk in items:
+        by_model.setdefault(label, set()).add(pk)
+    for label, pks in by_model.items():
+        model = apps.get_model(label)
+        model._default_manager.filter(pk__in=pks).update_search_text()
+
+
+def changed(model, pks):
+    """
+    Refresh the search documents of the ``model`` objects ``pks``; at
+    the end of the block, in bulk mode.
+    """
+    pks = set(pks) - set([None])
+    if not pks:
+        return
+    if bulk.defer(_refresh_pending, [(model._meta.label, pk) for pk in pks]):
+        return
+    model._default_manager.filter(pk__in=pks).update_search_text()
+
+
+def search_text_post_save(sender, instance, raw, **kwargs):
+    """
+    Refresh the search document of a saved object.
+
+    This signal handler can be registered for any model which has a
+    ``search_text`` field.
+    """
+    if raw:
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None:
+        search_fields = sender._default_manager.get_queryset().search_fields
+        if not set(update_fields) & local_fields(sender, search_fields):
+            return
+    changed(sender, [instance.pk])
+
+
+#######################################################################
+
+
+def _fts_table(model):
+    return "{0}_search".format(model._meta.db_table)
+
+
+def _has_fts(model, connection):
+    key = (connection.alias, connection.settings_dict["NAME"])
+    if key not in _fts_tables:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tbl_name FROM sqlite_master WHERE type = 'trigger' "
+                "AND name LIKE '%_search_au'"
+            )
+            _fts_tables[key] = set([row[0] for row in cursor.fetchall()])
+    return model._meta.db_table in _fts_tables[key]
+
+
+def filter_term(queryset, term):
+    """
+    Restrict ``queryset`` to the objects whose search document
+    contains ``term``.
+    """
+    term = term.lower()
+    connection = connections[queryset.db]
+    if (
+        connection.vendor == "sqlite"
+        and len(term) >= MIN_TRIGRAM_LENGTH
+        and _has_fts(queryset.model, connection)
+    ):
+        qn = connection.ops.quote_name
+        meta = queryset.model._meta
+        # (not pk__in=RawSQL(...): SQLite reads "IN ((SELECT ...))" as
+        # a list holding only the first row.)
+        where = "{0}.{1} IN (SELECT rowid FROM {2} WHERE {2} MATCH %s)".format(
+            qn(meta.db_table), qn(meta.pk.column), qn(_fts_table(queryset.model))
+        )
+        phrase = '"{0}"'.format(term.replace('"', '""'))
+        return queryset.extra(where=[where], params=[phrase])
+    return queryset.filter(search_text__contains=term)
+
+
+#######################################################################
+
+
+def _sqlite_has_trigram(connection):
+    if connection.Database.sqlite_version_info < (3, 34, 0):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return "ENABLE_FTS5" in [row[0] for row in cursor.fetchall()]
+
+
+_SQLITE_INSERT = (
+    "INSERT INTO {fts}(rowid, search_text) VALUES (new.{pk}, new.search_text);"
+)
+_SQLITE_DELETE = (
+    "INSERT INTO {fts}({fts}, rowid, search_text) "
+    "VALUES ('delete', old.{pk}, old.search_text);"
+)
+SQLITE_INDEX = [
+    "CREATE VIRTUAL TABLE {fts} USING fts5(search_text, content={table}, "
+    "content_rowid={pk}, tokenize='trigram')",
+    "CREATE TRIGGER {ai} AFTER INSERT ON {table} BEGIN " + _SQLITE_INSERT + " END",
+    "CREATE TRIGGER {ad} AFTER DELETE ON {table} BEGIN " + _SQLITE_DELETE + " END",
+    "CREATE TRIGGER {au} AFTER UPDATE OF search_text ON {table} BEGIN "
+    + _SQLITE_DELETE
+    + _SQLITE_INSERT
+    + " END",
+    "INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+]
+SQLITE_DROP_INDEX = [
+    "DROP TRIGGER IF EXISTS {ai}",
+    "DROP TRIGGER IF EXISTS {ad}",
+    "DROP TRIGGER IF EXISTS {au}",
+    "DROP TABLE IF EXISTS {fts}",
+]
+POSTGRESQL_INDEX = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX {index} ON {table} USING gin (search_text gin_trgm_ops)",
+]
+POSTGRESQL_DROP_INDEX = ["DROP INDEX IF EXISTS {index}"]
+
+
+def _index_sql(connection, model, create):
+    """
+    The statements which create (or drop) the search index of ``model``.
+    """
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    values = {
+        "table": qn(table),
+        "pk": qn(model._meta.pk.column),
+        "fts": qn(_fts_table(model)),
+        "index": qn("{0}_search_trgm".format(table)),
+    }
+    for name in ["ai", "ad", "au"]:
+        values[name] = qn("{0}_search_{1}".format(table, name))
+    if connection.vendor == "postgresql":
+        statements = POSTGRESQL_INDEX if create else POSTGRESQL_DROP_INDEX
+    elif connection.vendor == "sqlite":
+        statements = SQLITE_DROP_INDEX
+        if create:
+            statements = SQLITE_INDEX if _sqlite_has_trigram(connection) else []
+    else:
+        statements = []
+    return [sql.format(**values) for sql in statements]
+
+
+class SearchIndex(Operation):
+    """
+    A migration operation which creates the search index for a model
+    with a ``search_text`` field (see above); it does nothing on
+    databases with no suitable index.
+    """
+
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [self.model_name], {})
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _execute(self, app_label, schema_editor, state, create):
+        model = state.apps.get_model(app_label, self.model_name)
+        connection = schema_editor.connection
+        if not self.allow_migrate_model(connection.alias, model):
+            return
+        for sql in _index_sql(connection, model, create):
+            schema_editor.execute(sql, params=None)
+        _fts_tables.clear()
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(app_label, schema_editor, to_state, True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(app_label, schema_editor, from_state, False)
+
+    def describe(self):
+        return "Create the search index for {0}".format(self.model_name)
+
+
+#######################################################################
@@ -0,0 +1,225 @@
+#######################
+from __future__ import print_function, unicode_literals
+
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import timedelta
+
+#######################
+"""
+A process-local inverted index over search documents (see
+mgmt_common.search), for databases which have no index of their own
+that can serve ``search()``.
+
+Documents are split into tokens (names, hardware, each part of MAC and
+IP addresses, host names, aliases, serial numbers, ...).  A search term
+is split the same way; each part gives the objects with a token that
+contains it, and the objects matching every part of every term are the
+candidates.  ``search()`` then checks the candidates with a single
+``pk__in`` query, so the index may give too many candidates, never too
+few.
+
+The index is built the first time it is needed, from one query.  Rows
+modified since are read back at most every REFRESH_SECONDS, or at the
+next search after a document is changed in this process.  Another
+process may commit a row with an earlier modification time than rows
+already read, so each refresh reads back OVERLAP_SECONDS before the
+latest time seen; a transaction which takes longer than that to commit
+is only seen when the index is rebuilt.  Postings are only ever added,
+so old tokens of changed documents linger until the index is rebuilt,
+every REBUILD_SECONDS.
+"""
+#######################################################################
+
+REFRESH_SECONDS = 5
+REBUILD_SECONDS = 3600
+OVERLAP_SECONDS = 60
+# larger candidate sets are left to the database.
+MAX_CANDIDATES = 900
+# parts contained in more tokens are not used to narrow a search.
+MAX_TOKENS = 1000
+# shorter parts of a term are only looked up when it has no others.
+MIN_PART_LENGTH = 2
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_lock = threading.Lock()
+_indexes = {}  # (model label, database alias) -> MemoryIndex
+
+#######################################################################
+
+
+def tokens(text):
+    """
+    The distinct tokens of a (lower-cased) document or search term.
+    """
+    return set(TOKEN_RE.findall(text.lower()))
+
+
+#######################################################################
+
+
+class MemoryIndex(object):
+    """
+    An inverted index of the search documents of one model.
+    """
+
+    def __init__(self, model, using):
+        self.model = model
+        self.using = using
+        self.lock = threading.Lock()
+        self.built = None
+        self.dirty = False
+
+    def _reset(self):
+        self.token_ids = {}  # token -> position in postings
+        self.postings = []  # arrays of pks
+        # all the tokens, one per line, with the offset of each line.
+        self.vocabulary = ""
+        self.offsets = array("l")
+        self.pending = []  # tokens not yet in vocabulary
+        # the latest modification time read, and the modification time
+        # of each row read within OVERLAP_SECONDS of it.
+        self.modified = None
+        self.recent = {}
+
+    def _load(self, queryset):
+        rows = queryset.order_by().values_list("pk", "modified", "search_text")
+        for pk, modified, text in rows.iterator():
+            if self.recent.get(pk) == modified:
+                continue
+            for token in tokens(text):
+                token_id = self.token_ids.get(token)
+                if token_id is None:
+                    token_id = self.token_ids[token] = len(self.postings)
+                    self.postings.append(array("l"))
+                    self.pending.append(token)
+                posting = self.postings[token_id]
+                if not posting or posting[-1] != pk:
+                    posting.append(pk)
+            self.recent[pk] = modified
+            if self.modified is None or modified > self.modified:
+                self.modified = modified
+        if self.modified is not None:
+            cutoff = self.modified - timedelta(seconds=OVERLAP_SECONDS)
+            self.recent = dict(
+                [(pk, m) for pk, m in self.recent.items() if m >= cutoff]
+            )
+        if self.pending:
+            offset = len(self.vocabulary)
+            for token in self.pending:
+                self.offsets.append(offset)
+                offset += len(token) + 1
+            self.vocabulary += "".join([t + "\n" for t in self.pending])
+            self.pending = []
+
+    def refresh(self):
+        """
+        Build the index, or read back the rows modified since it was.
+        """
+        now = time.time()
+        queryset = self.model._base_manager.using(self.using)
+        if self.built is None or now - self.built > REBUILD_SECONDS:
+            self._reset()
+            self._load(queryset)
+            self.built = self.checked = now
+        elif self.dirty or now - self.checked > REFRESH_SECONDS:
+            if self.modified is not None:
+                since = self.modified - timedelta(seconds=OVERLAP_SECONDS)
+                queryset = queryset.filter(modified__gte=since)
+            self._load(queryset)
+            self.checked = now
+        self.dirty = False
+
+    def _matching(self, part):
+        """
+        The ids of the tokens containing ``part``, or None if there are
+        more than MAX_TOKENS of them.
+        """
+        result = []
+        start = self.vocabulary.find(part)
+        while start >= 0:
+            if len(result) == MAX_TOKENS:
+                return None
+            token_id = bisect_right(self.offsets, start) - 1
+            result.append(token_id)
+            if token_id + 1 == len(self.offsets):
+                break
+            start = self.vocabulary.find(part, self.offsets[token_id + 1])
+        return result
+
+    def _size(self, token_ids):
+        return sum([len(self.postings[t]) for t in token_ids])
+
+    def candidates(self, terms):
+        """
+        Return the set of pks which may match all of ``terms``, or None
+        when the index cannot narrow the search.
+        """
+        with self.lock:
+            self.refresh()
+            matches = []
+            for term in terms:
+                parts = tokens(term)
+                if not parts:
+                    return None
+                longer = [p for p in parts if len(p) >= MIN_PART_LENGTH]
+                for part in longer or parts:
+                    token_ids = self._matching(part)
+                    if token_ids is not None:
+                        matches.append(token_ids)
+            if not matches:
+                return None
+            # the most selective parts first; the database checks the rest.
+            matches.sort(key=self._size)
+            result = None
+            for token_ids in matches:
+                if result is not None and len(result) <= MAX_CANDIDATES:
+                    break
+                pks = set()
+                for token_id in token_ids:
+                    pks.update(self.postings[token_id])
+                result = pks if result is None else result & pks
+                if not result:
+                    break
+            return result
+
+
+#######################################################################
+
+
+def get(model, using):
+    """
+    The index for ``model`` in the database ``using``.
+    """
+    key = (model._meta.label, using)
+    with _lock:
+        if key not in _indexes:
+            _indexes[key] = MemoryIndex(model, using)
+        return _indexes[key]
+
+
+def candidates(model, using, terms):
+    """
+    The pks which may match all of ``terms`` (see MemoryIndex), or
+    None when the database should search without them.
+    """
+    result = get(model, using).candidates(terms)
+    if result is not None and len(result) > MAX_CANDIDATES:
+        return None
+    return result
+
+
+def changed(model, using):
+    """
+    Note that search documents of ``model`` have changed in this process.
+    """
+    index = _indexes.get((model._meta.label, using))
+    if index is not None:
+        index.dirty = True
+
+
+#######################################################################
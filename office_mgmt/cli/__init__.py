@@ -92,7 +92,9 @@ def object_with_fields(object, fields=None):
     Return a list of tab delimited strings of the object and its fields.
     """
     if fields is None:
-        fields = [f.name for f in object.__class__._meta.fields]
+        fields = [
+            f.name for f in object.__class__._meta.fields if f.name != "search_text"
+        ]
     lines = [object.__class__.__name__ + "\t" + force_text(object)]
     values = resolve_fields(object, fields)
     lines += ["\t" + f + "\t" + v for f, v in zip(fields, values)]
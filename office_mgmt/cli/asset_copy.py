@@ -8,6 +8,7 @@ import sys
 from optparse import make_option
 
 from django.db import models
+from mgmt_common.bulk import bulk_mode
 
 from ..models import Asset
 
@@ -139,6 +140,7 @@ def copy_obj(
 #######################################################################
 
 
+@bulk_mode()
 def asset_copy(src, serial_number, **kwargs):
     """
     Copy the ``src`` Asset, including all related information.
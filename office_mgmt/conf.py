@@ -23,6 +23,9 @@ DEFAULT = {
     # 'upload_to' is the variable portion of the path where files are stored.
     # (optional)
     "upload_to": "asset-paperwork/%Y/%m",
+    # Narrow asset searches with a process-local inverted index
+    # (see mgmt_common.searchindex); for databases other than PostgreSQL.
+    "search:memory_index": False,
 }
 
 #########################################################################
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:10
+
+from django.db import migrations, models
+from mgmt_common import search
+
+# AssetQuerySet.search_fields, as of this migration.
+SEARCH_FIELDS = ["serial_number", "property_number", "description"]
+
+
+def fill_search_text(apps, schema_editor):
+    Asset = apps.get_model("office_mgmt", "Asset")
+    db_alias = schema_editor.connection.alias
+    search.refresh(Asset.objects.using(db_alias), SEARCH_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("office_mgmt", "0003_auto_20170602_1056")]
+
+    operations = [
+        migrations.AddField(
+            model_name="asset",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        search.SearchIndex("asset"),
+    ]
@@ -7,6 +7,7 @@ from __future__ import print_function, unicode_literals
 from django.db import models
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.timezone import now
+from mgmt_common import search
 from mgmt_common.base import MgmtBaseModel
 
 from . import conf
@@ -100,6 +101,9 @@ class Asset(MgmtBaseModel):
 
     notes = models.TextField(null=True, blank=True)
 
+    # maintained from AssetQuerySet.search_fields (see mgmt_common.search)
+    search_text = models.TextField(blank=True, default="", editable=False)
+
     objects = AssetManager()
 
     class Meta:
@@ -118,6 +122,8 @@ class Asset(MgmtBaseModel):
             return "{}".format(self.serial_number)
 
 
+models.signals.post_save.connect(search.search_text_post_save, sender=Asset)
+
 #######################################################################
 
 
@@ -7,6 +7,8 @@ from __future__ import print_function, unicode_literals
 from django.db import models
 from mgmt_common.base import MgmtBaseQuerySet
 
+from . import conf
+
 #######################
 #######################################################################
 
@@ -19,6 +21,11 @@ class AssetQuerySet(MgmtBaseQuerySet):
     use these methods, never .filter(...).
     """
 
+    search_fields = ["serial_number", "property_number", "description"]
+
+    def use_search_index(self):
+        return conf.get("search:memory_index")
+
 
 #######################################################################
 